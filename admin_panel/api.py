@@ -0,0 +1,185 @@
+"""
+Versioned JSON API of the admin panel (/admin-panel/api/v1/).
+
+Lists and details of applications, messages and job roles, for clients that
+only need data: ?fields= selects the columns (only those are fetched),
+cursor pagination and filters are the ones of the HTML lists, and every
+response carries an ETag derived from the cache data version, so an
+unchanged resource costs a 304 without any query. Responses are serialized
+with orjson when it is installed.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.views.decorators.http import condition, require_GET
+
+from applications.models import JobApplication
+from careers.models import JobRole
+from contact.models import ContactMessage
+from core.cache import get_data_version
+from core.projections import Projection
+from .filters import filter_applications, filter_jobs, filter_messages
+from .pagination import PAGE_SIZE, decode_cursor, paginate
+
+try:
+    import orjson
+except ImportError:  # optional, faster serialization
+    orjson = None
+
+
+API_VERSION = 'v1'
+
+# Largest page a client can ask for with ?limit=
+MAX_PAGE_SIZE = 200
+
+
+class Resource:
+    """A model exposed by the API, with its selectable and default fields"""
+
+    def __init__(self, model, date_field, filter_function, fields, default_fields):
+        self.model = model
+        self.date_field = date_field
+        self.filter_function = filter_function
+        self.fields = fields
+        self.default_fields = default_fields
+
+
+RESOURCES = {
+    'applications': Resource(
+        JobApplication, 'applied_at', filter_applications,
+        fields=(
+            'id', 'role', 'application_type', 'nom', 'post_nom', 'prenom', 'full_name', 'date_of_birth',
+            'lieu_de_naissance', 'sexe', 'nationalite', 'physical_address', 'phone', 'city',
+            'how_heard_about', 'how_heard_details', 'education', 'skills', 'languages', 'cv_file',
+            'message', 'applied_at', 'reviewed', 'stage', 'notes',
+        ),
+        default_fields=(
+            'id', 'nom', 'post_nom', 'prenom', 'full_name', 'phone', 'city', 'applied_at', 'reviewed', 'stage',
+        ),
+    ),
+    'messages': Resource(
+        ContactMessage, 'created_at', filter_messages,
+        fields=('id', 'name', 'email', 'phone', 'subject', 'message', 'created_at', 'read', 'replied', 'notes'),
+        default_fields=('id', 'name', 'email', 'subject', 'created_at', 'read', 'replied'),
+    ),
+    'jobs': Resource(
+        JobRole, 'created_at', filter_jobs,
+        fields=(
+            'id', 'title', 'slug', 'description', 'responsibilities', 'requirements', 'benefits',
+            'employment_type', 'location', 'is_active', 'created_at', 'updated_at', 'applicant_count', 'unreviewed_count',
+        ),
+        default_fields=(
+            'id', 'title', 'slug', 'employment_type', 'location', 'is_active', 'created_at',
+            'applicant_count', 'unreviewed_count',
+        ),
+    ),
+}
+
+
+class APIError(Exception):
+    """Client error reported as a JSON body"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def dumps(data):
+    """Serialize to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def api_response(data, status=200):
+    return HttpResponse(dumps(data), content_type='application/json', status=status)
+
+
+def api_view(view):
+    """Staff-only JSON view: errors are JSON instead of login redirects"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_response({'error': 'Authentification requise.'}, status=401)
+        if not request.user.is_staff:
+            return api_response({'error': 'Accès réservé au personnel.'}, status=403)
+        try:
+            return view(request, *args, **kwargs)
+        except APIError as error:
+            return api_response({'error': str(error)}, status=error.status)
+    return wrapper
+
+
+def get_resource(name):
+    try:
+        return RESOURCES[name]
+    except KeyError:
+        raise APIError('Ressource inconnue.', status=404)
+
+
+def parse_fields(resource, value):
+    """Requested fields, in the order given, or the resource defaults"""
+    if not value:
+        return resource.default_fields
+    fields = [field for field in dict.fromkeys(value.split(',')) if field]
+    unknown = [field for field in fields if field not in resource.fields]
+    if unknown:
+        raise APIError(f"Champs inconnus : {', '.join(unknown)}. Champs disponibles : {', '.join(resource.fields)}.")
+    return fields
+
+
+def parse_limit(value):
+    if not value:
+        return PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise APIError('limit doit être un entier.')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def data_etag(request, *args, **kwargs):
+    """Changes with the data version and with the query (fields, filters, cursor)"""
+    key = f'{get_data_version()}:{request.get_full_path()}'
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+@api_view
+@require_GET
+@condition(etag_func=data_etag)
+def resource_list(request, resource):
+    """Keyset-paginated list of a resource"""
+    resource = get_resource(resource)
+    fields = parse_fields(resource, request.GET.get('fields'))
+    limit = parse_limit(request.GET.get('limit'))
+    
+    cursor = decode_cursor(request.GET.get('cursor'))
+    params = cursor.filters if cursor else request.GET
+    queryset, filters = resource.filter_function(resource.model.objects.all(), params)
+    
+    # The date column is always read: the cursors are built from it
+    projection = Projection(*fields, resource.date_field)
+    page = paginate(queryset, resource.date_field, cursor, filters, page_size=limit, projection=projection)
+    
+    return api_response({
+        'results': [{field: row.__dict__[field] for field in fields} for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+        'filters': filters,
+    })
+
+
+@api_view
+@require_GET
+@condition(etag_func=data_etag)
+def resource_detail(request, resource, pk):
+    """One row of a resource"""
+    resource = get_resource(resource)
+    fields = parse_fields(resource, request.GET.get('fields'))
+    row = resource.model.objects.filter(pk=pk).values(*fields).first()
+    if row is None:
+        raise APIError('Introuvable.', status=404)
+    return api_response(row)
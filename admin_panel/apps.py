@@ -1,12 +1,19 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.db.models.signals import post_migrate
 
 
 class AdminPanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_panel'
     verbose_name = 'Admin Panel'
-
-
-
-
-
+    
+    def ready(self):
+        from .search import install_search_index
+        
+        # admin_panel has no models, so hook the search index installation on
+        # the last searched app: post_migrate runs once all migrations applied
+        post_migrate.connect(
+            install_search_index,
+            sender=apps.get_app_config('contact'),
+            dispatch_uid='admin_panel.install_search_index',
+        )
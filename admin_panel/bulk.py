@@ -0,0 +1,141 @@
+"""
+Bulk operations of the admin panel lists.
+
+An operation applies to the selected rows or to the whole current filter
+result. It runs as set-based UPDATE/DELETE statements over chunks of
+primary keys, all inside one transaction, so that either every row is
+processed or none is. Stage moves are the exception: move_to_stage()
+commits each chunk on its own, so that a large selection does not hold
+its row locks until the end of the run. The ActivityQuerySet of the models keeps the daily
+rollup and the cache version in step with the bulk statements.
+
+Download actions change nothing: their operation returns the file to send.
+"""
+from contextlib import nullcontext
+
+from django.db import transaction
+from django.db.models import Case, F, TextField, Value, When
+from django.db.models.functions import Concat
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from applications.cv_archive import archive_chunks
+from applications.cv_cache import CV_FIELDS
+from applications.pipeline import STAGES, move_to_stage
+
+
+# Primary keys per UPDATE/DELETE statement
+CHUNK_SIZE = 500
+
+# Longest note that can be appended at once
+NOTE_MAX_LENGTH = 2000
+
+
+def set_fields(**values):
+    """Operation setting fields to literal values"""
+    def operation(queryset, note, user):
+        return queryset.update(**values)
+    return operation
+
+
+def set_stage(stage):
+    """Operation moving applications to a pipeline stage, with their history"""
+    def operation(queryset, note, user):
+        return move_to_stage(queryset, stage, user=user, note=note)
+    return operation
+
+
+def append_note(queryset, note, user):
+    """Append note to the internal notes, after a blank line if some exist"""
+    return queryset.update(notes=Case(
+        When(notes='', then=Value(note)),
+        default=Concat(F('notes'), Value('\n\n' + note), output_field=TextField()),
+        output_field=TextField(),
+    ))
+
+
+def download_cvs(queryset, note, user):
+    """ZIP archive of the CVs of the applications, streamed as it is written"""
+    applications = queryset.only('application_type', 'cv_file', *CV_FIELDS).order_by('-applied_at', '-id')
+    response = StreamingHttpResponse(
+        archive_chunks(applications.iterator(chunk_size=50)),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = f'attachment; filename="cv_candidatures_{timezone.localdate():%Y%m%d}.zip"'
+    # Sent as it is built rather than buffered by nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def delete(queryset, note, user):
+    """Delete the rows, returning the number of rows of the model deleted"""
+    return queryset.delete()[1].get(queryset.model._meta.label, 0)
+
+
+class BulkAction:
+    """An operation offered on a list page"""
+
+    def __init__(self, label, operation, needs_note=False, destructive=False, download=False, atomic=True):
+        self.label = label
+        self.operation = operation
+        self.needs_note = needs_note
+        self.destructive = destructive
+        # False when the operation commits each chunk itself
+        self.atomic = atomic
+        # The operation returns a response to send instead of a row count
+        self.download = download
+
+
+APPLICATION_ACTIONS = {
+    'mark_reviewed': BulkAction('Marquer comme examinées', set_fields(reviewed=True)),
+    'mark_unreviewed': BulkAction('Marquer comme non examinées', set_fields(reviewed=False)),
+    **{
+        f'stage_{stage}': BulkAction(f'Étape : {label}', set_stage(stage), atomic=False)
+        for stage, label in STAGES.items()
+    },
+    'append_note': BulkAction('Ajouter une note', append_note, needs_note=True),
+    'download_cvs': BulkAction('Télécharger les CV (ZIP)', download_cvs, download=True),
+    'delete': BulkAction('Supprimer', delete, destructive=True),
+}
+
+MESSAGE_ACTIONS = {
+    'mark_read': BulkAction('Marquer comme lus', set_fields(read=True)),
+    'mark_unread': BulkAction('Marquer comme non lus', set_fields(read=False)),
+    'mark_replied': BulkAction('Marquer comme répondus', set_fields(replied=True)),
+    'append_note': BulkAction('Ajouter une note', append_note, needs_note=True),
+    'delete': BulkAction('Supprimer', delete, destructive=True),
+}
+
+
+def selected_ids(values):
+    """Valid primary keys from the posted checkboxes"""
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def run_bulk(queryset, action, note='', user=None, chunk_size=CHUNK_SIZE):
+    """
+    Apply action to every row of queryset, chunk by chunk in primary key
+    order, in a single transaction unless the action commits each chunk
+    itself. Returns the number of rows affected.
+    """
+    model = queryset.model
+    queryset = queryset.order_by('pk')
+    affected = 0
+    last_pk = None
+    with transaction.atomic(using=queryset.db) if action.atomic else nullcontext():
+        while True:
+            # Rows already processed are left behind by the pk bound, even
+            # when the operation takes them out of the filter
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            affected += action.operation(model._default_manager.filter(pk__in=pks), note, user)
+            last_pk = pks[-1]
+    return affected
@@ -0,0 +1,165 @@
+"""
+Facet engine for the applications list.
+
+Each facet group is counted with one grouped query over the current filter
+set, ignoring the group's own selection so that its other values stay
+visible with the number of matches they would give. Counts are cached
+briefly and dropped on every write through the data version (core.cache).
+"""
+import hashlib
+import json
+from datetime import date
+
+from django.db.models import Case, CharField, Count, F, Value, When
+from django.utils import timezone
+
+from applications.models import JobApplication
+from core.cache import get_or_build
+
+
+# Seconds during which facet counts may be reused for the same filters
+FACET_CACHE_TIMEOUT = 60
+
+# Free-text columns only show their most frequent values
+FREE_TEXT_LIMIT = 12
+
+
+def years_ago(today, years):
+    """Same calendar day, `years` years before today (28/02 for 29/02)"""
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(year=today.year - years, day=28)
+
+
+class Facet:
+    """A facet group: the request parameter, its label and how to group rows"""
+
+    def __init__(self, name, label, field=None, choices=None, free_text=False):
+        self.name = name
+        self.label = label
+        self.field = field or name
+        self.choices = dict(choices) if choices else None
+        self.free_text = free_text
+
+    def expression(self):
+        return F(self.field)
+
+    def filter(self, queryset, value):
+        return queryset.filter(**{self.field: value})
+
+    def is_valid(self, value):
+        return self.free_text or value in self.choices
+
+    def label_for(self, value):
+        if self.choices:
+            return self.choices.get(value, value)
+        return value
+
+
+class AgeFacet(Facet):
+    """Age bands computed from date_of_birth with sargable date ranges"""
+
+    BANDS = [
+        ('moins-18', 'Moins de 18 ans', 0, 18),
+        ('18-24', '18 à 24 ans', 18, 25),
+        ('25-34', '25 à 34 ans', 25, 35),
+        ('35-44', '35 à 44 ans', 35, 45),
+        ('45-plus', '45 ans et plus', 45, None),
+    ]
+
+    def __init__(self):
+        super().__init__('age', "Tranche d'âge", field='date_of_birth',
+                         choices=[(key, label) for key, label, _, _ in self.BANDS])
+
+    def expression(self):
+        today = timezone.localdate()
+        whens = [
+            When(date_of_birth__gt=years_ago(today, upper), then=Value(key))
+            for key, _, _, upper in self.BANDS if upper is not None
+        ]
+        whens.append(When(date_of_birth__isnull=False, then=Value(self.BANDS[-1][0])))
+        return Case(*whens, default=Value(None), output_field=CharField())
+
+    def filter(self, queryset, value):
+        today = timezone.localdate()
+        for key, _, lower, upper in self.BANDS:
+            if key == value:
+                queryset = queryset.filter(date_of_birth__lte=years_ago(today, lower))
+                if upper is not None:
+                    queryset = queryset.filter(date_of_birth__gt=years_ago(today, upper))
+        return queryset
+
+
+FACETS = [
+    Facet('application_type', 'Type de candidature', choices=JobApplication.APPLICATION_TYPE_CHOICES),
+    Facet('sexe', 'Sexe', choices=JobApplication.GENDER_CHOICES),
+    AgeFacet(),
+    Facet('how_heard_about', 'Source', choices=JobApplication.HOW_HEARD_CHOICES),
+    Facet('city', 'Ville', free_text=True),
+    Facet('nationalite', 'Nationalité', free_text=True),
+]
+
+
+def selected_facets(params):
+    """Valid facet values found in params, keyed by facet name"""
+    selected = {}
+    for facet in FACETS:
+        value = params.get(facet.name, '')
+        if value and facet.is_valid(value):
+            selected[facet.name] = value
+    return selected
+
+
+def apply_facets(queryset, selected, exclude=None):
+    """Filter a queryset by every selected facet except `exclude`"""
+    for facet in FACETS:
+        if facet.name != exclude and facet.name in selected:
+            queryset = facet.filter(queryset, selected[facet.name])
+    return queryset
+
+
+def _count_facet(base_queryset, facet, selected):
+    queryset = apply_facets(base_queryset, selected, exclude=facet.name)
+    rows = (
+        queryset.order_by()
+        .values(value=facet.expression())
+        .annotate(count=Count('pk'))
+        .order_by('-count', 'value')
+    )
+    if facet.free_text:
+        rows = rows.exclude(value__isnull=True).exclude(value='')[:FREE_TEXT_LIMIT]
+
+    counts = {row['value']: row['count'] for row in rows if row['value'] not in (None, '')}
+    if facet.choices:
+        values = [value for value in facet.choices if counts.get(value)]
+    else:
+        values = list(counts)
+
+    current = selected.get(facet.name)
+    if current and current not in values:
+        values.append(current)
+    return {
+        'name': facet.name,
+        'label': facet.label,
+        'selected': current or '',
+        'values': [
+            {'value': value, 'label': facet.label_for(value), 'count': counts.get(value, 0)}
+            for value in values
+        ],
+    }
+
+
+def facet_counts(base_queryset, selected, filters):
+    """
+    Facet groups with their values and counts for the current filters.
+    base_queryset must already carry the non-facet filters described by
+    `filters` (search, review status), which only serve as cache key.
+    """
+    key_data = json.dumps({'filters': filters, 'facets': selected, 'day': date.isoformat(timezone.localdate())}, sort_keys=True)
+    key = 'admin_panel:facets:' + hashlib.sha1(key_data.encode()).hexdigest()
+
+    def build():
+        return [_count_facet(base_queryset, facet, selected) for facet in FACETS]
+
+    return get_or_build(key, build, timeout=FACET_CACHE_TIMEOUT)
@@ -0,0 +1,82 @@
+"""
+Filters shared by the admin panel list views.
+
+Each function takes a queryset and a mapping of parameters (request.GET or
+the filters stored in a pagination cursor) and returns the filtered queryset
+with the normalized filter values to show in the template.
+"""
+from applications.pipeline import STAGES
+from .facets import apply_facets, selected_facets
+from .search import filter_queryset
+
+
+def filter_applications(queryset, params, with_facets=True):
+    """Filter job applications by search text, review status, pipeline stage, role and facets"""
+    search = params.get('search', '').strip()
+    reviewed = params.get('reviewed', '')
+    stage = params.get('stage', '')
+    role = params.get('role', '')
+    
+    if search:
+        queryset = filter_queryset(queryset, 'applications', search)
+    
+    if reviewed == 'yes':
+        queryset = queryset.filter(reviewed=True)
+    elif reviewed == 'no':
+        queryset = queryset.filter(reviewed=False)
+    else:
+        reviewed = ''
+    
+    if stage in STAGES:
+        queryset = queryset.filter(stage=stage)
+    else:
+        stage = ''
+    
+    if role.isdigit():
+        queryset = queryset.filter(role_id=int(role))
+    else:
+        role = ''
+    
+    filters = {'search': search, 'reviewed': reviewed, 'stage': stage, 'role': role}
+    if with_facets:
+        selected = selected_facets(params)
+        queryset = apply_facets(queryset, selected)
+        filters.update(selected)
+    
+    return queryset, filters
+
+
+def filter_messages(queryset, params):
+    """Filter contact messages by search text and read status"""
+    search = params.get('search', '').strip()
+    read = params.get('read', '')
+    
+    if search:
+        queryset = filter_queryset(queryset, 'messages', search)
+    
+    if read == 'yes':
+        queryset = queryset.filter(read=True)
+    elif read == 'no':
+        queryset = queryset.filter(read=False)
+    else:
+        read = ''
+    
+    return queryset, {'search': search, 'read': read}
+
+
+def filter_jobs(queryset, params):
+    """Filter job roles by search text and active status"""
+    search = params.get('search', '').strip()
+    active = params.get('active', '')
+    
+    if search:
+        queryset = filter_queryset(queryset, 'jobs', search)
+    
+    if active == 'yes':
+        queryset = queryset.filter(is_active=True)
+    elif active == 'no':
+        queryset = queryset.filter(is_active=False)
+    else:
+        active = ''
+    
+    return queryset, {'search': search, 'active': active}
@@ -0,0 +1,74 @@
+"""
+Live dashboard counters as short-lived server-sent events.
+
+The dashboard keeps an EventSource open on dashboard_events. Each request
+compares the client's last event id with the cache data version
+(core.cache), which changes on every write to applications, messages or job
+roles. Only when it differs does the response carry the counters and recent
+items, read from the cached dashboard context (rebuilt once per version for
+every open tab). The response always ends right away with a retry delay:
+the browser reconnects by itself, so no sync worker is held by an open tab.
+"""
+import json
+
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateformat import format as format_date
+
+from core.cache import get_data_version
+from .stats import get_dashboard_context
+
+
+# Delay before the browser reconnects, in milliseconds
+RETRY_MS = 15000
+
+COUNTERS = (
+    'total_applications', 'new_applications', 'total_jobs',
+    'active_jobs', 'total_messages', 'unread_messages',
+)
+
+
+def _when(value):
+    return format_date(timezone.localtime(value), 'd/m/Y H:i')
+
+
+def live_summary(context):
+    """JSON-ready counters and recent items of a dashboard context"""
+    summary = {name: context[name] for name in COUNTERS}
+    summary.update({f'stage_{stage}': count for stage, label, count in context['stage_counts']})
+    summary['recent_applications'] = [
+        {
+            'title': row.display_name,
+            'subtitle': row.city or '',
+            'date': _when(row.applied_at),
+            'done': row.reviewed,
+            'url': reverse('admin_panel:application_detail', args=[row.pk]),
+        }
+        for row in context['recent_applications']
+    ]
+    summary['recent_messages'] = [
+        {
+            'title': row.name,
+            'subtitle': row.subject,
+            'date': _when(row.created_at),
+            'done': row.read,
+            'url': reverse('admin_panel:message_detail', args=[row.pk]),
+        }
+        for row in context['recent_messages']
+    ]
+    return summary
+
+
+def dashboard_event(last_version):
+    """
+    Body of one event-stream response: a counters event when the data
+    changed since last_version, otherwise only the reconnection delay.
+    """
+    version = str(get_data_version())
+    lines = [f'retry: {RETRY_MS}']
+    if version != last_version:
+        data = json.dumps(live_summary(get_dashboard_context()), ensure_ascii=False)
+        lines += [f'id: {version}', 'event: counters', f'data: {data}']
+    else:
+        lines.append(': no change')
+    return '\n'.join(lines) + '\n\n'
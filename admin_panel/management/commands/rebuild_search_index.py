@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from admin_panel.search import SOURCES, install_search_index, refresh_postgresql_vectors, search_backend
+
+
+class Command(BaseCommand):
+    help = "Installe et reconstruit l'index de recherche plein texte (PostgreSQL ou SQLite FTS5)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help="Lignes mises à jour par transaction sous PostgreSQL (défaut: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        install_search_index(using=connection.alias)
+
+        backend = search_backend()
+        if backend == 'postgresql':
+            for kind, source in SOURCES.items():
+                updated = refresh_postgresql_vectors(
+                    source, batch_size=options['batch_size'], only_missing=False, using=connection.alias
+                )
+                self.stdout.write(self.style.SUCCESS(f"{kind}: {updated} ligne(s) indexée(s)"))
+        elif backend == 'sqlite':
+            with connection.cursor() as cursor:
+                for kind, source in SOURCES.items():
+                    fts = connection.ops.quote_name(source.fts_table)
+                    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                    self.stdout.write(self.style.SUCCESS(f"{kind}: index FTS5 reconstruit"))
+        else:
+            self.stdout.write(self.style.WARNING("Base de données sans index plein texte: recherche par icontains."))
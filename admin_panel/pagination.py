@@ -0,0 +1,127 @@
+"""
+Keyset (cursor) pagination for the admin panel lists.
+
+Rows are listed newest first on (date field, id). A cursor holds the key of
+the first or last row of the current page, the direction and the list
+filters, so every page is one index range scan of page_size + 1 rows whatever
+its depth (no OFFSET), and following a link keeps the current filters.
+"""
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.core import signing
+from django.db.models import Q
+
+
+PAGE_SIZE = 50
+CURSOR_SALT = 'admin_panel.pagination'
+
+NEXT = 'next'
+PREVIOUS = 'prev'
+
+
+class Cursor:
+    """Decoded position in a keyset-paginated list"""
+
+    def __init__(self, value, pk, direction, filters):
+        self.value = value
+        self.pk = pk
+        self.direction = direction
+        self.filters = filters
+
+
+class KeysetPage:
+    """One page of rows with the cursors of its neighbours"""
+
+    def __init__(self, object_list, filters, next_cursor=None, previous_cursor=None, is_first=True):
+        self.object_list = object_list
+        self.filters = filters
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.is_first = is_first
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def filter_query(self):
+        """Query string of the first page with the same filters"""
+        return urlencode({key: value for key, value in self.filters.items() if value})
+
+
+def encode_cursor(row, field, direction, filters):
+    """Signed, URL-safe cursor pointing just after (or before) row"""
+    value = getattr(row, field)
+    return signing.dumps(
+        {'k': [value.isoformat(), row.id], 'd': direction, 'f': filters},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(token):
+    """Return a Cursor, or None when the token is missing or invalid"""
+    if not token:
+        return None
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+        value, pk = data['k']
+        cursor = Cursor(datetime.fromisoformat(value), int(pk), data['d'], dict(data['f']))
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+    if cursor.direction not in (NEXT, PREVIOUS):
+        return None
+    return cursor
+
+
+def paginate(queryset, field, cursor, filters, page_size=PAGE_SIZE, projection=None):
+    """
+    Fetch the page designated by cursor (the first page when None). With a
+    projection, only its columns are fetched and rows are its row objects.
+    """
+    if projection is not None:
+        queryset = projection.values(queryset)
+    if cursor is None:
+        rows = list(queryset.order_by(f'-{field}', '-id')[:page_size + 1])
+        has_next, has_previous = len(rows) > page_size, False
+        rows = rows[:page_size]
+    elif cursor.direction == NEXT:
+        # (field, id) < (value, pk), written so that the range on field is sargable
+        rows = list(
+            queryset.filter(
+                Q(**{f'{field}__lte': cursor.value}),
+                Q(**{f'{field}__lt': cursor.value}) | Q(id__lt=cursor.pk),
+            ).order_by(f'-{field}', '-id')[:page_size + 1]
+        )
+        has_next, has_previous = len(rows) > page_size, True
+        rows = rows[:page_size]
+    else:
+        rows = list(
+            queryset.filter(
+                Q(**{f'{field}__gte': cursor.value}),
+                Q(**{f'{field}__gt': cursor.value}) | Q(id__gt=cursor.pk),
+            ).order_by(field, 'id')[:page_size + 1]
+        )
+        has_next, has_previous = True, len(rows) > page_size
+        rows = rows[:page_size][::-1]
+
+    if projection is not None:
+        rows = projection.wrap(rows)
+    
+    next_cursor = previous_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(rows[-1], field, NEXT, filters)
+    if rows and has_previous:
+        previous_cursor = encode_cursor(rows[0], field, PREVIOUS, filters)
+    return KeysetPage(rows, filters, next_cursor, previous_cursor, is_first=cursor is None)
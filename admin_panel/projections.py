@@ -0,0 +1,41 @@
+"""
+Projection profiles of the admin panel list and summary views.
+
+Each profile lists the columns its template displays; adding a column to a
+template means adding it here (the tests fail otherwise).
+"""
+from applications import names
+from applications.pipeline import STAGES
+from core.projections import Projection, Row
+
+
+class ApplicationRow(Row):
+    """Application row with the same display name and stage label as the full model"""
+
+    @property
+    def display_name(self):
+        return names.display_name(self.nom, self.post_nom, self.prenom, self.full_name) or "Candidat"
+
+    def get_stage_display(self):
+        return STAGES.get(self.stage, self.stage)
+
+
+NAME_FIELDS = ('nom', 'post_nom', 'prenom', 'full_name')
+
+# applications_list
+APPLICATION_LIST = Projection(
+    *NAME_FIELDS, 'city', 'phone', 'date_of_birth', 'applied_at', 'reviewed', 'stage',
+    row_class=ApplicationRow,
+)
+
+# Dashboard "recent applications"
+APPLICATION_SUMMARY = Projection(
+    *NAME_FIELDS, 'city', 'applied_at', 'reviewed',
+    row_class=ApplicationRow,
+)
+
+# messages_list
+MESSAGE_LIST = Projection('name', 'phone', 'subject', 'email', 'created_at', 'read', 'replied')
+
+# Dashboard "recent messages"
+MESSAGE_SUMMARY = Projection('name', 'subject', 'created_at', 'read')
@@ -0,0 +1,335 @@
+"""
+Indexed full-text search over applications, contact messages and job roles.
+
+PostgreSQL: every searched table gets a ``search_vector`` tsvector column,
+maintained by a trigger with the accent-insensitive ``french_unaccent``
+configuration and covered by a GIN index.
+SQLite: every searched table gets an external-content FTS5 shadow table
+(``<table>_fts``) kept in sync by triggers, tokenized with diacritics removed.
+Other backends, or SQLite builds without FTS5, fall back to icontains filters.
+
+These structures are backend specific, so they are not part of the Django
+migrations: install_search_index() is idempotent and runs after every migrate
+(tables rebuilt by a SQLite migration lose their triggers).
+"""
+import logging
+import re
+
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each column group (PostgreSQL setweight labels A-D)
+WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+TS_CONFIG = 'french_unaccent'
+MAX_TERMS = 8
+
+
+class SearchSource:
+    """A searched model and its columns grouped by weight"""
+
+    def __init__(self, label, columns):
+        self.label = label
+        self.columns = columns
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model(self.label)
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def fts_table(self):
+        return f'{self.table}_fts'
+
+    @property
+    def column_names(self):
+        return [column for group in self.columns.values() for column in group]
+
+    @property
+    def column_weights(self):
+        return [WEIGHTS[weight] for weight, group in self.columns.items() for _ in group]
+
+
+SOURCES = {
+    'applications': SearchSource('applications.JobApplication', {
+        'A': ['nom', 'post_nom', 'prenom', 'full_name'],
+        'B': ['phone', 'city', 'nationalite'],
+        'C': ['skills', 'education', 'languages'],
+        'D': ['physical_address', 'lieu_de_naissance', 'message', 'notes'],
+    }),
+    'messages': SearchSource('contact.ContactMessage', {
+        'A': ['name', 'email', 'subject'],
+        'B': ['phone'],
+        'D': ['message', 'notes'],
+    }),
+    'jobs': SearchSource('careers.JobRole', {
+        'A': ['title'],
+        'C': ['description', 'responsibilities', 'requirements'],
+    }),
+}
+
+# Backends on which the index was found or installed, per connection alias
+_installed = {}
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def search_terms(text):
+    """Words of a search string, without operators or punctuation"""
+    return re.findall(r'\w+', text or '')[:MAX_TERMS]
+
+
+# ---------------------------------------------------------------------------
+# Installation
+# ---------------------------------------------------------------------------
+
+def _install_sqlite(cursor, source):
+    table, fts = _quote(source.table), _quote(source.fts_table)
+    columns = source.column_names
+    column_list = ', '.join(_quote(column) for column in columns)
+    new_values = ', '.join(f'new.{_quote(column)}' for column in columns)
+    old_values = ', '.join(f'old.{_quote(column)}' for column in columns)
+
+    cursor.execute(f'PRAGMA table_info({fts})')
+    existing = [row[1] for row in cursor.fetchall()]
+    if existing and existing != columns:
+        # Column set changed: recreate the shadow table
+        cursor.execute(f'DROP TABLE {fts}')
+        existing = []
+
+    if not existing:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({column_list}, "
+            f"content={table}, content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {_quote(source.fts_table + "_ai")} AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {_quote(source.fts_table + "_ad")} AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {_quote(source.fts_table + "_au")} AFTER UPDATE OF {column_list} ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f'INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END'
+    )
+
+    if not existing:
+        cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _install_postgresql_config(cursor):
+    try:
+        with transaction.atomic():
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+        has_unaccent = True
+    except DatabaseError:
+        logger.warning("Extension unaccent indisponible: recherche sensible aux accents.")
+        has_unaccent = False
+
+    cursor.execute('SELECT 1 FROM pg_ts_config WHERE cfgname = %s', [TS_CONFIG])
+    if cursor.fetchone():
+        return
+    cursor.execute(f'CREATE TEXT SEARCH CONFIGURATION {TS_CONFIG} (COPY = french)')
+    if has_unaccent:
+        cursor.execute(
+            f'ALTER TEXT SEARCH CONFIGURATION {TS_CONFIG} '
+            'ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem'
+        )
+
+
+def _postgresql_vector(source, prefix='NEW.'):
+    parts = []
+    for weight, group in source.columns.items():
+        text = " || ' ' || ".join(f"coalesce({prefix}{_quote(column)}, '')" for column in group)
+        parts.append(f"setweight(to_tsvector('{TS_CONFIG}', {text}), '{weight}')")
+    return ' || '.join(parts)
+
+
+def _install_postgresql(cursor, source):
+    table = _quote(source.table)
+    function = _quote(f'{source.table}_search_update')
+    trigger = _quote(f'{source.table}_search_trigger')
+    column_list = ', '.join(_quote(column) for column in source.column_names)
+
+    cursor.execute(
+        'SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = %s',
+        [source.table, 'search_vector'],
+    )
+    created = cursor.fetchone() is None
+    cursor.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector')
+    cursor.execute(
+        f'CREATE INDEX IF NOT EXISTS {_quote(source.table + "_search_idx")} '
+        f'ON {table} USING GIN (search_vector)'
+    )
+    cursor.execute(
+        f'CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$ BEGIN '
+        f'NEW.search_vector := {_postgresql_vector(source)}; RETURN NEW; '
+        f'END $$ LANGUAGE plpgsql'
+    )
+    cursor.execute(f'DROP TRIGGER IF EXISTS {trigger} ON {table}')
+    cursor.execute(
+        f'CREATE TRIGGER {trigger} BEFORE INSERT OR UPDATE OF {column_list} ON {table} '
+        f'FOR EACH ROW EXECUTE FUNCTION {function}()'
+    )
+    return created
+
+
+def install_search_index(using='default', **kwargs):
+    """Create or repair the search structures of every source (idempotent)"""
+    db = connections[using]
+    with db.cursor() as cursor:
+        if db.vendor == 'postgresql':
+            with transaction.atomic(using=using):
+                _install_postgresql_config(cursor)
+                created = [source for source in SOURCES.values() if _install_postgresql(cursor, source)]
+            for source in created:
+                refresh_postgresql_vectors(source, using=using)
+        elif db.vendor == 'sqlite':
+            try:
+                with transaction.atomic(using=using):
+                    for source in SOURCES.values():
+                        _install_sqlite(cursor, source)
+            except DatabaseError as e:
+                logger.warning(f"Index de recherche FTS5 indisponible: {e}")
+                _installed[using] = None
+                return
+        else:
+            return
+    _installed[using] = db.vendor
+
+
+def refresh_postgresql_vectors(source, batch_size=5000, only_missing=True, using='default'):
+    """Fill search_vector in batches; returns the number of rows updated"""
+    db = connections[using]
+    table = _quote(source.table)
+    first_column = _quote(source.column_names[0])
+    condition = 'WHERE search_vector IS NULL' if only_missing else ''
+    updated, last_id = 0, 0
+    while True:
+        with transaction.atomic(using=using), db.cursor() as cursor:
+            # Setting a watched column to itself fires the update trigger
+            cursor.execute(
+                f'UPDATE {table} SET {first_column} = {first_column} WHERE id IN ('
+                f'SELECT id FROM {table} {condition} {"AND" if condition else "WHERE"} id > %s '
+                f'ORDER BY id LIMIT %s) RETURNING id',
+                [last_id, batch_size],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return updated
+        updated += len(ids)
+        last_id = max(ids)
+
+
+def search_backend():
+    """'postgresql', 'sqlite' or None when only the fallback is available"""
+    alias = connection.alias
+    if alias not in _installed:
+        if connection.vendor == 'postgresql':
+            _installed[alias] = 'postgresql'
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [SOURCES['applications'].fts_table],
+                )
+                _installed[alias] = 'sqlite' if cursor.fetchone() else None
+        else:
+            _installed[alias] = None
+    return _installed[alias]
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _fts_query(terms):
+    """Prefix query matching every term, in the syntax of the active backend"""
+    if search_backend() == 'sqlite':
+        return ' '.join(f'"{term}"*' for term in terms)
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def _match_sql(source, terms, ranked=True):
+    """SQL selecting the ids (and rank) of matching rows, and its params"""
+    query = _fts_query(terms)
+    if search_backend() == 'sqlite':
+        fts = _quote(source.fts_table)
+        if not ranked:
+            return f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [query]
+        weights = ', '.join(str(weight) for weight in source.column_weights)
+        return (
+            f'SELECT rowid, bm25({fts}, {weights}) AS rank FROM {fts} '
+            f'WHERE {fts} MATCH %s ORDER BY rank',
+            [query],
+        )
+
+    table = _quote(source.table)
+    tsquery = f"to_tsquery('{TS_CONFIG}', %s)"
+    if not ranked:
+        return f'SELECT id FROM {table} WHERE search_vector @@ {tsquery}', [query]
+    return (
+        f'SELECT id, ts_rank_cd(search_vector, {tsquery}, 32) AS rank FROM {table} '
+        f'WHERE search_vector @@ {tsquery} ORDER BY rank DESC',
+        [query, query],
+    )
+
+
+def _fallback_filter(source, terms):
+    condition = Q()
+    for term in terms:
+        term_condition = Q()
+        for column in source.column_names:
+            term_condition |= Q(**{f'{column}__icontains': term})
+        condition &= term_condition
+    return condition
+
+
+def filter_queryset(queryset, kind, text):
+    """Restrict a queryset of SOURCES[kind] to the rows matching text"""
+    source = SOURCES[kind]
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+    if search_backend() is None:
+        return queryset.filter(_fallback_filter(source, terms))
+    sql, params = _match_sql(source, terms, ranked=False)
+    return queryset.filter(pk__in=RawSQL(sql, params))
+
+
+def search(kind, text, limit=20):
+    """Best matching objects of SOURCES[kind], most relevant first"""
+    source = SOURCES[kind]
+    terms = search_terms(text)
+    if not terms:
+        return []
+    manager = source.model._default_manager
+    if search_backend() is None:
+        return list(manager.filter(_fallback_filter(source, terms))[:limit])
+
+    sql, params = _match_sql(source, terms)
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} LIMIT %s', params + [limit])
+        ranked = [row[0] for row in cursor.fetchall()]
+    objects = manager.in_bulk(ranked)
+    return [objects[pk] for pk in ranked if pk in objects]
+
+
+def global_search(text, limit=20):
+    """Ranked results of every source, keyed like SOURCES"""
+    return {kind: search(kind, text, limit) for kind in SOURCES}
@@ -0,0 +1,112 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from applications.models import JobApplication
+from applications.pipeline import stage_summary
+from careers.models import JobRole
+from contact.models import ContactMessage
+from core.cache import get_or_build
+from core.models import DailyActivityStat
+from .projections import APPLICATION_SUMMARY, MESSAGE_SUMMARY
+
+
+# Periods (in days) selectable on the dashboard with ?range=
+DASHBOARD_RANGES = (7, 30, 90, 365)
+DEFAULT_RANGE = 7
+
+
+def parse_range(value):
+    """Return a supported dashboard range, falling back to the default"""
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RANGE
+    return days if days in DASHBOARD_RANGES else DEFAULT_RANGE
+
+
+def range_days(days):
+    """Local calendar days covered by the range, oldest first"""
+    today = timezone.localdate()
+    return [today - timedelta(days=x) for x in range(days - 1, -1, -1)]
+
+
+def chart_bars(days, counts):
+    """Bar heights (percent of the busiest day) for the dashboard charts"""
+    values = [counts.get(day, 0) for day in days]
+    peak = max(values) or 1
+    return [
+        {
+            'label': day.strftime('%d/%m'),
+            'count': value,
+            'height': round(value * 100 / peak),
+        }
+        for day, value in zip(days, values)
+    ]
+
+
+def get_dashboard_stats(days=DEFAULT_RANGE):
+    """
+    Compute every dashboard counter from the DailyActivityStat rollup:
+    one query for the all-time totals, one for the per-day series and one
+    for the job roles, whatever the size of the range or of the raw tables.
+    The pipeline stage totals come from the StageCount counters.
+    """
+    totals = dict(
+        DailyActivityStat.objects.order_by()
+        .values_list('entity')
+        .annotate(total=Sum('count'))
+    )
+
+    period = range_days(days)
+    series = defaultdict(dict)
+    rows = DailyActivityStat.objects.filter(
+        date__gte=period[0],
+        entity__in=[DailyActivityStat.APPLICATIONS, DailyActivityStat.MESSAGES],
+    ).values_list('entity', 'date', 'count')
+    for entity, day, count in rows:
+        series[entity][day] = count
+
+    jobs = JobRole.objects.order_by().aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+    )
+
+    total_applications = totals.get(DailyActivityStat.APPLICATIONS, 0)
+    total_messages = totals.get(DailyActivityStat.MESSAGES, 0)
+    applications_per_day = series[DailyActivityStat.APPLICATIONS]
+    messages_per_day = series[DailyActivityStat.MESSAGES]
+
+    return {
+        'total_applications': total_applications,
+        'new_applications': total_applications - totals.get(DailyActivityStat.APPLICATIONS_REVIEWED, 0),
+        'total_jobs': jobs['total'],
+        'active_jobs': jobs['active'],
+        'total_messages': total_messages,
+        'unread_messages': total_messages - totals.get(DailyActivityStat.MESSAGES_READ, 0),
+        'applications_by_day': [applications_per_day.get(day, 0) for day in period],
+        'messages_by_day': [messages_per_day.get(day, 0) for day in period],
+        'applications_chart': chart_bars(period, applications_per_day),
+        'messages_chart': chart_bars(period, messages_per_day),
+        'days': [day.strftime('%d/%m') for day in period],
+        'stage_counts': stage_summary(),
+    }
+
+
+def get_dashboard_context(days=DEFAULT_RANGE):
+    """
+    Full dashboard context (statistics and recent activity), cached per range
+    and per day until the next write to applications, messages or job roles.
+    """
+    def build():
+        context = get_dashboard_stats(days)
+        context.update({
+            'recent_applications': APPLICATION_SUMMARY.rows(JobApplication.objects.all(), limit=5),
+            'recent_messages': MESSAGE_SUMMARY.rows(ContactMessage.objects.all(), limit=5),
+        })
+        return context
+
+    today = timezone.localdate()
+    return get_or_build(f'admin_panel:dashboard:{days}:{today.isoformat()}', build)
@@ -0,0 +1,738 @@
+import csv
+import json
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from xml.etree import ElementTree
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from reportlab.pdfgen import canvas
+
+from applications.cv_archive import MISSING_NAME, file_chunks
+from applications.cv_cache import artifact_name, cv_hash
+from applications.dossier import dossier_available, dossier_chunks
+from applications.models import STAGE_SHORTLISTED, JobApplication, StageTransition
+from applications.pipeline import move_to_stage
+from applications.pdf_utils import generate_cv_pdf
+from careers.models import JobRole
+from contact.models import ContactMessage
+from core.models import DailyActivityStat
+from core.projections import Projection, Row
+from admin_panel.api import RESOURCES
+from admin_panel.bulk import APPLICATION_ACTIONS, run_bulk
+from admin_panel.triage import unreviewed
+from core.testing import (
+    LOCMEM_CACHE, PerformanceTestCase, forbid_deferred_loads, seed_applications, seed_jobs, seed_messages,
+)
+
+
+SEED_ROWS = 120
+LONG_TEXT = 'texte très long ' * 500
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ProjectionTests(TestCase):
+    """List and summary views only fetch the columns their templates show"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        for i in range(5):
+            JobApplication.objects.create(
+                nom=f'Nom{i}', prenom='Prénom', phone='0810000000', city='Kinshasa',
+                education=LONG_TEXT, skills=LONG_TEXT, message=LONG_TEXT, notes=LONG_TEXT,
+            )
+            ContactMessage.objects.create(
+                name=f'Contact {i}', email='contact@example.com', subject='Sujet', message=LONG_TEXT,
+            )
+    
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+    
+    def assertProjected(self, url, columns):
+        with forbid_deferred_loads(), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            for column in columns:
+                self.assertNotIn(f'"{column}"', query['sql'])
+        return response
+    
+    def test_applications_list(self):
+        response = self.assertProjected(
+            reverse('admin_panel:applications_list'), ['education', 'skills', 'message', 'notes']
+        )
+        self.assertContains(response, 'Prénom Nom0')
+    
+    def test_messages_list(self):
+        response = self.assertProjected(reverse('admin_panel:messages_list'), ['message'])
+        self.assertContains(response, 'Contact 0')
+    
+    def test_dashboard(self):
+        response = self.assertProjected(
+            reverse('admin_panel:dashboard'), ['education', 'skills', 'message', 'notes']
+        )
+        self.assertContains(response, 'Prénom Nom4')
+    
+    def test_admin_changelist(self):
+        self.assertProjected(
+            reverse('admin:applications_jobapplication_changelist'), ['education', 'skills', 'message', 'notes']
+        )
+    
+    def test_guard_reports_deferred_loads(self):
+        application = JobApplication.objects.only('nom').first()
+        with forbid_deferred_loads(), self.assertRaises(AssertionError):
+            application.skills
+    
+    def test_guard_reports_missing_row_columns(self):
+        row = Projection('nom').rows(JobApplication.objects.all(), limit=1)[0]
+        self.assertIsInstance(row, Row)
+        with self.assertRaises(AttributeError):
+            row.phone
+        with forbid_deferred_loads(), self.assertRaises(AssertionError):
+            row.phone
+
+
+class AdminPanelPerformanceTests(PerformanceTestCase):
+    """Query budgets of every admin panel view, at realistic volumes"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        seed_applications(SEED_ROWS)
+        seed_messages(SEED_ROWS)
+        seed_jobs(12)
+    
+    def setUp(self):
+        super().setUp()
+        self.login_staff()
+    
+    def get(self, name, *args, budget, **params):
+        with self.assertBudget(budget):
+            response = self.client.get(reverse(f'admin_panel:{name}', args=args), params)
+        self.assertIn(response.status_code, (200, 302))
+        return response
+    
+    def test_login_page(self):
+        self.client.logout()
+        self.get('login', budget=0)
+    
+    def test_dashboard(self):
+        self.get('dashboard', budget=8)
+        # Cached until the next write
+        self.get('dashboard', budget=2)
+    
+    def test_dashboard_year_range(self):
+        self.get('dashboard', budget=8, range=365)
+    
+    def test_dashboard_events(self):
+        response = self.get('dashboard', budget=8)
+        version = str(response.context['data_version'])
+        
+        # Nothing changed: no data, and no query beyond the session
+        response = self.get('dashboard_events', budget=2, since=version)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertNotIn(b'event:', response.content)
+        self.assertIn(b'retry: ', response.content)
+        
+        # A write changes the version: counters and recent items are pushed
+        with self.captureOnCommitCallbacks(execute=True):
+            seed_applications(1, nom='Nouvelle', post_nom=None, prenom='Candidate')
+        with self.assertBudget(9):
+            response = self.client.get(
+                reverse('admin_panel:dashboard_events'), HTTP_LAST_EVENT_ID=version
+            )
+        lines = dict(line.split(': ', 1) for line in response.content.decode().splitlines() if ': ' in line)
+        self.assertEqual(lines['event'], 'counters')
+        self.assertNotEqual(lines['id'], version)
+        data = json.loads(lines['data'])
+        self.assertEqual(data['total_applications'], SEED_ROWS + 1)
+        self.assertEqual(data['recent_applications'][0]['title'], 'Candidate Nouvelle')
+    
+    def test_applications_list(self):
+        self.get('applications_list', budget=10)
+    
+    def test_applications_list_filtered(self):
+        self.get('applications_list', budget=10, search='Kinshasa', reviewed='no', city='Kinshasa', age='25-34')
+    
+    def test_applications_list_next_page(self):
+        response = self.get('applications_list', budget=10)
+        self.get('applications_list', budget=3, cursor=response.context['page'].next_cursor)
+    
+    def test_jobs_list_shows_demand(self):
+        job = JobRole.objects.filter(is_active=True).first()
+        seed_applications(4, role=job, reviewed=False)
+        response = self.get('jobs_list', budget=3)
+        self.assertContains(response, f'?role={job.pk}&amp;reviewed=no')
+        response = self.get('applications_list', budget=10, role=job.pk)
+        self.assertEqual(len(response.context['applications']), 4)
+    
+    def test_application_detail(self):
+        application = JobApplication.objects.first()
+        self.get('application_detail', application.pk, budget=4)
+    
+    def test_application_detail_quickview(self):
+        application = JobApplication.objects.first()
+        with mock.patch('applications.cv_cache.generate_cv_pdf') as render:
+            response = self.get('application_detail', application.pk, budget=4)
+            self.assertContains(response, 'Candidature soumise le')
+            key = make_template_fragment_key('cv_quickview', [application.pk, cv_hash(application)])
+            self.assertIsNotNone(cache.get(key))
+            
+            # A new version of the CV gets a new fragment
+            JobApplication.objects.filter(pk=application.pk).update(languages='Kikongo')
+            response = self.get('application_detail', application.pk, budget=4)
+            self.assertContains(response, 'Kikongo', count=2)
+        render.assert_not_called()
+    
+    def test_application_detail_post(self):
+        application = JobApplication.objects.filter(reviewed=False).first()
+        with self.assertBudget(7):
+            response = self.client.post(
+                reverse('admin_panel:application_detail', args=[application.pk]),
+                {'reviewed': 'on', 'notes': 'Profil intéressant'},
+            )
+        self.assertEqual(response.status_code, 302)
+    
+    def test_application_detail_stage_change(self):
+        application = JobApplication.objects.filter(reviewed=False).first()
+        # The move lists its chunk of primary keys before locking it
+        with self.assertBudget(20):
+            self.client.post(
+                reverse('admin_panel:application_detail', args=[application.pk]),
+                {'notes': '', 'stage': 'hired', 'stage_note': 'Contrat signé'},
+            )
+        application.refresh_from_db()
+        self.assertEqual(application.stage, 'hired')
+        self.assertTrue(application.reviewed)
+        response = self.get('application_detail', application.pk, budget=4)
+        self.assertContains(response, 'Contrat signé')
+    
+    def test_view_cv_pdf(self):
+        self.use_temporary_media()
+        application = JobApplication.objects.first()
+        with self.assertBudget(3, seconds=3):
+            response = self.client.get(reverse('admin_panel:view_cv_pdf', args=[application.pk]))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        
+        # An edited CV is revalidated and sent again, not served from the cache
+        JobApplication.objects.filter(pk=application.pk).update(skills='Conduite, service client')
+        edited = self.client.get(reverse('admin_panel:view_cv_pdf', args=[application.pk]), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(edited.status_code, 200)
+        self.assertNotEqual(edited['ETag'], response['ETag'])
+    
+    def test_download_cv(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            application = seed_applications(1, application_type='CV_UPLOAD')[0]
+            application.cv_file.save('cv.pdf', SimpleUploadedFile('cv.pdf', b'%PDF-1.4 cv'))
+            response = self.get('download_cv', application.pk, budget=3)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            response.close()
+    
+    def test_jobs_list(self):
+        self.get('jobs_list', budget=3)
+    
+    def test_job_create(self):
+        self.get('job_create', budget=2)
+        with self.assertBudget(5):
+            response = self.client.post(reverse('admin_panel:job_create'), {
+                'title': 'Superviseur', 'slug': 'superviseur', 'description': 'Description',
+                'responsibilities': 'Responsabilités', 'requirements': 'Exigences',
+                'employment_type': 'FULL_TIME', 'location': 'Kinshasa, RDC', 'is_active': 'on',
+            })
+        self.assertEqual(response.status_code, 302)
+    
+    def test_job_detail(self):
+        job = JobRole.objects.first()
+        self.get('job_detail', job.pk, budget=3)
+    
+    def test_job_delete(self):
+        job = JobRole.objects.first()
+        self.get('job_delete', job.pk, budget=3)
+        with self.assertBudget(7):
+            response = self.client.post(reverse('admin_panel:job_delete', args=[job.pk]))
+        self.assertEqual(response.status_code, 302)
+    
+    def test_messages_list(self):
+        self.get('messages_list', budget=3)
+    
+    def test_message_detail(self):
+        message = ContactMessage.objects.filter(read=False).first()
+        self.get('message_detail', message.pk, budget=7)
+    
+    def test_triage_start(self):
+        response = self.get('triage', budget=3, order='newest')
+        first = JobApplication.objects.filter(reviewed=False).order_by('-applied_at', '-id').first()
+        self.assertRedirects(response, f"{reverse('admin_panel:triage_review', args=[first.pk])}?order=newest")
+    
+    def test_triage_review(self):
+        first = JobApplication.objects.filter(reviewed=False).order_by('applied_at', 'id').first()
+        response = self.get('triage_review', first.pk, budget=4)
+        upcoming = response.context['upcoming']
+        self.assertEqual(len(upcoming), 5)
+        self.assertContains(response, f'<link rel="prefetch" href="{response.context["next_url"]}">', html=False)
+        self.assertContains(response, reverse('admin_panel:view_cv_pdf', args=[upcoming[0].pk]))
+        self.assertConstantQueries(
+            lambda: self.client.get(reverse('admin_panel:triage_review', args=[first.pk])),
+            lambda: seed_applications(SEED_ROWS),
+        )
+    
+    def test_triage_post_goes_to_next(self):
+        first, second = JobApplication.objects.filter(reviewed=False).order_by('applied_at', 'id')[:2]
+        with self.assertBudget(8):
+            response = self.client.post(
+                reverse('admin_panel:triage_review', args=[first.pk]) + '?order=oldest',
+                {'reviewed': 'on', 'notes': 'Profil retenu'},
+            )
+        self.assertRedirects(response, f"{reverse('admin_panel:triage_review', args=[second.pk])}?order=oldest")
+        first.refresh_from_db()
+        self.assertTrue(first.reviewed)
+    
+    def test_triage_queue_uses_partial_index(self):
+        first = JobApplication.objects.filter(reviewed=False).earliest('applied_at', 'id')
+        queryset = unreviewed('oldest').filter(applied_at__gte=first.applied_at)
+        self.assertIn('application_unreviewed_idx', queryset.explain())
+    
+    def test_search(self):
+        self.get('search', budget=6, q='Kinshasa')
+    
+    def test_logout(self):
+        self.get('logout', budget=4)
+    
+    def test_list_queries_do_not_grow_with_rows(self):
+        def seed():
+            seed_applications(SEED_ROWS)
+            seed_messages(SEED_ROWS)
+            seed_jobs(12)
+        
+        for name, params in [
+            ('dashboard', {}),
+            ('applications_list', {}),
+            ('applications_list', {'city': 'Goma', 'reviewed': 'no'}),
+            ('messages_list', {}),
+            ('jobs_list', {}),
+            ('search', {'q': 'Kinshasa'}),
+        ]:
+            with self.subTest(view=name, **params):
+                url = reverse(f'admin_panel:{name}')
+                self.assertConstantQueries(lambda: self.client.get(url, params), seed)
+
+
+class BulkOperationTests(PerformanceTestCase):
+    """Bulk actions of the list pages run set-based, in chunks, and keep the rollup exact"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        seed_applications(SEED_ROWS)
+        seed_messages(SEED_ROWS)
+    
+    def setUp(self):
+        super().setUp()
+        self.login_staff()
+    
+    def reviewed_total(self):
+        return sum(
+            DailyActivityStat.objects.filter(entity=DailyActivityStat.APPLICATIONS_REVIEWED)
+            .values_list('count', flat=True)
+        )
+    
+    def test_mark_selected_reviewed(self):
+        ids = list(JobApplication.objects.filter(reviewed=False).values_list('pk', flat=True)[:10])
+        with self.assertBudget(12):
+            response = self.client.post(reverse('admin_panel:applications_bulk'), {
+                'action': 'mark_reviewed', 'scope': 'selected', 'ids': ids, 'reviewed': 'no',
+            })
+        self.assertRedirects(response, reverse('admin_panel:applications_list') + '?reviewed=no')
+        self.assertFalse(JobApplication.objects.filter(pk__in=ids, reviewed=False).exists())
+        self.assertEqual(self.reviewed_total(), JobApplication.objects.filter(reviewed=True).count())
+    
+    def test_mark_whole_filter_result_in_chunks(self):
+        unreviewed_count = JobApplication.objects.filter(reviewed=False, city='Goma').count()
+        queryset = JobApplication.objects.filter(reviewed=False, city='Goma')
+        self.assertEqual(run_bulk(queryset, APPLICATION_ACTIONS['mark_reviewed'], chunk_size=4), unreviewed_count)
+        self.assertFalse(JobApplication.objects.filter(city='Goma', reviewed=False).exists())
+        self.assertTrue(JobApplication.objects.filter(reviewed=False).exists())
+        self.assertEqual(self.reviewed_total(), JobApplication.objects.filter(reviewed=True).count())
+    
+    def test_stage_action_commits_each_chunk(self):
+        queryset = JobApplication.objects.filter(city='Goma')
+        total = queryset.count()
+        depth = len(connection.atomic_blocks)
+        depths = []
+        
+        def move(queryset, stage, **kwargs):
+            depths.append(len(connection.atomic_blocks))
+            return move_to_stage(queryset, stage, **kwargs)
+        
+        with mock.patch('admin_panel.bulk.move_to_stage', move):
+            moved = run_bulk(queryset, APPLICATION_ACTIONS[f'stage_{STAGE_SHORTLISTED}'], chunk_size=4)
+        self.assertEqual(moved, total)
+        # No transaction around the run: each chunk is committed by move_to_stage
+        self.assertEqual(depths, [depth] * -(-total // 4))
+        self.assertFalse(queryset.exclude(stage=STAGE_SHORTLISTED).exists())
+        self.assertEqual(StageTransition.objects.filter(to_stage=STAGE_SHORTLISTED).count(), total)
+    
+    def test_append_note(self):
+        application = JobApplication.objects.first()
+        for note in ['Appeler lundi', 'Entretien prévu']:
+            self.client.post(reverse('admin_panel:applications_bulk'), {
+                'action': 'append_note', 'note': note, 'ids': [application.pk],
+            })
+        application.refresh_from_db()
+        self.assertEqual(application.notes, 'Appeler lundi\n\nEntretien prévu')
+    
+    def test_append_note_requires_text(self):
+        application = JobApplication.objects.first()
+        self.client.post(reverse('admin_panel:applications_bulk'), {'action': 'append_note', 'ids': [application.pk]})
+        application.refresh_from_db()
+        self.assertEqual(application.notes, '')
+    
+    def test_delete_filtered_messages(self):
+        unread = ContactMessage.objects.filter(read=False).count()
+        response = self.client.post(reverse('admin_panel:messages_bulk'), {
+            'action': 'delete', 'scope': 'all', 'read': 'no',
+        }, follow=True)
+        self.assertContains(response, f'{unread} élément(s) traité(s)')
+        self.assertEqual(ContactMessage.objects.count(), SEED_ROWS - unread)
+        messages_total = sum(
+            DailyActivityStat.objects.filter(entity=DailyActivityStat.MESSAGES).values_list('count', flat=True)
+        )
+        self.assertEqual(messages_total, SEED_ROWS - unread)
+    
+    def test_move_selected_to_stage(self):
+        ids = list(JobApplication.objects.values_list('pk', flat=True)[:5])
+        self.client.post(reverse('admin_panel:applications_bulk'), {
+            'action': 'stage_shortlisted', 'scope': 'selected', 'ids': ids,
+        })
+        self.assertEqual(JobApplication.objects.filter(pk__in=ids, stage='shortlisted').count(), 5)
+        self.assertEqual(StageTransition.objects.filter(changed_by__is_staff=True).count(), 5)
+        
+        response = self.client.get(reverse('admin_panel:applications_list'), {'stage': 'shortlisted'})
+        self.assertEqual(len(response.context['applications']), 5)
+        self.assertIn(('shortlisted', 'Présélectionnée', 5), response.context['stages'])
+    
+    def test_get_not_allowed(self):
+        response = self.client.get(reverse('admin_panel:messages_bulk'))
+        self.assertEqual(response.status_code, 405)
+
+
+class APITests(PerformanceTestCase):
+    """JSON API: sparse fieldsets, cursor pagination, filters and conditional requests"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        seed_applications(SEED_ROWS)
+        seed_messages(SEED_ROWS)
+        seed_jobs(12)
+    
+    def setUp(self):
+        super().setUp()
+        self.login_staff()
+    
+    def api(self, resource, *args, budget, **params):
+        name = 'api_detail' if args else 'api_list'
+        with self.assertBudget(budget):
+            response = self.client.get(reverse(f'admin_panel:{name}', args=[resource, *args]), params)
+        return response
+    
+    def test_default_fields_skip_long_text(self):
+        response = self.api('applications', budget=3)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = response.json()
+        self.assertEqual(len(data['results']), 50)
+        self.assertNotIn('message', data['results'][0])
+        self.assertIn('applied_at', data['results'][0])
+    
+    def test_sparse_fieldset(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.api('messages', budget=3, fields='id,subject').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'subject'})
+        page_query = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"message"', page_query)
+        self.assertNotIn('"notes"', page_query)
+    
+    def test_unknown_field(self):
+        response = self.api('jobs', budget=2, fields='id,salary')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('salary', response.json()['error'])
+    
+    def test_unknown_resource(self):
+        self.assertEqual(self.api('users', budget=2).status_code, 404)
+    
+    def test_cursor_pagination_keeps_filters(self):
+        data = self.api('applications', budget=3, reviewed='no', limit=30, fields='id,reviewed').json()
+        seen = [row['id'] for row in data['results']]
+        while data['next']:
+            data = self.api('applications', budget=3, cursor=data['next'], fields='id,reviewed').json()
+            self.assertFalse(any(row['reviewed'] for row in data['results']))
+            seen += [row['id'] for row in data['results']]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), JobApplication.objects.filter(reviewed=False).count())
+    
+    def test_detail(self):
+        job = JobRole.objects.first()
+        data = self.api('jobs', job.pk, budget=3, fields='title,slug').json()
+        self.assertEqual(data, {'title': job.title, 'slug': job.slug})
+        self.assertEqual(self.api('jobs', 0, budget=3).status_code, 404)
+    
+    def test_etag_not_modified(self):
+        response = self.api('applications', budget=3, fields='id')
+        etag = response['ETag']
+        
+        # Unchanged data: 304 without touching the tables
+        with self.assertBudget(2):
+            response = self.client.get(
+                reverse('admin_panel:api_list', args=['applications']), {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        
+        # Another query gets another ETag
+        self.assertNotEqual(self.api('applications', budget=3, fields='id,city')['ETag'], etag)
+        
+        # Any write changes it
+        with self.captureOnCommitCallbacks(execute=True):
+            seed_messages(1)
+        response = self.client.get(
+            reverse('admin_panel:api_list', args=['applications']), {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+    
+    def test_requires_staff(self):
+        self.client.logout()
+        response = self.client.get(reverse('admin_panel:api_list', args=['applications']))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+    
+    def test_queries_do_not_grow_with_rows(self):
+        def seed():
+            seed_applications(SEED_ROWS)
+            seed_messages(SEED_ROWS)
+            seed_jobs(12)
+        
+        for resource in RESOURCES:
+            with self.subTest(resource=resource):
+                url = reverse('admin_panel:api_list', args=[resource])
+                self.assertConstantQueries(lambda: self.client.get(url), seed)
+
+
+@skipUnless(dossier_available(), "pypdf n'est pas installé")
+class DossierTests(PerformanceTestCase):
+    """Dossier PDF of the filtered applications"""
+    
+    def setUp(self):
+        super().setUp()
+        self.use_temporary_media()
+        self.login_staff()
+        # Short enough for one-page CVs
+        self.manual = seed_applications(3, reviewed=False, education='Licence en gestion', skills='Conduite')
+        self.uploaded = seed_applications(1, application_type='CV_UPLOAD', reviewed=False)[0]
+        self.uploaded.cv_file.save('cv.pdf', SimpleUploadedFile('cv.pdf', generate_cv_pdf(self.manual[0])))
+        self.word = seed_applications(1, application_type='CV_UPLOAD', reviewed=False)[0]
+        self.word.cv_file.save('cv.docx', SimpleUploadedFile('cv.docx', b'PK\x03\x04'))
+        seed_applications(2, reviewed=True)
+    
+    def test_dossier(self):
+        from pypdf import PdfReader
+        with self.assertBudget(4):
+            response = self.client.get(reverse('admin_panel:applications_dossier'), {'reviewed': 'no'})
+            self.assertTrue(response.streaming)
+            pdf = PdfReader(BytesIO(b''.join(response.streaming_content)), strict=True)
+        self.assertIn('attachment; filename="dossier_candidatures_', response['Content-Disposition'])
+        
+        # Table of contents, then one page per CV, newest application first
+        self.assertEqual(len(pdf.pages), 6)
+        self.assertIn('5 candidat(s)', pdf.pages[0].extract_text())
+        candidates = [self.word, self.uploaded] + self.manual[::-1]
+        self.assertEqual(
+            [(item.title, pdf.get_destination_page_number(item)) for item in pdf.outline],
+            [('Sommaire', 0)] + [(application.display_name, page) for page, application in enumerate(candidates, 1)],
+        )
+        self.assertIn('DOCX', pdf.pages[1].extract_text())
+    
+    def test_compressed_upload(self):
+        from pypdf import PdfReader
+        buffer = BytesIO()
+        document = canvas.Canvas(buffer, pageCompression=1)
+        document.drawString(72, 720, 'CV envoyé compressé')
+        document.showPage()
+        document.save()
+        source = PdfReader(BytesIO(buffer.getvalue()))
+        self.assertIn('/FlateDecode', str(source.pages[0]['/Contents'].get_object()['/Filter']))
+        
+        self.uploaded.cv_file.save('cv.pdf', SimpleUploadedFile('cv.pdf', buffer.getvalue()))
+        pdf = PdfReader(BytesIO(b''.join(dossier_chunks(JobApplication.objects.filter(pk=self.uploaded.pk)))), strict=True)
+        self.assertEqual(len(pdf.pages), 2)
+        contents = pdf.pages[1]['/Contents'].get_object()
+        self.assertEqual(contents['/Filter'], source.pages[0]['/Contents'].get_object()['/Filter'])
+        self.assertIn('CV envoyé compressé', pdf.pages[1].extract_text())
+    
+    def test_limits(self):
+        response = self.client.get(reverse('admin_panel:applications_dossier'), {'search': 'introuvable'})
+        self.assertRedirects(response, reverse('admin_panel:applications_list') + '?search=introuvable')
+        
+        with mock.patch('admin_panel.views.DOSSIER_MAX_APPLICATIONS', 4):
+            response = self.client.get(reverse('admin_panel:applications_dossier'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ExportTests(PerformanceTestCase):
+    """CSV and XLSX exports of the filtered lists"""
+    
+    def setUp(self):
+        super().setUp()
+        self.login_staff()
+        self.applications = seed_applications(6, how_heard_about='PERSONNE')
+        JobApplication.objects.filter(pk=self.applications[1].pk).update(notes='=SOMME(A1:A2)\x0b & <b>')
+    
+    def export(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+    
+    def test_csv(self):
+        with self.assertBudget(3):
+            response, content = self.export(reverse('admin_panel:applications_export', args=['csv']), {'reviewed': 'no'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="candidatures_', response['Content-Disposition'])
+        
+        rows = list(csv.reader(StringIO(content.decode('utf-8-sig')), delimiter=';'))
+        self.assertEqual(rows[0][:6], ['ID', 'Date de candidature', 'Type de candidature', 'Poste', 'Étape', 'Examiné'])
+        # Seeded rows: one in three is reviewed; newest first
+        unreviewed = [application for application in self.applications if not application.reviewed][::-1]
+        self.assertEqual([int(row[0]) for row in rows[1:]], [application.pk for application in unreviewed])
+        
+        row = dict(zip(rows[0], rows[-1]))
+        self.assertEqual(row['Examiné'], 'Non')
+        self.assertEqual(row['Comment avez-vous connu Shine Congo?'], 'A travers une personne')
+        self.assertEqual(row['Téléphone'], self.applications[1].phone)
+        self.assertEqual(row['Notes internes'], "'=SOMME(A1:A2)\x0b & <b>")
+    
+    def test_xlsx(self):
+        with self.assertBudget(3):
+            response, content = self.export(reverse('admin_panel:applications_export', args=['xlsx']))
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        
+        archive = zipfile.ZipFile(BytesIO(content))
+        self.assertIsNone(archive.testzip())
+        namespace = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        rows = sheet.findall('.//s:row', namespace)
+        self.assertEqual(len(rows), 7)
+        header = [''.join(cell.itertext()) for cell in rows[0]]
+        values = dict(zip(header, rows[-1]))
+        
+        self.assertEqual(''.join(values['ID'].itertext()), str(self.applications[0].pk))
+        self.assertEqual(values['Date de candidature'].get('s'), '2')
+        self.assertEqual(values['Date de naissance'].get('s'), '1')
+        self.assertEqual(''.join(values['Sexe'].itertext()), 'Masculin')
+        # Characters XML does not allow are dropped
+        notes = dict(zip(header, rows[-2]))['Notes internes']
+        self.assertEqual(''.join(notes.itertext()), '=SOMME(A1:A2) & <b>')
+    
+    def test_xlsx_zip64(self):
+        # A sheet past the ZIP32 limit, lowered so that a few rows reach it
+        with mock.patch('zipfile.ZIP64_LIMIT', 1024):
+            response, content = self.export(reverse('admin_panel:applications_export', args=['xlsx']))
+        archive = zipfile.ZipFile(BytesIO(content))
+        self.assertIsNone(archive.testzip())
+        self.assertGreater(archive.getinfo('xl/worksheets/sheet1.xml').file_size, 1024)
+    
+    def test_messages(self):
+        seed_messages(4)
+        response, content = self.export(reverse('admin_panel:messages_export', args=['csv']), {'read': 'no'})
+        rows = list(csv.reader(StringIO(content.decode('utf-8-sig')), delimiter=';'))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(dict(zip(rows[0], rows[1]))['Lu'], 'Non')
+        
+        response, content = self.export(reverse('admin_panel:messages_export', args=['xlsx']), {'search': 'introuvable'})
+        sheet = zipfile.ZipFile(BytesIO(content)).read('xl/worksheets/sheet1.xml')
+        self.assertEqual(sheet.count(b'<row '), 1)
+    
+    def test_constant_queries(self):
+        url = reverse('admin_panel:applications_export', args=['xlsx'])
+        self.assertConstantQueries(lambda: self.export(url), lambda: seed_applications(30))
+        
+        self.assertEqual(self.client.get(reverse('admin_panel:applications_export', args=['pdf'])).status_code, 404)
+
+
+class CVArchiveTests(PerformanceTestCase):
+    """ZIP of the CVs, a bulk action of the applications list"""
+    
+    def setUp(self):
+        super().setUp()
+        self.use_temporary_media()
+        self.login_staff()
+        self.manual = seed_applications(2, reviewed=False, education='Licence en gestion', skills='Conduite')
+        self.uploaded, self.word, self.without_cv = seed_applications(3, application_type='CV_UPLOAD', reviewed=False)
+        self.uploaded.cv_file.save('cv.pdf', SimpleUploadedFile('cv.pdf', b'%PDF-1.4 CV envoye'))
+        self.word.cv_file.save('cv.doc', SimpleUploadedFile('cv.doc', b'\xd0\xcf\x11\xe0' + b'Word ' * 500))
+        seed_applications(2, reviewed=True)
+    
+    def download(self, **data):
+        response = self.client.post(reverse('admin_panel:applications_bulk'), {'action': 'download_cvs', **data})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+    
+    def test_archive(self):
+        with self.assertBudget(5):
+            archive = self.download(scope='all', reviewed='no')
+        self.assertIsNone(archive.testzip())
+        entries = {info.filename: info for info in archive.infolist()}
+        self.assertEqual(len(entries), 5)
+        
+        uploaded = entries[f'{self.uploaded.pk}_{self.uploaded.display_name.replace(" ", "_")}.pdf']
+        self.assertEqual(uploaded.compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.read(uploaded), b'%PDF-1.4 CV envoye')
+        word = entries[f'{self.word.pk}_{self.word.display_name.replace(" ", "_")}.doc']
+        self.assertEqual(word.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertLess(word.compress_size, word.file_size)
+        
+        # Generated PDFs are rendered once and kept in the CV cache
+        for application in self.manual:
+            name = f'{application.pk}_{application.display_name.replace(" ", "_")}.pdf'
+            self.assertTrue(archive.read(name).startswith(b'%PDF'))
+            self.assertTrue(default_storage.exists(artifact_name(application)))
+        
+        self.assertIn(f'{self.without_cv.pk} - ', archive.read(MISSING_NAME).decode())
+    
+    def test_selected_and_unreadable(self):
+        default_storage.delete(self.uploaded.cv_file.name)
+        with self.assertLogs('applications.cv_archive', 'ERROR'):
+            archive = self.download(scope='selected', ids=[self.uploaded.pk, self.manual[0].pk])
+        self.assertEqual(len(archive.namelist()), 2)
+        self.assertIn(f'{self.uploaded.pk} - {self.uploaded.display_name} : CV illisible', archive.read(MISSING_NAME).decode())
+    
+    def test_limits(self):
+        response = self.client.post(reverse('admin_panel:applications_bulk'), {
+            'action': 'download_cvs', 'scope': 'all', 'search': 'introuvable',
+        })
+        self.assertRedirects(response, reverse('admin_panel:applications_list') + '?search=introuvable')
+        
+        with mock.patch('admin_panel.views.DOWNLOAD_MAX_ROWS', 4):
+            response = self.client.post(reverse('admin_panel:applications_bulk'), {'action': 'download_cvs', 'scope': 'all'})
+        self.assertEqual(response.status_code, 302)
+    
+    def test_file_chunks(self):
+        self.assertEqual(list(file_chunks(BytesIO(b'abcde'), 2)), [b'ab', b'cd', b'e'])
+        
+        # S3 objects are read from the body of the GET response
+        body = mock.Mock(**{'iter_chunks.return_value': iter([b'ab', b'cd'])})
+        s3_file = mock.Mock(**{'obj.get.return_value': {'Body': body}})
+        self.assertEqual(list(file_chunks(s3_file, 2)), [b'ab', b'cd'])
+        body.iter_chunks.assert_called_once_with(2)
+        body.close.assert_called_once_with()
+        s3_file.read.assert_not_called()
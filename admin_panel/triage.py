@@ -0,0 +1,69 @@
+"""
+Reviewer triage queue.
+
+Walks the unreviewed applications one at a time, oldest or newest first.
+Every queue query filters on reviewed=False and orders by (applied_at, id),
+which is exactly the partial index application_unreviewed_idx, so the cost
+does not depend on the number of applications already reviewed.
+"""
+from django.db.models import Q
+from django.urls import reverse
+
+from applications.models import JobApplication
+from core.projections import Projection
+from .projections import NAME_FIELDS, ApplicationRow
+
+
+ORDERS = {
+    'oldest': "Plus anciennes d'abord",
+    'newest': "Plus récentes d'abord",
+}
+DEFAULT_ORDER = 'oldest'
+
+# Upcoming candidates listed, and prefetched by the browser, on each page
+PREFETCH_COUNT = 5
+
+# Upcoming candidates in the sidebar
+UPCOMING = Projection(*NAME_FIELDS, 'city', 'applied_at', 'application_type', 'cv_file', row_class=ApplicationRow)
+
+
+def parse_order(value):
+    """Return a supported queue order, falling back to the default"""
+    return value if value in ORDERS else DEFAULT_ORDER
+
+
+def unreviewed(order):
+    """The unreviewed applications in queue order"""
+    queryset = JobApplication.objects.filter(reviewed=False)
+    if order == 'newest':
+        return queryset.order_by('-applied_at', '-id')
+    return queryset.order_by('applied_at', 'id')
+
+
+def first_in_queue(order):
+    """Primary key of the first application of the queue, or None"""
+    return unreviewed(order).values_list('pk', flat=True).first()
+
+
+def next_in_queue(application, order, limit=PREFETCH_COUNT):
+    """Up to limit unreviewed applications following application in the queue"""
+    value = application.applied_at
+    if order == 'newest':
+        after = Q(applied_at__lte=value), Q(applied_at__lt=value) | Q(id__lt=application.pk)
+    else:
+        after = Q(applied_at__gte=value), Q(applied_at__gt=value) | Q(id__gt=application.pk)
+    return UPCOMING.rows(unreviewed(order).filter(*after), limit=limit)
+
+
+def cv_url(application):
+    """URL of the CV to show for an application or row, None without CV"""
+    if application.application_type == 'MANUAL':
+        return reverse('admin_panel:view_cv_pdf', args=[application.pk])
+    if application.cv_file:
+        return reverse('admin_panel:download_cv', args=[application.pk])
+    return None
+
+
+def triage_url(pk, order):
+    """Triage page of an application, keeping the queue order"""
+    return f"{reverse('admin_panel:triage_review', args=[pk])}?order={order}"
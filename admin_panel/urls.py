@@ -1,18 +1,26 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'admin_panel'
 
 urlpatterns = [
     path('login/', views.admin_login, name='login'),
     path('', views.dashboard, name='dashboard'),
+    path('evenements/', views.dashboard_events, name='dashboard_events'),
     
     # Applications
     path('applications/', views.applications_list, name='applications_list'),
+    path('applications/bulk/', views.applications_bulk, name='applications_bulk'),
+    path('applications/dossier/', views.applications_dossier, name='applications_dossier'),
+    path('applications/export/<str:file_format>/', views.applications_export, name='applications_export'),
     path('applications/<int:pk>/', views.application_detail, name='application_detail'),
     path('applications/<int:pk>/download-cv/', views.download_cv, name='download_cv'),
     path('applications/<int:pk>/voir-cv/', views.view_cv_pdf, name='view_cv_pdf'),
     
+    # Triage
+    path('triage/', views.triage, name='triage'),
+    path('triage/<int:pk>/', views.triage_review, name='triage_review'),
+    
     # Jobs
     path('jobs/', views.jobs_list, name='jobs_list'),
     path('jobs/create/', views.job_create, name='job_create'),
@@ -21,8 +29,17 @@ urlpatterns = [
     
     # Messages
     path('messages/', views.messages_list, name='messages_list'),
+    path('messages/bulk/', views.messages_bulk, name='messages_bulk'),
+    path('messages/export/<str:file_format>/', views.messages_export, name='messages_export'),
     path('messages/<int:pk>/', views.message_detail, name='message_detail'),
     
+    # Search
+    path('recherche/', views.search, name='search'),
+    
+    # JSON API
+    path(f'api/{api.API_VERSION}/<str:resource>/', api.resource_list, name='api_list'),
+    path(f'api/{api.API_VERSION}/<str:resource>/<int:pk>/', api.resource_detail, name='api_detail'),
+    
     # Logout
     path('logout/', views.admin_logout, name='logout'),
 ]
@@ -3,17 +3,39 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import logout, authenticate, login
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
-from django.db.models import Q, Count
 from django.utils import timezone
-from datetime import timedelta
-from django.http import JsonResponse, FileResponse, HttpResponse
-from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.http import require_POST
+from django.utils.cache import patch_cache_control
+from django.views.decorators.clickjacking import xframe_options_sameorigin
 import os
 
 from applications.models import JobApplication
-from applications.pdf_utils import generate_cv_pdf
+from applications.cv_cache import CV_FIELDS, cv_hash, cv_pdf_response
+from applications.dossier import dossier_available, dossier_chunks
+from applications.pipeline import STAGES, move_to_stage, stage_history, stage_summary
 from careers.models import JobRole
 from contact.models import ContactMessage
+from core.cache import get_data_version
+from .bulk import APPLICATION_ACTIONS, MESSAGE_ACTIONS, NOTE_MAX_LENGTH, run_bulk, selected_ids
+from .exports import APPLICATION_EXPORT, MESSAGE_EXPORT, export_response
+from .facets import apply_facets, facet_counts, selected_facets
+from .filters import filter_applications, filter_jobs, filter_messages
+from .live import dashboard_event
+from .pagination import decode_cursor, paginate
+from .projections import APPLICATION_LIST, MESSAGE_LIST
+from .search import global_search
+from .stats import DASHBOARD_RANGES, get_dashboard_context, parse_range
+from .triage import ORDERS, cv_url, first_in_queue, next_in_queue, parse_order, triage_url
+
+
+# Largest selection exported as a single dossier PDF
+DOSSIER_MAX_APPLICATIONS = 500
+
+# Largest selection of a download bulk action (ZIP of the CVs)
+DOWNLOAD_MAX_ROWS = 500
 
 
 def is_staff_user(user):
@@ -59,108 +81,254 @@ def admin_login(request):
 @user_passes_test(is_staff_user)
 def dashboard(request):
     """Admin dashboard with statistics"""
+    days = parse_range(request.GET.get('range'))
     
-    # Statistics
-    total_applications = JobApplication.objects.count()
-    new_applications = JobApplication.objects.filter(reviewed=False).count()
-    total_jobs = JobRole.objects.count()
-    active_jobs = JobRole.objects.filter(is_active=True).count()
-    total_messages = ContactMessage.objects.count()
-    unread_messages = ContactMessage.objects.filter(read=False).count()
-    
-    # Recent activity
-    recent_applications = JobApplication.objects.all()[:5]
-    recent_messages = ContactMessage.objects.all()[:5]
-    
-    # Chart data (last 7 days)
-    today = timezone.now().date()
-    last_7_days = [today - timedelta(days=x) for x in range(6, -1, -1)]
-    
-    applications_by_day = []
-    messages_by_day = []
-    
-    for day in last_7_days:
-        app_count = JobApplication.objects.filter(
-            applied_at__date=day
-        ).count()
-        msg_count = ContactMessage.objects.filter(
-            created_at__date=day
-        ).count()
-        applications_by_day.append(app_count)
-        messages_by_day.append(msg_count)
+    # Read first: a write during the build makes the live stream send an update
+    data_version = get_data_version()
     
-    context = {
-        'total_applications': total_applications,
-        'new_applications': new_applications,
-        'total_jobs': total_jobs,
-        'active_jobs': active_jobs,
-        'total_messages': total_messages,
-        'unread_messages': unread_messages,
-        'recent_applications': recent_applications,
-        'recent_messages': recent_messages,
-        'applications_by_day': applications_by_day,
-        'messages_by_day': messages_by_day,
-        'days': [d.strftime('%d/%m') for d in last_7_days],
-    }
+    # Statistics, charts and recent activity (cached until the next write)
+    context = dict(get_dashboard_context(days))
+    context.update({
+        'range_days': days,
+        'range_choices': DASHBOARD_RANGES,
+        'data_version': data_version,
+    })
     
     return render(request, 'admin_panel/dashboard.html', context)
 
 
+@login_required
+@user_passes_test(is_staff_user)
+def dashboard_events(request):
+    """Server-sent event with the dashboard counters, when they changed"""
+    last_version = request.headers.get('Last-Event-ID') or request.GET.get('since', '')
+    response = HttpResponse(dashboard_event(last_version), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 @user_passes_test(is_staff_user)
 def applications_list(request):
-    """List all job applications"""
-    applications = JobApplication.objects.all()
-    
-    # Filters
-    search = request.GET.get('search', '')
-    reviewed = request.GET.get('reviewed', '')
-    
-    if search:
-        applications = applications.filter(
-            Q(full_name__icontains=search) |
-            Q(physical_address__icontains=search) |
-            Q(phone__icontains=search)
-        )
-    
-    if reviewed == 'yes':
-        applications = applications.filter(reviewed=True)
-    elif reviewed == 'no':
-        applications = applications.filter(reviewed=False)
+    """List job applications, one keyset page at a time"""
+    cursor = decode_cursor(request.GET.get('cursor'))
+    params = cursor.filters if cursor else request.GET
+    
+    # Filters, then facet counts for everything but the facets themselves
+    applications, filters = filter_applications(JobApplication.objects.all(), params, with_facets=False)
+    selected = selected_facets(params)
+    facets = facet_counts(applications, selected, filters)
+    applications = apply_facets(applications, selected)
+    filters.update(selected)
+    page = paginate(applications, 'applied_at', cursor, filters, projection=APPLICATION_LIST)
     
     context = {
-        'applications': applications,
-        'search': search,
-        'reviewed': reviewed,
+        'applications': page.object_list,
+        'page': page,
+        'facets': facets,
+        'stages': stage_summary(),
+        'filters': filters,
+        'bulk_actions': APPLICATION_ACTIONS,
+        'filter_query': filter_query(filters),
+        **filters,
     }
     
     return render(request, 'admin_panel/applications_list.html', context)
 
 
+@login_required
+@user_passes_test(is_staff_user)
+@require_POST
+def applications_bulk(request):
+    """Apply a bulk operation to the selected or to all filtered applications"""
+    applications, filters = filter_applications(JobApplication.objects.all(), request.POST)
+    return bulk_operation(request, applications, filters, APPLICATION_ACTIONS, 'admin_panel:applications_list')
+
+
+@login_required
+@user_passes_test(is_staff_user)
+def applications_dossier(request):
+    """Every CV of the filtered applications in one PDF, streamed as it is built"""
+    applications, filters = filter_applications(JobApplication.objects.all(), request.GET)
+    redirect_url = filtered_url('admin_panel:applications_list', filters)
+    
+    if not dossier_available():
+        messages.error(request, "L'export du dossier nécessite le paquet pypdf.")
+        return redirect(redirect_url)
+    
+    count = applications.count()
+    if not count:
+        messages.error(request, 'Aucune candidature ne correspond aux filtres.')
+        return redirect(redirect_url)
+    if count > DOSSIER_MAX_APPLICATIONS:
+        messages.error(
+            request,
+            f'{count} candidatures correspondent aux filtres : le dossier est limité à '
+            f'{DOSSIER_MAX_APPLICATIONS} candidatures, veuillez affiner la sélection.',
+        )
+        return redirect(redirect_url)
+    
+    applications = (
+        applications.select_related('role')
+        .only('application_type', 'cv_file', 'role__title', *CV_FIELDS)
+        .order_by('-applied_at', '-id')
+    )
+    response = StreamingHttpResponse(
+        dossier_chunks(applications.iterator(chunk_size=50)),
+        content_type='application/pdf',
+    )
+    response['Content-Disposition'] = f'attachment; filename="dossier_candidatures_{timezone.localdate():%Y%m%d}.pdf"'
+    # Sent as it is built rather than buffered by nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@user_passes_test(is_staff_user)
+def applications_export(request, file_format):
+    """The filtered applications as a CSV or XLSX spreadsheet, streamed row by row"""
+    applications, filters = filter_applications(JobApplication.objects.all(), request.GET)
+    return export_response(
+        applications.order_by('-applied_at', '-id'), APPLICATION_EXPORT, file_format, 'candidatures', 'Candidatures',
+    )
+
+
+def filter_query(filters):
+    """Query string reproducing the non-empty filters"""
+    return urlencode({key: value for key, value in filters.items() if value})
+
+
+def filtered_url(list_url, filters):
+    """URL of a list view with the given filters"""
+    query = filter_query(filters)
+    return f'{reverse(list_url)}?{query}' if query else reverse(list_url)
+
+
+def bulk_operation(request, queryset, filters, actions, list_url):
+    """Run the posted bulk action and go back to the list with the same filters"""
+    redirect_url = filtered_url(list_url, filters)
+    
+    action = actions.get(request.POST.get('action'))
+    if action is None:
+        messages.error(request, 'Veuillez choisir une action.')
+        return redirect(redirect_url)
+    
+    note = request.POST.get('note', '').strip()[:NOTE_MAX_LENGTH]
+    if action.needs_note and not note:
+        messages.error(request, 'Veuillez saisir la note à ajouter.')
+        return redirect(redirect_url)
+    
+    if request.POST.get('scope') != 'all':
+        ids = selected_ids(request.POST.getlist('ids'))
+        if not ids:
+            messages.error(request, 'Aucun élément sélectionné.')
+            return redirect(redirect_url)
+        queryset = queryset.model.objects.filter(pk__in=ids)
+    
+    if action.download:
+        count = queryset.count()
+        if not count:
+            messages.error(request, 'Aucun élément ne correspond aux filtres.')
+            return redirect(redirect_url)
+        if count > DOWNLOAD_MAX_ROWS:
+            messages.error(
+                request,
+                f'{count} éléments sélectionnés : le téléchargement est limité à '
+                f'{DOWNLOAD_MAX_ROWS} éléments, veuillez affiner la sélection.',
+            )
+            return redirect(redirect_url)
+        return action.operation(queryset, note, request.user)
+    
+    count = run_bulk(queryset, action, note, user=request.user)
+    messages.success(request, f'{action.label} : {count} élément(s) traité(s).')
+    return redirect(redirect_url)
+
+
 @login_required
 @user_passes_test(is_staff_user)
 def application_detail(request, pk):
     """View application details"""
-    application = get_object_or_404(JobApplication, pk=pk)
+    application = get_object_or_404(JobApplication.objects.select_related('role'), pk=pk)
     
     if request.method == 'POST':
         reviewed = request.POST.get('reviewed') == 'on'
         notes = request.POST.get('notes', '')
+        stage = request.POST.get('stage', application.stage)
         
         application.reviewed = reviewed
         application.notes = notes
-        application.save()
+        application.save(update_fields=['reviewed', 'notes'])
+        
+        if stage != application.stage and stage in STAGES:
+            move_to_stage(
+                JobApplication.objects.filter(pk=pk), stage,
+                user=request.user, note=request.POST.get('stage_note', '').strip()[:NOTE_MAX_LENGTH],
+            )
         
         messages.success(request, 'Candidature mise à jour avec succès!')
         return redirect('admin_panel:application_detail', pk=pk)
     
     return render(request, 'admin_panel/application_detail.html', {
-        'application': application
+        'application': application,
+        'cv_digest': cv_hash(application) if application.application_type == 'MANUAL' else None,
+        'stages': STAGES,
+        'stage_history': stage_history(application),
     })
 
 
 @login_required
 @user_passes_test(is_staff_user)
+def triage(request):
+    """Start reviewing the unreviewed applications, one at a time"""
+    order = parse_order(request.GET.get('order'))
+    pk = first_in_queue(order)
+    if pk is not None:
+        return redirect(triage_url(pk, order))
+    
+    return render(request, 'admin_panel/triage.html', {
+        'application': None,
+        'order': order,
+        'orders': ORDERS,
+    })
+
+
+@login_required
+@user_passes_test(is_staff_user)
+def triage_review(request, pk):
+    """Review one application of the queue, then go straight to the next one"""
+    application = get_object_or_404(JobApplication.objects.select_related('role'), pk=pk)
+    order = parse_order(request.GET.get('order'))
+    
+    if request.method == 'POST':
+        application.reviewed = request.POST.get('reviewed') == 'on'
+        application.notes = request.POST.get('notes', '')
+        application.save(update_fields=['reviewed', 'notes'])
+        
+        upcoming = next_in_queue(application, order, limit=1)
+        if upcoming:
+            messages.success(request, f'Candidature de {application.display_name or "Candidat"} enregistrée.')
+            return redirect(triage_url(upcoming[0].pk, order))
+        messages.success(request, 'Toutes les candidatures ont été examinées.')
+        return redirect(f"{reverse('admin_panel:triage')}?order={order}")
+    
+    upcoming = next_in_queue(application, order)
+    for row in upcoming:
+        row.cv_url = cv_url(row)
+    
+    return render(request, 'admin_panel/triage.html', {
+        'application': application,
+        'cv_url': cv_url(application),
+        'upcoming': upcoming,
+        'next_url': triage_url(upcoming[0].pk, order) if upcoming else None,
+        'order': order,
+        'orders': ORDERS,
+    })
+
+
+@login_required
+@user_passes_test(is_staff_user)
+@xframe_options_sameorigin
 def download_cv(request, pk):
     """View original CV file for CV upload applications - shows the file as uploaded"""
     application = get_object_or_404(JobApplication, pk=pk)
@@ -206,9 +374,10 @@ def download_cv(request, pk):
 
 @login_required
 @user_passes_test(is_staff_user)
+@xframe_options_sameorigin
 def view_cv_pdf(request, pk):
     """View PDF CV ONLY for manual applications"""
-    application = get_object_or_404(JobApplication, pk=pk)
+    application = get_object_or_404(JobApplication.objects.only('application_type', 'cv_file', *CV_FIELDS), pk=pk)
     
     # ONLY generate PDF for manual applications
     if application.application_type != 'MANUAL':
@@ -219,46 +388,28 @@ def view_cv_pdf(request, pk):
             messages.error(request, 'Aucun CV disponible pour cette candidature.')
             return redirect('admin_panel:application_detail', pk=pk)
     
-    # Generate PDF only for manual applications
-    pdf = generate_cv_pdf(application)
-    
-    # Create filename
-    if application.nom and application.prenom:
-        filename = f"CV_{application.prenom}_{application.nom}.pdf"
-    elif application.full_name:
-        filename = f"CV_{application.full_name.replace(' ', '_')}.pdf"
-    else:
-        filename = f"CV_{application.id}.pdf"
-    
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    # PDF only for manual applications, rendered once per version of the application
+    response = cv_pdf_response(request, application)
+    # The CVs prefetched by the triage page stay in the browser cache but are
+    # revalidated against the content hash ETag, so an edited CV is never shown stale
+    patch_cache_control(response, private=True, no_cache=True)
     return response
 
 
 @login_required
 @user_passes_test(is_staff_user)
 def jobs_list(request):
-    """List all job roles"""
-    jobs = JobRole.objects.all()
+    """List job roles, one keyset page at a time"""
+    cursor = decode_cursor(request.GET.get('cursor'))
+    params = cursor.filters if cursor else request.GET
     
-    search = request.GET.get('search', '')
-    active = request.GET.get('active', '')
-    
-    if search:
-        jobs = jobs.filter(
-            Q(title__icontains=search) |
-            Q(description__icontains=search)
-        )
-    
-    if active == 'yes':
-        jobs = jobs.filter(is_active=True)
-    elif active == 'no':
-        jobs = jobs.filter(is_active=False)
+    jobs, filters = filter_jobs(JobRole.objects.all(), params)
+    page = paginate(jobs, 'created_at', cursor, filters)
     
     return render(request, 'admin_panel/jobs_list.html', {
-        'jobs': jobs,
-        'search': search,
-        'active': active,
+        'jobs': page.object_list,
+        'page': page,
+        **filters,
     })
 
 
@@ -344,31 +495,42 @@ def job_delete(request, pk):
 @login_required
 @user_passes_test(is_staff_user)
 def messages_list(request):
-    """List all contact messages"""
-    contact_messages = ContactMessage.objects.all()
-    
-    search = request.GET.get('search', '')
-    read = request.GET.get('read', '')
+    """List contact messages, one keyset page at a time"""
+    cursor = decode_cursor(request.GET.get('cursor'))
+    params = cursor.filters if cursor else request.GET
     
-    if search:
-        contact_messages = contact_messages.filter(
-            Q(name__icontains=search) |
-            Q(email__icontains=search) |
-            Q(subject__icontains=search)
-        )
-    
-    if read == 'yes':
-        contact_messages = contact_messages.filter(read=True)
-    elif read == 'no':
-        contact_messages = contact_messages.filter(read=False)
+    contact_messages, filters = filter_messages(ContactMessage.objects.all(), params)
+    page = paginate(contact_messages, 'created_at', cursor, filters, projection=MESSAGE_LIST)
     
     return render(request, 'admin_panel/messages_list.html', {
-        'messages': contact_messages,
-        'search': search,
-        'read': read,
+        'contact_messages': page.object_list,
+        'page': page,
+        'filters': filters,
+        'bulk_actions': MESSAGE_ACTIONS,
+        'filter_query': filter_query(filters),
+        **filters,
     })
 
 
+@login_required
+@user_passes_test(is_staff_user)
+@require_POST
+def messages_bulk(request):
+    """Apply a bulk operation to the selected or to all filtered messages"""
+    contact_messages, filters = filter_messages(ContactMessage.objects.all(), request.POST)
+    return bulk_operation(request, contact_messages, filters, MESSAGE_ACTIONS, 'admin_panel:messages_list')
+
+
+@login_required
+@user_passes_test(is_staff_user)
+def messages_export(request, file_format):
+    """The filtered contact messages as a CSV or XLSX spreadsheet, streamed row by row"""
+    contact_messages, filters = filter_messages(ContactMessage.objects.all(), request.GET)
+    return export_response(
+        contact_messages.order_by('-created_at', '-id'), MESSAGE_EXPORT, file_format, 'messages', 'Messages',
+    )
+
+
 @login_required
 @user_passes_test(is_staff_user)
 def message_detail(request, pk):
@@ -396,6 +558,21 @@ def message_detail(request, pk):
     })
 
 
+@login_required
+@user_passes_test(is_staff_user)
+def search(request):
+    """Global search across applications, messages and job roles"""
+    query = request.GET.get('q', '').strip()
+    results = global_search(query) if query else {}
+    
+    return render(request, 'admin_panel/search.html', {
+        'query': query,
+        'applications': results.get('applications', []),
+        'contact_messages': results.get('messages', []),
+        'jobs': results.get('jobs', []),
+    })
+
+
 @login_required
 def admin_logout(request):
     """Logout view for admin panel"""
@@ -1,19 +1,79 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.db.models import Count
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import path, reverse
 from django.utils.html import format_html
-from .models import JobApplication
+from core.admin_utils import EstimatedCountPaginator
+from .models import JobApplication, StageTransition
+from .pipeline import STAGES, move_to_stage
+
+
+class ProjectedChangeList(ChangeList):
+    """Change list that only loads the columns named by the admin's list_only_fields"""
+    
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only(*self.model_admin.list_only_fields)
+
+
+class CityListFilter(admin.SimpleListFilter):
+    """
+    Most frequent cities only: city is free text, so listing every distinct
+    value would scan the whole table and flood the sidebar. The choices are
+    cached for a few hours rather than per data version, as new applications
+    hardly ever change the top of the list.
+    """
+    title = "ville"
+    parameter_name = 'city'
+    limit = 20
+    cache_key = 'applications:admin:city-choices'
+    cache_timeout = 6 * 60 * 60
+    
+    def lookups(self, request, model_admin):
+        def build():
+            rows = (
+                JobApplication.objects.exclude(city__isnull=True).exclude(city='')
+                .order_by().values_list('city').annotate(total=Count('id'))
+                .order_by('-total')[:self.limit]
+            )
+            return [(city, city) for city, total in rows]
+        
+        choices = cache.get_or_set(self.cache_key, build, self.cache_timeout)
+        if self.value() and self.value() not in dict(choices):
+            choices = [*choices, (self.value(), self.value())]
+        return choices
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(city=self.value())
+        return queryset
 
 
 @admin.register(JobApplication)
 class JobApplicationAdmin(admin.ModelAdmin):
-    list_display = ['get_name', 'application_type', 'phone', 'city', 'how_heard_about', 'cv_link', 'reviewed', 'applied_at']
-    list_filter = ['reviewed', 'application_type', 'city', 'sexe', 'how_heard_about', 'applied_at']
+    list_display = ['get_name', 'role', 'application_type', 'phone', 'city', 'how_heard_about', 'cv_link', 'reviewed', 'stage', 'applied_at']
+    list_filter = ['reviewed', 'application_type', CityListFilter, 'sexe', 'how_heard_about', 'stage', 'role', 'applied_at']
     search_fields = ['nom', 'post_nom', 'prenom', 'full_name', 'physical_address', 'phone', 'city', 'nationalite']
-    date_hierarchy = 'applied_at'
-    readonly_fields = ['applied_at']
+    # The stage changes through the actions below, which record who moved it
+    readonly_fields = ['applied_at', 'stage']
+    
+    # Large-table mode: no date_hierarchy (a DISTINCT over applied_at on every
+    # load, the applied_at filter covers it), estimated total on PostgreSQL
+    # and no second COUNT(*) of the whole table next to filtered results
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    # Columns read by list_display and __str__: the long text fields stay in the database
+    list_only_fields = [
+        'nom', 'post_nom', 'prenom', 'full_name', 'date_of_birth', 'application_type',
+        'phone', 'city', 'how_heard_about', 'cv_file', 'reviewed', 'stage', 'applied_at', 'role__title',
+    ]
     
     fieldsets = (
         ('Type de candidature', {
-            'fields': ('application_type',)
+            'fields': ('application_type', 'role')
         }),
         ('Informations personnelles', {
             'fields': ('nom', 'post_nom', 'prenom', 'full_name', 'date_of_birth', 'lieu_de_naissance', 
@@ -29,27 +89,40 @@ class JobApplicationAdmin(admin.ModelAdmin):
             'fields': ('cv_file', 'message')
         }),
         ('Gestion interne', {
-            'fields': ('reviewed', 'notes', 'applied_at'),
+            'fields': ('reviewed', 'stage', 'notes', 'applied_at'),
             'classes': ('collapse',)
         }),
     )
     
+    def get_changelist(self, request, **kwargs):
+        return ProjectedChangeList
+    
+    def get_urls(self):
+        urls = [
+            path('<int:pk>/cv/', self.admin_site.admin_view(self.cv_redirect), name='applications_jobapplication_cv'),
+        ]
+        return urls + super().get_urls()
+    
+    def cv_redirect(self, request, pk):
+        """Redirect to the uploaded CV, signing its storage URL at click time"""
+        application = get_object_or_404(JobApplication.objects.only('cv_file'), pk=pk)
+        if not self.has_view_permission(request, application) or not application.cv_file:
+            return redirect('admin:applications_jobapplication_changelist')
+        return redirect(application.cv_file.url)
+    
     def get_name(self, obj):
-        if obj.nom and obj.prenom:
-            return f"{obj.prenom} {obj.nom} {obj.post_nom}".strip()
-        elif obj.full_name:
-            return obj.full_name
-        return "N/A"
+        return obj.display_name or "N/A"
     get_name.short_description = "Nom"
+    get_name.admin_order_field = 'sort_name'
     
     def cv_link(self, obj):
+        # The storage URL (a signed S3 URL) is only computed when the link is clicked
         if obj.cv_file:
             return format_html(
                 '<a href="{}" target="_blank">📎 Télécharger CV</a>', 
-                obj.cv_file.url
+                reverse('admin:applications_jobapplication_cv', args=[obj.pk])
             )
         elif obj.application_type == 'MANUAL':
-            from django.urls import reverse
             cv_url = reverse('applications:view_cv_pdf', args=[obj.pk])
             return format_html(
                 '<a href="{}" target="_blank" style="color: #2A9D8F; font-weight: bold;">📄 Voir CV PDF</a>',
@@ -69,3 +142,28 @@ class JobApplicationAdmin(admin.ModelAdmin):
         updated = queryset.update(reviewed=False)
         self.message_user(request, f'{updated} candidature(s) marquée(s) comme non examinée(s).')
     mark_as_unreviewed.short_description = "Marquer comme non examiné"
+    
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        for stage, label in STAGES.items():
+            name = f'move_to_{stage}'
+            actions[name] = (self.stage_action(stage), name, f"Passer à l'étape : {label}")
+        return actions
+    
+    def stage_action(self, stage):
+        def action(modeladmin, request, queryset):
+            moved = move_to_stage(queryset, stage, user=request.user)
+            self.message_user(request, f"{moved} candidature(s) passée(s) à l'étape « {STAGES[stage]} ».")
+        return action
+
+
+@admin.register(StageTransition)
+class StageTransitionAdmin(admin.ModelAdmin):
+    list_display = ['application', 'from_stage', 'to_stage', 'changed_by', 'created_at']
+    list_filter = ['to_stage']
+    list_select_related = ['application', 'changed_by']
+    raw_id_fields = ['application']
+    readonly_fields = ['application', 'from_stage', 'to_stage', 'changed_by', 'note', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,147 @@
+"""
+ZIP archive of the CVs of a selection of applications, sent as it is written.
+
+Each application adds one entry: the CV file uploaded by the candidate, as
+sent, or the generated PDF of a manual application (its stored artifact,
+rendered first when missing). PDFs and DOCX files are already compressed
+and are stored as they are; other files are deflated. The archive is
+written in a single pass to an unseekable stream, entry sizes following
+the data, and yielded in chunks of about CHUNK_SIZE bytes: neither the
+archive nor its entries ever go through a temporary file.
+
+Reading from the storage (S3 in production) is the slow part, so worker
+threads read up to FETCH_CONCURRENCY CVs ahead of the entry being
+written. S3 objects are read from the body of the GET response in chunks
+of READ_CHUNK_SIZE bytes, instead of being downloaded whole by the storage
+backend first. Memory is bounded by the CVs in flight (uploads are limited
+to 5 MB), whatever the number of applications. CVs are rendered by the
+thread writing the archive, never by the workers.
+
+Applications without a CV, or whose CV could not be read, are listed in a
+CV_MANQUANTS.txt entry at the end of the archive.
+"""
+import logging
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.utils import timezone
+
+from core.streaming import ZipStream
+from .cv_cache import artifact_name, get_cv_pdf, open_cached
+
+logger = logging.getLogger(__name__)
+
+# Bytes accumulated before a chunk is sent to the client
+CHUNK_SIZE = 64 * 1024
+
+# Bytes read from the storage at a time
+READ_CHUNK_SIZE = 256 * 1024
+
+# CVs read from the storage at the same time, ahead of the entry being written
+FETCH_CONCURRENCY = 4
+
+# Already compressed formats, stored without deflating them again
+STORED_EXTENSIONS = {'.pdf', '.docx'}
+
+MISSING_NAME = 'CV_MANQUANTS.txt'
+
+
+def file_chunks(file, chunk_size=READ_CHUNK_SIZE):
+    """
+    Bytes of a file opened from the storage, chunk by chunk. An S3 file is
+    read from the body of a GET request instead of being spooled whole.
+    """
+    s3_object = getattr(file, 'obj', None)
+    if s3_object is not None:
+        body = s3_object.get()['Body']
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+    else:
+        yield from iter(partial(file.read, chunk_size), b'')
+
+
+def entry_name(application, extension):
+    """<pk>_<name><extension>: unique in the archive and readable once extracted"""
+    name = re.sub(r'[^\w-]+', '_', application.display_name or '').strip('_') or 'Candidat'
+    return f'{application.pk}_{name}{extension}'
+
+
+def read_cv(application):
+    """
+    Worker: (entry name, bytes) of the stored CV of an application, bytes
+    None for a manual CV that has not been rendered yet, None without CV.
+    """
+    if application.application_type == 'MANUAL':
+        name = entry_name(application, '.pdf')
+        stored = open_cached(artifact_name(application))
+        if stored is None:
+            return name, None
+    elif application.cv_file:
+        name = entry_name(application, os.path.splitext(application.cv_file.name)[1].lower())
+        # Opened from the storage: FieldFile.open() would download an S3 object whole
+        stored = application.cv_file.storage.open(application.cv_file.name, 'rb')
+    else:
+        return None
+    with stored:
+        return name, b''.join(file_chunks(stored))
+
+
+def read_ahead(applications, read, concurrency=FETCH_CONCURRENCY):
+    """(application, future of read(application)) in order, at most concurrency reads ahead"""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = deque()
+        for application in applications:
+            pending.append((application, pool.submit(read, application)))
+            if len(pending) >= concurrency:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+def entry_info(name, application):
+    info = zipfile.ZipInfo(name, date_time=timezone.localtime(application.applied_at or timezone.now()).timetuple()[:6])
+    extension = os.path.splitext(name)[1]
+    info.compress_type = zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+    return info
+
+
+def archive_chunks(applications):
+    """Generator of the bytes of the ZIP archive of the CVs of an iterable of applications"""
+    stream = ZipStream()
+    missing = []
+    with zipfile.ZipFile(stream, 'w') as archive:
+        for application, future in read_ahead(applications, read_cv):
+            title = application.display_name or "Candidat"
+            try:
+                cv = future.result()
+                if cv is None:
+                    missing.append(f"{application.pk} - {title} : aucun CV joint")
+                    continue
+                name, data = cv
+                if data is None:
+                    pdf, digest = get_cv_pdf(application)
+                    with pdf:
+                        data = pdf.read()
+            except Exception:
+                logger.exception("CV de la candidature %s non inclus dans l'archive", application.pk)
+                missing.append(f"{application.pk} - {title} : CV illisible")
+                continue
+
+            info = entry_info(name, application)
+            info.file_size = len(data)
+            with archive.open(info, 'w') as entry:
+                view = memoryview(data)
+                for start in range(0, len(data), CHUNK_SIZE):
+                    entry.write(view[start:start + CHUNK_SIZE])
+                    if stream.size >= CHUNK_SIZE:
+                        yield stream.take()
+
+        if missing:
+            archive.writestr(MISSING_NAME, '\n'.join(missing) + '\n', compress_type=zipfile.ZIP_DEFLATED)
+    yield stream.take()
@@ -0,0 +1,232 @@
+"""
+Reference corpus and measurements of the generated CV PDF.
+
+Each case of the corpus is an unsaved manual application exercising one
+kind of input: a near-empty form, a typical CV, every field at its longest,
+typographic French text, and text that looks like markup. run_corpus()
+renders each case repeatedly and reports throughput, latency percentiles,
+the peak memory allocated by one render (tracemalloc) and the size of the
+PDF.
+
+Results are compared with the baselines stored in BASELINE_PATH by the
+profile_cvs command. Timings depend on the machine, so the baselines are
+refreshed with --update-baseline on the machine that runs the check.
+"""
+import json
+import math
+import platform
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+import reportlab
+from django.utils import timezone
+
+from .models import JobApplication
+from .pdf_utils import get_renderer
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'benchmarks' / 'cv_baseline.json'
+
+# Allowed relative regression before a check fails: memory and size are
+# deterministic, timings vary with the load of the machine
+DEFAULT_TOLERANCE = 0.1
+DEFAULT_TIME_TOLERANCE = 0.5
+
+# Metric: (True when a higher value is better, timing)
+METRICS = {
+    'renders_per_sec': (True, True),
+    'p50_ms': (False, True),
+    'p99_ms': (False, True),
+    'peak_kib': (False, False),
+    'size_bytes': (False, False),
+}
+
+
+def sample_application(index=0):
+    """Unsaved manual application filling every section of the CV"""
+    return JobApplication(
+        application_type='MANUAL',
+        nom='Mukendi',
+        post_nom='Mbuyi',
+        prenom=f'Grâce {index}',
+        phone='+243 81 234 5678',
+        physical_address='12, avenue de la Libération, Gombe',
+        city='Kinshasa',
+        date_of_birth=date(1995, 6, 14),
+        lieu_de_naissance='Lubumbashi',
+        sexe='F',
+        nationalite='Congolaise',
+        education="Licence en gestion, Université de Kinshasa\nDiplôme d'État, Institut de la Gombe",
+        skills='Accueil des clients, Lavage intérieur, Gestion de caisse, Permis B',
+        languages='Français, Lingala, Swahili',
+        how_heard_about='PERSONNE',
+        how_heard_details='Un ami employé à la station de Gombe',
+        applied_at=timezone.now(),
+    )
+
+
+def short_application():
+    """Only the required fields"""
+    return JobApplication(application_type='MANUAL', nom='Ilunga', phone='0810000000', applied_at=timezone.now())
+
+
+def maximal_application():
+    """Every field at its maximum length, long free-text sections"""
+    def filled(field, text):
+        length = JobApplication._meta.get_field(field).max_length
+        return (text * (length // len(text) + 1))[:length]
+
+    application = sample_application()
+    for field, text in [
+        ('nom', 'Kabasele '), ('post_nom', 'Tshimanga '), ('prenom', 'Marie-Josée '),
+        ('physical_address', 'Avenue du Commerce, quartier Matonge, '),
+        ('city', 'Kinshasa '), ('lieu_de_naissance', 'Mbuji-Mayi '), ('nationalite', 'Congolaise '),
+        ('how_heard_details', 'Recommandé par un responsable de station, '), ('languages', 'Français, Lingala, '),
+    ]:
+        setattr(application, field, filled(field, text))
+    application.phone = filled('phone', '+243 ')
+    application.education = '\n'.join(
+        f"{year}-{year + 3} : Licence en sciences commerciales et financières, Université de Kinshasa, mention distinction"
+        for year in range(1990, 2030, 2)
+    )
+    application.skills = ', '.join(f'Compétence professionnelle numéro {number}' for number in range(200))
+    return application
+
+
+def accented_application():
+    """Typographic French: ligatures, guillemets, apostrophes, dashes, decomposed accents"""
+    application = sample_application()
+    application.nom = 'Lœwenthal-Çelik'
+    application.prenom = 'Ève Chloé Noëlle'
+    application.physical_address = '3 bis, rue de l’Œuvre — Bâtiment « Ÿ », 2ᵉ étage'
+    application.education = (
+        'Maîtrise d’économie (mention très bien) – « Cœur de métier » : comptabilité…\n'
+        'Diplôme d’État, Lycée Saint-Exupéry, 2ᵉ cycle — Kisangani'
+    )
+    application.skills = 'Gestion d’équipe, Relation client (½ temps), Caisse € et CDF, Café, Œnologie'
+    application.languages = 'Français (langue maternelle), Lingala, Kikongo, Tshiluba'
+    application.how_heard_details = '« Bouche-à-oreille » — un employé de l’agence'
+    return application
+
+
+def markup_application():
+    """Text that looks like paragraph markup or HTML"""
+    application = sample_application()
+    application.nom = '<b>Mukendi</b>'
+    application.physical_address = 'Avenue <para> & <font size=80>Kasa-Vubu</font>'
+    application.education = 'Licence R&D <i>Génie</i>\n<br/> a < b > c &amp; &#x27; &unknown;'
+    application.skills = '<script>alert(1)</script>\n</para>\n<img src="x"/>'
+    application.languages = 'Français & Lingala <'
+    application.how_heard_details = '<a href="https://example.com">lien</a>'
+    return application
+
+
+CORPUS = {
+    'court': short_application,
+    'typique': sample_application,
+    'maximal': maximal_application,
+    'accents': accented_application,
+    'balisage': markup_application,
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def time_renders(application, count):
+    """Seconds taken by each of count renders of an application"""
+    renderer = get_renderer()
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        renderer.render(application)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def trace_render(application):
+    """(peak KiB allocated, PDF size) of one render, traced by tracemalloc"""
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    pdf = get_renderer().render(application)
+    peak = tracemalloc.get_traced_memory()[1]
+    if not tracing:
+        tracemalloc.stop()
+    return round((peak - before) / 1024, 1), len(pdf)
+
+
+def run_corpus(count, repeat=3, cases=None):
+    """
+    {case: metrics} for the corpus, or the named cases of it. The cases are
+    timed in turn, repeat times, so that they share the same machine load,
+    and the best round of each timing is kept.
+    """
+    applications = {name: CORPUS[name]() for name in cases or CORPUS}
+    results = {}
+    for name, application in applications.items():
+        # Warm-up render, then traced apart from the timings: tracemalloc slows allocations down
+        get_renderer().render(application)
+        peak_kib, size = trace_render(application)
+        results[name] = {'renders_per_sec': 0, 'p50_ms': math.inf, 'p99_ms': math.inf, 'peak_kib': peak_kib, 'size_bytes': size}
+
+    for _ in range(repeat):
+        for name, application in applications.items():
+            latencies = time_renders(application, count)
+            metrics = results[name]
+            metrics['renders_per_sec'] = max(metrics['renders_per_sec'], round(count / sum(latencies), 1))
+            metrics['p50_ms'] = min(metrics['p50_ms'], round(percentile(latencies, 0.5) * 1000, 2))
+            metrics['p99_ms'] = min(metrics['p99_ms'], round(percentile(latencies, 0.99) * 1000, 2))
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'reportlab': reportlab.Version,
+        'machine': platform.machine(),
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(results, count, repeat, path=BASELINE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {'count': count, 'repeat': repeat, 'environment': environment(), 'cases': results}
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(data, baseline_file, indent=2, ensure_ascii=False)
+        baseline_file.write('\n')
+
+
+def regressions(results, baseline, tolerance=DEFAULT_TOLERANCE, time_tolerance=DEFAULT_TIME_TOLERANCE):
+    """
+    (case, metric, baseline value, value) of each result worse than its
+    baseline by more than the tolerance of the metric.
+    """
+    found = []
+    for name, values in results.items():
+        reference = baseline['cases'].get(name)
+        if not reference:
+            continue
+        for metric, (higher_is_better, timing) in METRICS.items():
+            if metric not in reference or metric not in values:
+                continue
+            expected, value = reference[metric], values[metric]
+            allowed = time_tolerance if timing else tolerance
+            if higher_is_better:
+                worse = value < expected / (1 + allowed)
+            else:
+                worse = value > expected * (1 + allowed)
+            if worse:
+                found.append((name, metric, expected, value))
+    return found
@@ -0,0 +1,124 @@
+"""
+Storage-backed cache of the generated CV PDFs.
+
+A manual application's CV only depends on the fields in CV_FIELDS (and on
+the layout in pdf_utils), so the rendered PDF is stored through the default
+storage (MEDIA_ROOT locally, the S3 bucket in production) under a name
+holding a hash of those values. Opening a CV again is then one storage
+lookup; editing the application changes the hash, so the next request
+renders and stores a new artifact and removes the stale ones.
+"""
+import hashlib
+import json
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+from .pdf_utils import generate_cv_pdf
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when generate_cv_pdf's layout changes, so that every stored CV is rebuilt
+LAYOUT_VERSION = 3
+
+CACHE_DIR = 'cv_cache'
+
+# Every field generate_cv_pdf reads
+CV_FIELDS = (
+    'nom', 'post_nom', 'prenom', 'full_name', 'phone', 'physical_address', 'city',
+    'date_of_birth', 'lieu_de_naissance', 'sexe', 'nationalite', 'education', 'skills',
+    'languages', 'how_heard_about', 'how_heard_details', 'applied_at',
+)
+
+
+def cv_hash(application):
+    """Hash of the layout version and of the CV fields of an application"""
+    values = [LAYOUT_VERSION] + [getattr(application, field) for field in CV_FIELDS]
+    payload = json.dumps(values, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def artifact_dir(pk):
+    return posixpath.join(CACHE_DIR, str(pk))
+
+
+def artifact_name(application, digest=None):
+    return posixpath.join(artifact_dir(application.pk), f'{digest or cv_hash(application)}.pdf')
+
+
+def open_cached(name):
+    """The stored artifact opened for reading, or None when it does not exist"""
+    try:
+        return default_storage.open(name, 'rb')
+    except (FileNotFoundError, OSError):
+        return None
+
+
+def store(application, name, pdf):
+    """Save a rendered CV and remove the artifacts of previous versions"""
+    saved = default_storage.save(name, ContentFile(pdf))
+    if saved != name:
+        # Rendered concurrently by another request: keep a single copy
+        default_storage.delete(saved)
+    purge(application.pk, keep=posixpath.basename(name))
+
+
+def purge(pk, keep=None):
+    """Delete the stored CVs of an application (except the file named keep)"""
+    try:
+        directories, files = default_storage.listdir(artifact_dir(pk))
+    except (FileNotFoundError, OSError):
+        return
+    for filename in files:
+        if filename != keep:
+            default_storage.delete(posixpath.join(artifact_dir(pk), filename))
+
+
+def get_cv_pdf(application, digest=None):
+    """
+    Return (file, digest) for the CV of a manual application: the stored
+    artifact when its hash matches, otherwise a freshly rendered and stored one.
+    """
+    digest = digest or cv_hash(application)
+    name = artifact_name(application, digest)
+    cached = open_cached(name)
+    if cached is not None:
+        return cached, digest
+    
+    pdf = generate_cv_pdf(application)
+    try:
+        store(application, name, pdf)
+    except Exception:
+        # The CV is still served; the next request tries to store it again
+        logger.exception("Impossible d'enregistrer le CV de la candidature %s", application.pk)
+    return ContentFile(pdf, name=posixpath.basename(name)), digest
+
+
+def prerender(application):
+    """
+    Render and store the CV of a manual application unless an up-to-date
+    artifact already exists. Returns True when a PDF was rendered.
+    """
+    name = artifact_name(application)
+    if default_storage.exists(name):
+        return False
+    store(application, name, generate_cv_pdf(application))
+    return True
+
+
+def cv_pdf_response(request, application):
+    """Inline PDF response for a manual application's CV, 304 when the browser has it"""
+    digest = cv_hash(application)
+    etag = quote_etag(digest)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        pdf, digest = get_cv_pdf(application, digest)
+        response = FileResponse(pdf, content_type='application/pdf', filename=application.cv_filename)
+    response['ETag'] = etag
+    return response
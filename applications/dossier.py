@@ -0,0 +1,312 @@
+"""
+Multi-candidate dossier: every CV of a selection in one printable PDF.
+
+The PDF is written incrementally: the pages of each candidate's CV (the
+generated PDF of a manual application, the uploaded PDF, or a placeholder
+page for Word files and missing CVs) are copied object by object and
+yielded as soon as they are serialised, so a worker only ever holds one
+CV in memory. The table of contents needs the page numbers, so its pages
+are written after the CVs but listed first in the page tree, and the
+page tree, bookmarks and cross-reference table close the file.
+
+Reading the source PDFs relies on pypdf; without it, dossier_available()
+is False.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.utils.html import escape
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+from .cv_cache import get_cv_pdf
+from .pdf_utils import get_renderer
+
+try:
+    from pypdf import PdfReader
+    from pypdf.generic import (
+        ArrayObject, DecodedStreamObject, DictionaryObject, IndirectObject, NameObject,
+        NullObject, NumberObject, StreamObject, TextStringObject,
+    )
+except ImportError:
+    PdfReader = None
+
+
+logger = logging.getLogger(__name__)
+
+# Bytes accumulated before a chunk is sent to the client
+CHUNK_SIZE = 64 * 1024
+
+# Source page attributes not copied: the page tree and article threads of the source document
+SKIPPED_PAGE_KEYS = {'/Parent', '/B'}
+
+
+def dossier_available():
+    return PdfReader is not None
+
+
+class PDFStreamWriter:
+    """
+    Serialises PDF objects one at a time and keeps only their offsets, for
+    the cross-reference table written by close().
+    """
+
+    def __init__(self):
+        self.offsets = [None]  # Object 0 is the head of the free list
+        self.position = 0
+
+    def header(self):
+        return self._advance(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+
+    def reserve(self):
+        """Number of a new object, to be written later"""
+        self.offsets.append(None)
+        return len(self.offsets) - 1
+
+    def ref(self, number):
+        return IndirectObject(number, 0, None)
+
+    def write(self, number, obj):
+        buffer = BytesIO()
+        buffer.write(f'{number} 0 obj\n'.encode())
+        obj.write_to_stream(buffer)
+        buffer.write(b'\nendobj\n')
+        self.offsets[number] = self.position
+        return self._advance(buffer.getvalue())
+
+    def close(self, root, info):
+        """Remaining reserved objects (as null), cross-reference table and trailer"""
+        data = b''.join(
+            self.write(number, NullObject())
+            for number, offset in enumerate(self.offsets) if number and offset is None
+        )
+        xref = [f'xref\n0 {len(self.offsets)}\n', '0000000000 65535 f \n']
+        xref.extend(f'{offset:010d} 00000 n \n' for offset in self.offsets[1:])
+        trailer = DictionaryObject({
+            NameObject('/Size'): NumberObject(len(self.offsets)),
+            NameObject('/Root'): self.ref(root),
+            NameObject('/Info'): self.ref(info),
+        })
+        buffer = BytesIO()
+        trailer.write_to_stream(buffer)
+        return data + ''.join(xref).encode() + b'trailer\n' + buffer.getvalue() + f'\nstartxref\n{self.position}\n%%EOF\n'.encode()
+
+    def _advance(self, data):
+        self.position += len(data)
+        return data
+
+
+class PageCopier:
+    """Copies the pages of a source PDF, and every object they use, into a PDFStreamWriter"""
+
+    def __init__(self, writer, parent):
+        self.writer = writer
+        self.parent = parent
+
+    def copy(self, source):
+        """Generator of serialised objects; returns the object numbers of the copied pages"""
+        reader = PdfReader(source)
+        if reader.is_encrypted and not reader.decrypt(''):
+            raise ValueError("PDF protégé par un mot de passe")
+
+        self.numbers = {}
+        self.pending = []
+        pages = []
+        # Links between pages of the source resolve to the copies
+        for page in reader.pages:
+            number = self.writer.reserve()
+            self.numbers[self._key(page.indirect_reference)] = number
+            pages.append((number, page))
+
+        for number, page in pages:
+            copy = DictionaryObject({
+                NameObject(key): self._clone(value)
+                for key, value in page.items() if key not in SKIPPED_PAGE_KEYS
+            })
+            copy[NameObject('/Parent')] = self.writer.ref(self.parent)
+            yield self.writer.write(number, copy)
+            while self.pending:
+                number, reference = self.pending.pop()
+                yield self.writer.write(number, self._clone(reference.get_object()))
+        return [number for number, page in pages]
+
+    def _key(self, reference):
+        return (reference.idnum, reference.generation)
+
+    def _clone(self, obj):
+        if isinstance(obj, IndirectObject):
+            key = self._key(obj)
+            if key not in self.numbers:
+                self.numbers[key] = self.writer.reserve()
+                self.pending.append((self.numbers[key], obj))
+            return self.writer.ref(self.numbers[key])
+        if isinstance(obj, DictionaryObject):
+            if obj.get('/Type') in ('/Pages', '/Catalog'):
+                # Never pull in the page tree or the document of the source
+                return NullObject()
+            if isinstance(obj, StreamObject):
+                copy = DecodedStreamObject()
+                # Written as read, still encoded: StreamObject.get_data() returns the
+                # stored bytes, which EncodedStreamObject.get_data() would decode.
+                # The /Filter and /DecodeParms entries are copied with the rest.
+                copy.set_data(StreamObject.get_data(obj))
+            else:
+                copy = DictionaryObject()
+            for key, value in obj.items():
+                copy[NameObject(key)] = self._clone(value)
+            return copy
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._clone(value) for value in obj)
+        return obj
+
+
+def placeholder_pdf(title, message):
+    """One-page PDF standing in for a CV that cannot be merged"""
+    renderer = get_renderer()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    doc.build([
+        Paragraph(escape(title.upper()), renderer.header_style),
+        Spacer(1, 0.5*cm),
+        Paragraph(message, renderer.content_style),
+    ])
+    return BytesIO(buffer.getvalue())
+
+
+def toc_pdf(entries, first_page):
+    """Table of contents listing (title, subtitle, page count) entries, the first CV on first_page"""
+    renderer = get_renderer()
+    rows = []
+    page = first_page
+    for index, (title, subtitle, page_count) in enumerate(entries, 1):
+        rows.append([
+            Paragraph(f'{index}.', renderer.value_style),
+            Paragraph(f'<b>{escape(title)}</b>' + (f'<br/>{escape(subtitle)}' if subtitle else ''), renderer.value_style),
+            Paragraph(str(page), renderer.value_style),
+        ])
+        page += page_count
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    doc.build([
+        Paragraph('DOSSIER DE CANDIDATURES', renderer.header_style),
+        Paragraph(f'{len(entries)} candidat(s)', renderer.contact_style),
+        Spacer(1, 0.5*cm),
+        Table(rows, colWidths=[1.2*cm, 13*cm, 2.8*cm], style=renderer.personal_table_style),
+    ])
+    return BytesIO(buffer.getvalue())
+
+
+def cv_source(application):
+    """The CV of an application as a readable PDF file"""
+    title = application.display_name or "Candidat"
+    if application.application_type == 'MANUAL':
+        pdf, digest = get_cv_pdf(application)
+        with pdf:
+            return BytesIO(pdf.read())
+    if not application.cv_file:
+        return placeholder_pdf(title, "Aucun CV n'a été joint à cette candidature.")
+
+    extension = os.path.splitext(application.cv_file.name)[1].lower()
+    if extension != '.pdf':
+        return placeholder_pdf(
+            title,
+            f"Le CV a été envoyé au format {extension.lstrip('.').upper() or 'inconnu'} "
+            f"({escape(os.path.basename(application.cv_file.name))}) et ne peut pas être inclus dans ce dossier. "
+            "Il est téléchargeable depuis la fiche de la candidature.",
+        )
+    with application.cv_file.open('rb') as cv_file:
+        return BytesIO(cv_file.read())
+
+
+def dossier_chunks(applications):
+    """
+    Generator of the bytes of the dossier PDF of an iterable of applications,
+    in chunks of about CHUNK_SIZE bytes.
+    """
+    buffer = []
+    size = 0
+    for data in _dossier_objects(applications):
+        buffer.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _dossier_objects(applications):
+    writer = PDFStreamWriter()
+    yield writer.header()
+    pages_root = writer.reserve()
+    copier = PageCopier(writer, pages_root)
+
+    # (title, subtitle, page numbers) of each candidate
+    candidates = []
+    for application in applications:
+        title = application.display_name or "Candidat"
+        subtitle = application.role.title if application.role_id else ''
+        try:
+            pages = yield from copier.copy(cv_source(application))
+        except Exception:
+            logger.exception("CV de la candidature %s non inclus dans le dossier", application.pk)
+            pages = yield from copier.copy(placeholder_pdf(title, "Le CV de cette candidature n'a pas pu être lu."))
+        candidates.append((title, subtitle, pages))
+
+    # The table of contents shifts every CV by its own length
+    toc_pages = 1
+    while True:
+        toc = toc_pdf([(title, subtitle, len(pages)) for title, subtitle, pages in candidates], toc_pages + 1)
+        page_count = len(PdfReader(toc).pages)
+        if page_count == toc_pages:
+            break
+        toc_pages = page_count
+    toc.seek(0)
+    toc_numbers = yield from copier.copy(toc)
+
+    # Bookmarks: the table of contents, then one per candidate
+    outlines = writer.reserve()
+    bookmarks = [('Sommaire', toc_numbers[0])]
+    bookmarks.extend((title, pages[0]) for title, subtitle, pages in candidates if pages)
+    items = [writer.reserve() for _ in bookmarks]
+    for index, (number, (title, page)) in enumerate(zip(items, bookmarks)):
+        item = DictionaryObject({
+            NameObject('/Title'): TextStringObject(title),
+            NameObject('/Parent'): writer.ref(outlines),
+            NameObject('/Dest'): ArrayObject([writer.ref(page), NameObject('/Fit')]),
+        })
+        if index:
+            item[NameObject('/Prev')] = writer.ref(items[index - 1])
+        if index < len(items) - 1:
+            item[NameObject('/Next')] = writer.ref(items[index + 1])
+        yield writer.write(number, item)
+    yield writer.write(outlines, DictionaryObject({
+        NameObject('/Type'): NameObject('/Outlines'),
+        NameObject('/First'): writer.ref(items[0]),
+        NameObject('/Last'): writer.ref(items[-1]),
+        NameObject('/Count'): NumberObject(len(items)),
+    }))
+
+    kids = toc_numbers + [number for title, subtitle, pages in candidates for number in pages]
+    yield writer.write(pages_root, DictionaryObject({
+        NameObject('/Type'): NameObject('/Pages'),
+        NameObject('/Kids'): ArrayObject(writer.ref(number) for number in kids),
+        NameObject('/Count'): NumberObject(len(kids)),
+    }))
+
+    catalog = writer.reserve()
+    yield writer.write(catalog, DictionaryObject({
+        NameObject('/Type'): NameObject('/Catalog'),
+        NameObject('/Pages'): writer.ref(pages_root),
+        NameObject('/Outlines'): writer.ref(outlines),
+        NameObject('/PageMode'): NameObject('/UseOutlines'),
+    }))
+    info = writer.reserve()
+    yield writer.write(info, DictionaryObject({
+        NameObject('/Title'): TextStringObject('Dossier de candidatures'),
+        NameObject('/Producer'): TextStringObject('Shine Congo'),
+    }))
+    yield writer.close(catalog, info)
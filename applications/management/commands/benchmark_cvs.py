@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from applications.cv_benchmark import sample_application
+from applications.pdf_utils import CVRenderer
+
+
+class Command(BaseCommand):
+    help = "Mesure le nombre de CV générés par seconde (PDF unitaire, PDF par lot, aperçu HTML)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=200,
+            help="Nombre de CV générés par mesure (défaut: 200)",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help="Nombre de mesures, la meilleure est retenue (défaut: 3)",
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        if count < 1 or options['repeat'] < 1:
+            raise CommandError("--count et --repeat doivent être supérieurs à 0.")
+        applications = [sample_application(index) for index in range(count)]
+
+        def per_call():
+            # Styles rebuilt for every CV, as before CVRenderer was shared
+            for application in applications:
+                CVRenderer().render(application)
+
+        renderer = CVRenderer()
+
+        def shared():
+            for application in applications:
+                renderer.render(application)
+
+        def batch():
+            for application, pdf in renderer.render_many(applications):
+                pass
+
+        def quickview():
+            # HTML quick view of the admin panel, without its fragment cache
+            for application in applications:
+                render_to_string('admin_panel/_cv_quickview.html', {'application': application})
+
+        runs = [
+            ('Styles par appel', per_call),
+            ('Renderer partagé', shared),
+            ('render_many()', batch),
+            ('Aperçu HTML', quickview),
+        ]
+        per_call()  # Warm up the font and glyph caches
+        # Interleave the runs so that they share the same machine load
+        timings = {label: [] for label, run in runs}
+        for _ in range(options['repeat']):
+            for label, run in runs:
+                start = time.perf_counter()
+                run()
+                timings[label].append(time.perf_counter() - start)
+
+        for label, run in runs:
+            elapsed = min(timings[label])
+            self.stdout.write(f"{label:<20} {count / elapsed:8.1f} CV/s  ({elapsed * 1000 / count:.2f} ms/CV)")
+        self.stdout.write(f"Construction des styles: {self.styles_cost() * 1000:.3f} ms")
+
+    def styles_cost(self, number=200):
+        start = time.perf_counter()
+        for _ in range(number):
+            CVRenderer()
+        return (time.perf_counter() - start) / number
@@ -0,0 +1,149 @@
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from applications.cv_cache import CV_FIELDS, prerender
+from applications.models import JobApplication
+from core.activity import start_of_day
+
+
+logger = logging.getLogger(__name__)
+
+
+def prerender_chunk(pks):
+    """Render the missing CVs of a chunk of applications: (rendered, up to date, failed)"""
+    rendered = up_to_date = failed = 0
+    applications = JobApplication.objects.filter(pk__in=pks).only('application_type', *CV_FIELDS)
+    for application in applications:
+        try:
+            if prerender(application):
+                rendered += 1
+            else:
+                up_to_date += 1
+        except Exception:
+            logger.exception("Impossible de générer le CV de la candidature %s", application.pk)
+            failed += 1
+    return rendered, up_to_date, failed
+
+
+def init_worker():
+    """
+    Worker initializer: set up Django (spawned workers start from scratch)
+    and drop any connection inherited from the parent, so that every worker
+    opens its own database session.
+    """
+    django.setup()
+    connections.close_all()
+
+
+def parse_day(value, option):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"{option} doit être au format AAAA-MM-JJ.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère à l'avance les CV PDF des candidatures manuelles qui n'ont pas encore "
+        "de version à jour dans le stockage. Peut être relancée sans risque après une interruption."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="Candidatures reçues à partir de ce jour (AAAA-MM-JJ)")
+        parser.add_argument('--until', help="Candidatures reçues jusqu'à ce jour inclus (AAAA-MM-JJ)")
+        parser.add_argument(
+            '--unreviewed',
+            action='store_true',
+            help="Uniquement les candidatures non examinées",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help="Nombre de processus de génération (défaut: nombre de CPU, 4 au plus)",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help="Nombre de candidatures lues et confiées à un processus à la fois (défaut: 100)",
+        )
+
+    def handle(self, *args, **options):
+        workers, chunk_size = options['workers'], options['chunk_size']
+        if workers < 1 or chunk_size < 1:
+            raise CommandError("--workers et --chunk-size doivent être supérieurs à 0.")
+
+        queryset = JobApplication.objects.filter(application_type='MANUAL')
+        if options['since']:
+            queryset = queryset.filter(applied_at__gte=start_of_day(parse_day(options['since'], '--since')))
+        if options['until']:
+            until = parse_day(options['until'], '--until') + timedelta(days=1)
+            queryset = queryset.filter(applied_at__lt=start_of_day(until))
+        if options['unreviewed']:
+            queryset = queryset.filter(reviewed=False)
+
+        total = queryset.count()
+        self.stdout.write(f"{total} candidature(s) manuelle(s) à vérifier avec {workers} processus")
+        self.done = self.rendered = self.failed = 0
+        self.start = time.perf_counter()
+
+        if workers == 1:
+            for pks in self.chunks(queryset, chunk_size):
+                self.report(len(pks), prerender_chunk(pks), total)
+        else:
+            self.run_pool(queryset, chunk_size, workers, total)
+
+        elapsed = time.perf_counter() - self.start
+        message = (
+            f"{self.rendered} CV généré(s), {self.done - self.rendered - self.failed} déjà à jour, "
+            f"{self.failed} échec(s) en {elapsed:.1f} s"
+        )
+        self.stdout.write(self.style.ERROR(message) if self.failed else self.style.SUCCESS(message))
+
+    def chunks(self, queryset, chunk_size):
+        """Primary keys in ascending chunks, one short keyset query per chunk"""
+        last = 0
+        while True:
+            pks = list(queryset.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                return
+            yield pks
+            last = pks[-1]
+
+    def run_pool(self, queryset, chunk_size, workers, total):
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            pending = {}
+            for pks in self.chunks(queryset, chunk_size):
+                # Read ahead at most two chunks per worker
+                while len(pending) >= workers * 2:
+                    self.collect(pending, total)
+                # Workers are forked by submit(): the chunk query has just
+                # reopened the connection, which a child must not share
+                connections.close_all()
+                pending[pool.submit(prerender_chunk, pks)] = len(pks)
+            while pending:
+                self.collect(pending, total)
+
+    def collect(self, pending, total):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            self.report(pending.pop(future), future.result(), total)
+
+    def report(self, size, result, total):
+        rendered, up_to_date, failed = result
+        self.done += size
+        self.rendered += rendered
+        self.failed += failed
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(
+            f"{self.done}/{total} vérifiée(s), {self.rendered} générée(s) "
+            f"({self.rendered / elapsed:.1f} CV/s)"
+        )
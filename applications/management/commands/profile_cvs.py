@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.cv_benchmark import (
+    BASELINE_PATH, CORPUS, DEFAULT_TIME_TOLERANCE, DEFAULT_TOLERANCE, environment, load_baseline, regressions, run_corpus, save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile la génération des CV PDF sur un corpus de référence (débit, latence p50/p99, "
+        "mémoire maximale, taille) et échoue si les résultats régressent par rapport aux valeurs de référence"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=50,
+            help="Nombre de CV générés par cas et par mesure (défaut: 50)",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help="Nombre de mesures, la meilleure est retenue (défaut: 3)",
+        )
+        parser.add_argument(
+            '--case',
+            action='append',
+            choices=list(CORPUS),
+            help="Cas du corpus à mesurer, répétable (défaut: tous)",
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help=f"Régression relative tolérée de la mémoire et de la taille (défaut: {DEFAULT_TOLERANCE})",
+        )
+        parser.add_argument(
+            '--time-tolerance',
+            type=float,
+            default=DEFAULT_TIME_TOLERANCE,
+            help=f"Régression relative tolérée du débit et des latences (défaut: {DEFAULT_TIME_TOLERANCE})",
+        )
+        parser.add_argument(
+            '--baseline',
+            default=str(BASELINE_PATH),
+            help="Fichier JSON des valeurs de référence",
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help="Enregistre les résultats comme nouvelles valeurs de référence",
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        if count < 1 or options['repeat'] < 1:
+            raise CommandError("--count et --repeat doivent être supérieurs à 0.")
+        if options['tolerance'] < 0 or options['time_tolerance'] < 0:
+            raise CommandError("--tolerance et --time-tolerance ne peuvent pas être négatives.")
+
+        results = run_corpus(count, options['repeat'], options['case'])
+        self.stdout.write(f"{'Cas':<10} {'CV/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'Mém. KiB':>9} {'Octets':>8}")
+        for name, metrics in results.items():
+            self.stdout.write(
+                f"{name:<10} {metrics['renders_per_sec']:>8.1f} {metrics['p50_ms']:>8.2f} {metrics['p99_ms']:>8.2f} "
+                f"{metrics['peak_kib']:>9.1f} {metrics['size_bytes']:>8}"
+            )
+
+        if options['update_baseline']:
+            if options['case']:
+                raise CommandError("--update-baseline mesure tout le corpus, sans --case.")
+            save_baseline(results, count, options['repeat'], options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Valeurs de référence enregistrées dans {options['baseline']}"))
+            return
+
+        try:
+            baseline = load_baseline(options['baseline'])
+        except FileNotFoundError:
+            raise CommandError(f"Aucune valeur de référence ({options['baseline']}): lancez la commande avec --update-baseline.")
+        if baseline.get('environment') != environment():
+            self.stdout.write(self.style.WARNING(
+                f"Valeurs de référence mesurées sur un autre environnement ({baseline.get('environment')}): "
+                "les temps ne sont comparables qu'à titre indicatif."
+            ))
+
+        found = regressions(results, baseline, options['tolerance'], options['time_tolerance'])
+        tolerances = f"{options['tolerance']:.0%} (mémoire, taille) / {options['time_tolerance']:.0%} (temps)"
+        if found:
+            for name, metric, expected, value in found:
+                self.stderr.write(f"{name}: {metric} {value} (référence {expected})")
+            raise CommandError(f"{len(found)} régression(s) au-delà de {tolerances}.")
+        self.stdout.write(self.style.SUCCESS(f"Aucune régression au-delà de {tolerances}."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from applications.models import JobApplication
+from applications.roles import rebuild_role_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de candidatures par poste (JobRole.applicant_count / unreviewed_count)"
+
+    def handle(self, *args, **options):
+        deltas = rebuild_role_counters(JobApplication.objects.all())
+        roles = {role_id for role_id, counter in deltas}
+        self.stdout.write(self.style.SUCCESS(f"Compteurs recalculés pour {len(roles)} poste(s) avec candidatures."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from applications.models import StageCount
+from applications.pipeline import STAGES
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de candidatures par étape (StageCount)"
+
+    def handle(self, *args, **options):
+        totals = StageCount.objects.rebuild()
+        for stage, label in STAGES.items():
+            self.stdout.write(f"{label}: {totals.get(stage, 0)}")
+        self.stdout.write(self.style.SUCCESS("Compteurs d'étape recalculés."))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0003_jobapplication_application_type_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["applied_at"], name="application_applied_at_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0004_applied_at_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="jobapplication",
+            name="application_applied_at_idx",
+        ),
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["applied_at", "id"], name="application_applied_id_idx"
+            ),
+        ),
+    ]
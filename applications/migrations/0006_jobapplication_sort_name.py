@@ -0,0 +1,30 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0005_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobapplication",
+            name="sort_name",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=255,
+                verbose_name="Nom de tri",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["sort_name", "id"], name="application_sort_name_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:25
+
+from django.db import migrations, transaction
+
+from applications.names import sort_name
+
+BATCH_SIZE = 1000
+
+
+def backfill_sort_name(apps, schema_editor):
+    # One short transaction per batch of primary keys, so that a large table
+    # is never locked for the whole backfill
+    JobApplication = apps.get_model("applications", "JobApplication")
+    db = schema_editor.connection.alias
+    last_pk = 0
+    while True:
+        batch = list(
+            JobApplication.objects.using(db)
+            .filter(pk__gt=last_pk)
+            .order_by("pk")
+            .only("nom", "post_nom", "prenom", "full_name")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for application in batch:
+            application.sort_name = sort_name(
+                application.nom,
+                application.post_nom,
+                application.prenom,
+                application.full_name,
+            )
+        with transaction.atomic(using=db):
+            JobApplication.objects.using(db).bulk_update(batch, ["sort_name"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("applications", "0006_jobapplication_sort_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sort_name, migrations.RunPython.noop),
+    ]
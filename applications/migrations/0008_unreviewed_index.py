@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0007_backfill_sort_name"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                condition=models.Q(("reviewed", False)),
+                fields=["applied_at", "id"],
+                name="application_unreviewed_idx",
+            ),
+        ),
+    ]
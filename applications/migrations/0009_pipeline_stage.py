@@ -0,0 +1,165 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+STAGES = ["new", "shortlisted", "interviewed", "hired", "rejected"]
+
+
+def count_existing_applications(apps, schema_editor):
+    """Every existing application starts at the "new" stage; one counter row per stage"""
+    JobApplication = apps.get_model("applications", "JobApplication")
+    StageCount = apps.get_model("applications", "StageCount")
+    total = JobApplication.objects.count()
+    StageCount.objects.bulk_create(
+        StageCount(stage=stage, count=total if stage == "new" else 0)
+        for stage in STAGES
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0008_unreviewed_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StageCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "stage",
+                    models.CharField(
+                        choices=[
+                            ("new", "Nouvelle"),
+                            ("shortlisted", "Présélectionnée"),
+                            ("interviewed", "Entretien passé"),
+                            ("hired", "Embauchée"),
+                            ("rejected", "Refusée"),
+                        ],
+                        max_length=20,
+                        unique=True,
+                        verbose_name="Étape",
+                    ),
+                ),
+                ("count", models.IntegerField(default=0, verbose_name="Nombre")),
+            ],
+            options={
+                "verbose_name": "Compteur d'étape",
+                "verbose_name_plural": "Compteurs d'étape",
+            },
+        ),
+        migrations.CreateModel(
+            name="StageTransition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_stage",
+                    models.CharField(
+                        choices=[
+                            ("new", "Nouvelle"),
+                            ("shortlisted", "Présélectionnée"),
+                            ("interviewed", "Entretien passé"),
+                            ("hired", "Embauchée"),
+                            ("rejected", "Refusée"),
+                        ],
+                        max_length=20,
+                        verbose_name="Étape précédente",
+                    ),
+                ),
+                (
+                    "to_stage",
+                    models.CharField(
+                        choices=[
+                            ("new", "Nouvelle"),
+                            ("shortlisted", "Présélectionnée"),
+                            ("interviewed", "Entretien passé"),
+                            ("hired", "Embauchée"),
+                            ("rejected", "Refusée"),
+                        ],
+                        max_length=20,
+                        verbose_name="Nouvelle étape",
+                    ),
+                ),
+                ("note", models.TextField(blank=True, verbose_name="Note")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Date"),
+                ),
+            ],
+            options={
+                "verbose_name": "Changement d'étape",
+                "verbose_name_plural": "Changements d'étape",
+                "ordering": ["-created_at", "-id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="jobapplication",
+            name="stage",
+            field=models.CharField(
+                choices=[
+                    ("new", "Nouvelle"),
+                    ("shortlisted", "Présélectionnée"),
+                    ("interviewed", "Entretien passé"),
+                    ("hired", "Embauchée"),
+                    ("rejected", "Refusée"),
+                ],
+                default="new",
+                max_length=20,
+                verbose_name="Étape",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["stage", "applied_at", "id"], name="application_stage_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="stagetransition",
+            name="application",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="stage_transitions",
+                to="applications.jobapplication",
+                verbose_name="Candidature",
+            ),
+        ),
+        migrations.AddField(
+            model_name="stagetransition",
+            name="changed_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Par",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stagetransition",
+            index=models.Index(
+                fields=["application", "created_at"], name="stage_transition_app_idx"
+            ),
+        ),
+        migrations.RunPython(count_existing_applications, migrations.RunPython.noop),
+    ]
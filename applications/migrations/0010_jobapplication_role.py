@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0009_pipeline_stage"),
+        ("careers", "0003_role_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobapplication",
+            name="role",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="applications",
+                to="careers.jobrole",
+                verbose_name="Poste",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["role", "applied_at", "id"], name="application_role_idx"
+            ),
+        ),
+    ]
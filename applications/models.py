@@ -1,6 +1,15 @@
-from django.db import models
+from collections import Counter
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F
 from django.core.validators import FileExtensionValidator
 
+from core.activity import ActivityQuerySet, ActivityTrackedModel
+from core.models import DailyActivityStat
+from . import cv_cache, names, pdf_utils, roles
+
 
 def cv_upload_path(instance, filename):
     """Chemin de téléchargement pour les CVs"""
@@ -19,9 +28,158 @@ def cv_upload_path(instance, filename):
     return f'cvs/{safe_name}/{filename}'
 
 
-class JobApplication(models.Model):
+# Fields the display and sort names are built from
+NAME_FIELDS = ('nom', 'post_nom', 'prenom', 'full_name')
+
+# Fields whose changes move the per-role counters (see applications.roles)
+ROLE_COUNTER_FIELDS = {'role', 'role_id', 'reviewed'}
+
+# Étapes du processus de recrutement (voir applications.pipeline)
+STAGE_NEW = 'new'
+STAGE_SHORTLISTED = 'shortlisted'
+STAGE_INTERVIEWED = 'interviewed'
+STAGE_HIRED = 'hired'
+STAGE_REJECTED = 'rejected'
+
+STAGE_CHOICES = [
+    (STAGE_NEW, 'Nouvelle'),
+    (STAGE_SHORTLISTED, 'Présélectionnée'),
+    (STAGE_INTERVIEWED, 'Entretien passé'),
+    (STAGE_HIRED, 'Embauchée'),
+    (STAGE_REJECTED, 'Refusée'),
+]
+
+
+def stage_totals(queryset):
+    """{stage: rows} of a queryset, in one grouped query"""
+    return dict(queryset.order_by().values_list('stage').annotate(total=Count('pk')))
+
+
+class StageCountQuerySet(models.QuerySet):
+    
+    def apply(self, deltas):
+        """Add a {stage: delta} mapping to the counters, creating rows if needed"""
+        for stage, delta in sorted(deltas.items()):
+            if not delta:
+                continue
+            counters = self.filter(stage=stage)
+            if counters.update(count=F('count') + delta):
+                continue
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(stage=stage, count=delta)
+            except IntegrityError:
+                # Created concurrently by another request
+                counters.update(count=F('count') + delta)
+    
+    def totals(self):
+        """Applications per stage, every stage included, from the counter rows only"""
+        counts = dict(self.values_list('stage', 'count'))
+        return {stage: counts.get(stage, 0) for stage, label in STAGE_CHOICES}
+    
+    def rebuild(self):
+        """Recompute every counter from the applications table"""
+        totals = stage_totals(JobApplication.objects.all())
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(StageCount(stage=stage, count=totals.get(stage, 0)) for stage, label in STAGE_CHOICES)
+        return totals
+
+
+class JobApplicationQuerySet(ActivityQuerySet):
+    """
+    Fills sort_name for bulk_create(), which does not call save(), and keeps
+    the StageCount and per-role counters in step with bulk writes. The
+    counters join the transaction of the write (no savepoint of their own):
+    a failure rolls both back.
+    """
+    
+    def update(self, **kwargs):
+        role_keys = ROLE_COUNTER_FIELDS & kwargs.keys()
+        if 'stage' not in kwargs and not role_keys:
+            return super().update(**kwargs)
+        
+        stage = kwargs.get('stage')
+        relinks = 'role' in kwargs or 'role_id' in kwargs
+        with transaction.atomic(using=self.db, savepoint=False):
+            stages_before = stage_totals(self) if isinstance(stage, str) else None
+            roles_before = None
+            if role_keys and all(roles.is_literal(kwargs[key]) for key in role_keys):
+                # Applications without a role only count once they get one
+                roles_before = roles.role_totals(self if relinks else self.filter(role__isnull=False))
+            
+            rows = super().update(**kwargs)
+            
+            if 'stage' in kwargs:
+                if stages_before is None:
+                    # Expression: count again
+                    StageCount.objects.rebuild()
+                else:
+                    deltas = Counter()
+                    for previous, total in stages_before.items():
+                        deltas[previous] -= total
+                        deltas[stage] += total
+                    StageCount.objects.apply(deltas)
+            
+            if role_keys:
+                if roles_before is None:
+                    roles.rebuild_role_counters(JobApplication.objects.all())
+                else:
+                    new_role = roles.role_value(kwargs.get('role', kwargs.get('role_id')))
+                    deltas = Counter()
+                    for (role_id, reviewed), total in roles_before.items():
+                        roles.add_application(deltas, role_id, reviewed, -total)
+                        roles.add_application(
+                            deltas, new_role if relinks else role_id, kwargs.get('reviewed', reviewed), total
+                        )
+                    roles.apply_role_deltas(deltas)
+        return rows
+    
+    update.alters_data = True
+    
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            stages_before = stage_totals(self)
+            roles_before = roles.role_totals(self.filter(role__isnull=False))
+            pks = list(self.values_list('pk', flat=True))
+            result = super().delete()
+            # Stored CV PDFs go once the deletion is committed, as in before_delete()
+            for pk in pks:
+                transaction.on_commit(partial(cv_cache.purge, pk), using=self.db)
+            StageCount.objects.apply({stage: -total for stage, total in stages_before.items()})
+            deltas = Counter()
+            for (role_id, reviewed), total in roles_before.items():
+                roles.add_application(deltas, role_id, reviewed, -total)
+            roles.apply_role_deltas(deltas)
+        return result
+    
+    delete.alters_data = True
+    delete.queryset_only = True
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.sort_name = obj.build_sort_name()
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            StageCount.objects.apply(Counter(obj.stage for obj in objs))
+            deltas = Counter()
+            for obj in objs:
+                roles.add_application(deltas, obj.role_id, obj.reviewed)
+            roles.apply_role_deltas(deltas)
+        return objs
+    
+    bulk_create.alters_data = True
+
+
+class JobApplication(ActivityTrackedModel):
     """Modèle pour les candidatures d'emploi"""
     
+    # Statistiques quotidiennes (voir core.activity)
+    activity_date_field = 'applied_at'
+    activity_entity = DailyActivityStat.APPLICATIONS
+    activity_flags = {'reviewed': DailyActivityStat.APPLICATIONS_REVIEWED}
+    
     APPLICATION_TYPE_CHOICES = [
         ('MANUAL', 'Remplir manuellement'),
         ('CV_UPLOAD', 'Télécharger mon CV'),
@@ -38,6 +196,17 @@ class JobApplication(models.Model):
         ('PERSONNE', 'A travers une personne'),
     ]
     
+    # Poste visé (lien « Postuler » d'une offre)
+    role = models.ForeignKey(
+        'careers.JobRole',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='applications',
+        verbose_name="Poste",
+        db_index=False,  # application_role_idx
+    )
+    
     # Type d'application
     application_type = models.CharField(
         "Type de candidature",
@@ -110,22 +279,155 @@ class JobApplication(models.Model):
     )
     message = models.TextField("Message / Lettre de motivation", blank=True)
     
+    # Nom normalisé pour le tri (maintenu à l'enregistrement, voir applications.names)
+    sort_name = models.CharField("Nom de tri", max_length=names.SORT_NAME_LENGTH, blank=True, default='', editable=False)
+    
     # Métadonnées
     applied_at = models.DateTimeField("Date de candidature", auto_now_add=True)
     reviewed = models.BooleanField("Examiné", default=False)
+    stage = models.CharField("Étape", max_length=20, choices=STAGE_CHOICES, default=STAGE_NEW)
     notes = models.TextField("Notes internes", blank=True)
     
+    objects = JobApplicationQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Candidature"
         verbose_name_plural = "Candidatures"
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['applied_at', 'id'], name='application_applied_id_idx'),
+            models.Index(fields=['sort_name', 'id'], name='application_sort_name_idx'),
+            # File de tri des candidatures non examinées (admin_panel.triage)
+            models.Index(
+                fields=['applied_at', 'id'],
+                condition=models.Q(reviewed=False),
+                name='application_unreviewed_idx',
+            ),
+            # Listes filtrées par étape, dans l'ordre de la pagination
+            models.Index(fields=['stage', 'applied_at', 'id'], name='application_stage_idx'),
+            # Candidatures d'un poste, dans l'ordre de la pagination
+            models.Index(fields=['role', 'applied_at', 'id'], name='application_role_idx'),
+        ]
     
     def __str__(self):
-        if self.nom and self.prenom:
-            name = f"{self.nom} {self.prenom}"
-        elif self.full_name:
-            name = self.full_name
-        else:
-            name = "Candidat"
         dob_str = self.date_of_birth.strftime('%d/%m/%Y') if self.date_of_birth else 'N/A'
-        return f"{name} - {dob_str}"
+        return f"{self.display_name or 'Candidat'} - {dob_str}"
+    
+    @property
+    def display_name(self):
+        """Nom affiché du candidat (vide si aucun nom n'a été saisi)"""
+        return names.display_name(self.nom, self.post_nom, self.prenom, self.full_name)
+    
+    @property
+    def skill_lines(self):
+        """Compétences en puces, comme dans le CV PDF"""
+        return pdf_utils.skill_lines(self.skills) if self.skills else []
+    
+    @property
+    def cv_filename(self):
+        """Nom du fichier PDF généré pour le CV"""
+        return f"CV_{(self.display_name or str(self.pk)).replace(' ', '_')}.pdf"
+    
+    def build_sort_name(self):
+        return names.sort_name(self.nom, self.post_nom, self.prenom, self.full_name)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._counted = instance._counted_values()
+        return instance
+    
+    def _counted_values(self):
+        # Values the stage and role counters were last adjusted for; read
+        # from __dict__ so that deferred fields are never loaded
+        return {name: self.__dict__[name] for name in ('stage', 'role_id', 'reviewed') if name in self.__dict__}
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(NAME_FIELDS):
+            self.sort_name = self.build_sort_name()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'sort_name'}
+        super().save(*args, **kwargs)
+    
+    def after_save(self, adding, update_fields):
+        # Stage and role counters and stage history, in the save transaction (core.activity)
+        role_deltas = Counter()
+        if adding:
+            StageCount.objects.apply({self.stage: 1})
+            roles.add_application(role_deltas, self.role_id, self.reviewed)
+            roles.apply_role_deltas(role_deltas)
+            self._counted = self._counted_values()
+            return
+        
+        counted = getattr(self, '_counted', {})
+        saved = {
+            name: self.__dict__[name] for name in counted
+            if name in self.__dict__ and (
+                update_fields is None or name in update_fields or (name == 'role_id' and 'role' in update_fields)
+            )
+        }
+        current = {**counted, **saved}
+        
+        if current.get('stage') != counted.get('stage'):
+            StageCount.objects.apply({counted['stage']: -1, current['stage']: 1})
+            StageTransition.objects.create(application=self, from_stage=counted['stage'], to_stage=current['stage'])
+        
+        if {'role_id', 'reviewed'} <= counted.keys() and (
+            (current['role_id'], current['reviewed']) != (counted['role_id'], counted['reviewed'])
+        ):
+            roles.add_application(role_deltas, counted['role_id'], counted['reviewed'], -1)
+            roles.add_application(role_deltas, current['role_id'], current['reviewed'])
+            roles.apply_role_deltas(role_deltas)
+        
+        self._counted = current
+    
+    def before_delete(self):
+        # Stored CV PDFs go once the deletion is committed
+        transaction.on_commit(partial(cv_cache.purge, self.pk))
+        StageCount.objects.apply({self.stage: -1})
+        role_deltas = Counter()
+        roles.add_application(role_deltas, self.role_id, self.reviewed, -1)
+        roles.apply_role_deltas(role_deltas)
+
+
+class StageTransition(models.Model):
+    """Historique des changements d'étape d'une candidature"""
+    
+    application = models.ForeignKey(
+        JobApplication, on_delete=models.CASCADE, related_name='stage_transitions', verbose_name="Candidature"
+    )
+    from_stage = models.CharField("Étape précédente", max_length=20, choices=STAGE_CHOICES)
+    to_stage = models.CharField("Nouvelle étape", max_length=20, choices=STAGE_CHOICES)
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Par"
+    )
+    note = models.TextField("Note", blank=True)
+    created_at = models.DateTimeField("Date", auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Changement d'étape"
+        verbose_name_plural = "Changements d'étape"
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['application', 'created_at'], name='stage_transition_app_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_from_stage_display()} → {self.get_to_stage_display()}"
+
+
+class StageCount(models.Model):
+    """Nombre de candidatures par étape, tenu à jour à chaque écriture"""
+    
+    stage = models.CharField("Étape", max_length=20, choices=STAGE_CHOICES, unique=True)
+    count = models.IntegerField("Nombre", default=0)
+    
+    objects = StageCountQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = "Compteur d'étape"
+        verbose_name_plural = "Compteurs d'étape"
+    
+    def __str__(self):
+        return f"{self.get_stage_display()}: {self.count}"
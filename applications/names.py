@@ -0,0 +1,30 @@
+"""
+Candidate names: the display name shown everywhere and the normalized sort
+name stored in JobApplication.sort_name.
+"""
+import unicodedata
+
+
+# Length of JobApplication.sort_name
+SORT_NAME_LENGTH = 255
+
+
+def display_name(nom, post_nom, prenom, full_name):
+    """'Prénom Nom Post-nom' for manual applications, else the legacy full_name"""
+    if nom and prenom:
+        return ' '.join(part for part in (prenom, nom, post_nom) if part)
+    return full_name or ''
+
+
+def sort_name(nom, post_nom, prenom, full_name):
+    """
+    Lower-case, accent-free name ordered family name first ('nom post-nom
+    prénom'), so that a plain index on the column gives alphabetical order.
+    """
+    if nom and prenom:
+        name = ' '.join(part for part in (nom, post_nom, prenom) if part)
+    else:
+        name = full_name or ''
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return ' '.join(name.casefold().split())[:SORT_NAME_LENGTH]
@@ -1,12 +1,23 @@
-from reportlab.lib.pagesizes import letter, A4
+from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepTogether
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
 from reportlab.pdfgen import canvas
 from io import BytesIO
-from django.http import HttpResponse
+from xml.sax.saxutils import escape
+import math
+
+
+# Page and margins of the CV; the frame adds 6pt of padding on each side
+PAGE_SIZE = A4
+MARGIN = 1*cm
+FRAME_WIDTH = PAGE_SIZE[0] - 2*MARGIN - 12
+FRAME_HEIGHT = PAGE_SIZE[1] - 2*MARGIN - 12
+
+# Smallest scale of the text sections and spacing used to fit a CV on one page
+MIN_SCALE = 0.75
 
 
 class NumberedCanvas(canvas.Canvas):
@@ -35,19 +46,43 @@ class NumberedCanvas(canvas.Canvas):
         self.restoreState()
 
 
-def generate_cv_pdf(application):
-    """Generate a modern PDF CV from manual application data - optimized for one page"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                           rightMargin=1*cm, leftMargin=1*cm,
-                           topMargin=1*cm, bottomMargin=1*cm)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    
+def skill_lines(skills_text):
+    """Skills as bullet points, one per line or per comma-separated item"""
+    # Convert line breaks to bullet points
+    if '\n' in skills_text:
+        lines = [line.strip() for line in skills_text.split('\n') if line.strip()]
+        return [f"• {line}" for line in lines]
+    if ', ' in skills_text and '•' not in skills_text:
+        # Convert comma-separated to bullet points
+        items = [item.strip() for item in skills_text.split(',') if item.strip()]
+        return [f"• {item}" for item in items]
+    if '•' not in skills_text:
+        return [f"• {skills_text}"]
+    return [skills_text]
+
+
+def format_skills(skills_text, separator='<br/>'):
+    """Skill lines as paragraph markup"""
+    return separator.join(escape(line) for line in skill_lines(skills_text))
+
+
+class CVRenderer:
+    """
+    Modern one-page PDF CV of a manual application.
+
+    The stylesheet, colours and table styles never change, so they are
+    built once in __init__ and shared by every render; only the flowables
+    holding the candidate's data are created per CV, and the fixed texts
+    (section titles, labels) are parsed once. Use the process-wide instance
+    returned by get_renderer().
+
+    A CV too long for one page is fitted before doc.build (see layout()):
+    the flowables are measured once and the text sections and spacing are
+    shrunk by a single scale computed from that measure. CVs that would
+    need more than MIN_SCALE flow over several numbered pages, with their
+    skills listed on shared lines.
+    """
+
     # Modern color scheme
     navy = colors.HexColor('#003B5C')
     cyan = colors.HexColor('#2A9D8F')
@@ -55,275 +90,325 @@ def generate_cv_pdf(application):
     dark_grey = colors.HexColor('#333333')
     medium_grey = colors.HexColor('#666666')
     light_grey = colors.HexColor('#E5E5E5')
-    
-    # Header style - Compact but prominent name
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Heading1'],
-        fontSize=22,
-        textColor=navy,
-        spaceAfter=6,
-        alignment=TA_LEFT,
-        fontName='Helvetica-Bold',
-        leading=26
-    )
-    
-    # Contact info style - Compact
-    contact_style = ParagraphStyle(
-        'ContactStyle',
-        parent=styles['Normal'],
-        fontSize=8.5,
-        textColor=medium_grey,
-        spaceAfter=2,
-        alignment=TA_LEFT,
-        leading=11
-    )
-    
-    # Section heading style - Compact
-    section_style = ParagraphStyle(
-        'SectionStyle',
-        parent=styles['Heading2'],
-        fontSize=11,
-        textColor=navy,
-        spaceAfter=4,
-        spaceBefore=12,
-        fontName='Helvetica-Bold',
-        leading=14
-    )
-    
-    # Content style - Compact
-    content_style = ParagraphStyle(
-        'ContentStyle',
-        parent=styles['Normal'],
-        fontSize=9.5,
-        textColor=dark_grey,
-        spaceAfter=4,
-        leading=13,
-        alignment=TA_LEFT
-    )
-    
-    # Label style for personal info - Compact
-    label_style = ParagraphStyle(
-        'LabelStyle',
-        parent=styles['Normal'],
-        fontSize=9.5,
-        textColor=navy,
-        fontName='Helvetica-Bold',
-        leading=13,
-        leftIndent=0
-    )
-    
-    # Value style - Compact
-    value_style = ParagraphStyle(
-        'ValueStyle',
-        parent=styles['Normal'],
-        fontSize=9.5,
-        textColor=dark_grey,
-        leading=13,
-        leftIndent=0
-    )
-    
-    # ========== HEADER SECTION ==========
-    # Name
-    if application.nom and application.prenom:
-        full_name = f"{application.prenom} {application.nom}"
-        if application.post_nom:
-            full_name += f" {application.post_nom}"
-    elif application.full_name:
-        full_name = application.full_name
-    else:
-        full_name = "Candidat"
-    
-    # Create header with colored sidebar
-    header_content = []
-    header_content.append(Paragraph(full_name.upper(), header_style))
-    
-    # Contact information - each on separate line
-    contact_lines = []
-    if application.phone:
-        contact_lines.append(Paragraph(f"<b>Téléphone:</b> {application.phone}", contact_style))
-    if application.physical_address:
-        contact_lines.append(Paragraph(f"<b>Adresse:</b> {application.physical_address}", contact_style))
-    if application.city:
-        contact_lines.append(Paragraph(f"<b>Ville:</b> {application.city}", contact_style))
-    
-    # Header table with colored sidebar
-    header_rows = [[header_content[0], '']]
-    for contact_line in contact_lines:
-        header_rows.append([contact_line, ''])
-    
-    header_table = Table(header_rows, colWidths=[6.3*inch, 0.2*inch])
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (1, 0), (1, -1), cyan),  # Colored sidebar
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (0, -1), 0),
-        ('RIGHTPADDING', (0, 0), (0, -1), 0),
-        ('TOPPADDING', (0, 0), (0, -1), 2),
-        ('BOTTOMPADDING', (0, 0), (0, -1), 2),
-        ('TOPPADDING', (0, 0), (0, 0), 0),  # No top padding for name
-    ]))
-    elements.append(header_table)
-    elements.append(Spacer(1, 0.25*inch))
-    
-    # ========== PERSONAL INFORMATION SECTION ==========
-    personal_info_rows = []
-    
-    if application.date_of_birth:
-        dob_str = application.date_of_birth.strftime('%d/%m/%Y')
-        personal_info_rows.append([
-            Paragraph('<b>Date de naissance:</b>', label_style),
-            Paragraph(dob_str, value_style)
-        ])
-    
-    if application.lieu_de_naissance:
-        personal_info_rows.append([
-            Paragraph('<b>Lieu de naissance:</b>', label_style),
-            Paragraph(application.lieu_de_naissance, value_style)
-        ])
-    
-    if application.sexe:
-        sexe_display = dict(application.GENDER_CHOICES).get(application.sexe, application.sexe)
-        personal_info_rows.append([
-            Paragraph('<b>Sexe:</b>', label_style),
-            Paragraph(sexe_display, value_style)
-        ])
-    
-    if application.nationalite:
-        personal_info_rows.append([
-            Paragraph('<b>Nationalité:</b>', label_style),
-            Paragraph(application.nationalite, value_style)
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self._parsed = {}
+        self._scaled = {}
+
+        # Header style - Compact but prominent name
+        self.header_style = ParagraphStyle(
+            'HeaderStyle',
+            parent=styles['Heading1'],
+            fontSize=22,
+            textColor=self.navy,
+            spaceAfter=6,
+            alignment=TA_LEFT,
+            fontName='Helvetica-Bold',
+            leading=26
+        )
+
+        # Contact info style - Compact
+        self.contact_style = ParagraphStyle(
+            'ContactStyle',
+            parent=styles['Normal'],
+            fontSize=8.5,
+            textColor=self.medium_grey,
+            spaceAfter=2,
+            alignment=TA_LEFT,
+            leading=11
+        )
+
+        # Section heading style - Compact
+        self.section_style = ParagraphStyle(
+            'SectionStyle',
+            parent=styles['Heading2'],
+            fontSize=11,
+            textColor=self.navy,
+            spaceAfter=4,
+            spaceBefore=12,
+            fontName='Helvetica-Bold',
+            leading=14
+        )
+
+        # Content style - Compact
+        self.content_style = ParagraphStyle(
+            'ContentStyle',
+            parent=styles['Normal'],
+            fontSize=9.5,
+            textColor=self.dark_grey,
+            spaceAfter=4,
+            leading=13,
+            alignment=TA_LEFT
+        )
+
+        # Label style for personal info - Compact
+        self.label_style = ParagraphStyle(
+            'LabelStyle',
+            parent=styles['Normal'],
+            fontSize=9.5,
+            textColor=self.navy,
+            fontName='Helvetica-Bold',
+            leading=13,
+            leftIndent=0
+        )
+
+        # Value style - Compact
+        self.value_style = ParagraphStyle(
+            'ValueStyle',
+            parent=styles['Normal'],
+            fontSize=9.5,
+            textColor=self.dark_grey,
+            leading=13,
+            leftIndent=0
+        )
+
+        self.footer_style = ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=7.5,
+            textColor=self.medium_grey,
+            alignment=TA_CENTER,
+            spaceBefore=4
+        )
+
+        # Header table with colored sidebar
+        self.header_table_style = TableStyle([
+            ('BACKGROUND', (1, 0), (1, -1), self.cyan),  # Colored sidebar
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (0, -1), 0),
+            ('RIGHTPADDING', (0, 0), (0, -1), 0),
+            ('TOPPADDING', (0, 0), (0, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (0, -1), 2),
+            ('TOPPADDING', (0, 0), (0, 0), 0),  # No top padding for name
         ])
-    
-    if personal_info_rows:
+
         # Section divider
-        divider = Table([['']], colWidths=[6.5*inch])
-        divider.setStyle(TableStyle([
-            ('LINEBELOW', (0, 0), (0, 0), 2, cyan),
+        self.divider_style = TableStyle([
+            ('LINEBELOW', (0, 0), (0, 0), 2, self.cyan),
             ('TOPPADDING', (0, 0), (0, 0), 0),
             ('BOTTOMPADDING', (0, 0), (0, 0), 6),
-        ]))
-        elements.append(Paragraph("INFORMATIONS PERSONNELLES".upper(), section_style))
-        elements.append(divider)
-        
+        ])
+
         # Personal info table - single column, compact layout
-        personal_table = Table(personal_info_rows, colWidths=[2*inch, 4.5*inch])
-        personal_table.setStyle(TableStyle([
+        self.personal_table_style = TableStyle([
             ('VALIGN', (0, 0), (-1, -1), 'TOP'),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
             ('TOPPADDING', (0, 0), (-1, -1), 0),
             ('LEFTPADDING', (0, 0), (-1, -1), 0),
             ('RIGHTPADDING', (1, 0), (1, -1), 0),
-        ]))
-        elements.append(personal_table)
-        elements.append(Spacer(1, 0.15*inch))
-    
-    # ========== EDUCATION SECTION ==========
-    if application.education:
-        divider = Table([['']], colWidths=[6.5*inch])
-        divider.setStyle(TableStyle([
-            ('LINEBELOW', (0, 0), (0, 0), 2, cyan),
-            ('TOPPADDING', (0, 0), (0, 0), 0),
-            ('BOTTOMPADDING', (0, 0), (0, 0), 6),
-        ]))
-        elements.append(Paragraph("FORMATION".upper(), section_style))
-        elements.append(divider)
-        
-        # Format education - preserve line breaks but compact
-        education_text = application.education.replace('\n', '<br/>')
-        education_para = Paragraph(education_text, content_style)
-        elements.append(education_para)
-        elements.append(Spacer(1, 0.12*inch))
-    
-    # ========== SKILLS SECTION ==========
-    if application.skills:
-        divider = Table([['']], colWidths=[6.5*inch])
-        divider.setStyle(TableStyle([
-            ('LINEBELOW', (0, 0), (0, 0), 2, cyan),
-            ('TOPPADDING', (0, 0), (0, 0), 0),
-            ('BOTTOMPADDING', (0, 0), (0, 0), 6),
-        ]))
-        elements.append(Paragraph("COMPÉTENCES".upper(), section_style))
-        elements.append(divider)
-        
-        # Format skills - add bullet points
-        skills_text = application.skills
-        # Convert line breaks to bullet points
-        if '\n' in skills_text:
-            lines = [line.strip() for line in skills_text.split('\n') if line.strip()]
-            skills_text = '<br/>'.join([f"• {line}" for line in lines])
-        elif ', ' in skills_text and '•' not in skills_text:
-            # Convert comma-separated to bullet points
-            items = [item.strip() for item in skills_text.split(',') if item.strip()]
-            skills_text = '<br/>'.join([f"• {item}" for item in items])
-        elif '•' not in skills_text:
-            skills_text = f"• {skills_text}"
-        
-        skills_para = Paragraph(skills_text, content_style)
-        elements.append(skills_para)
-        elements.append(Spacer(1, 0.12*inch))
-    
-    # ========== LANGUAGES SECTION ==========
-    if application.languages:
-        divider = Table([['']], colWidths=[6.5*inch])
-        divider.setStyle(TableStyle([
-            ('LINEBELOW', (0, 0), (0, 0), 2, cyan),
-            ('TOPPADDING', (0, 0), (0, 0), 0),
-            ('BOTTOMPADDING', (0, 0), (0, 0), 6),
-        ]))
-        elements.append(Paragraph("LANGUES PARLÉES".upper(), section_style))
-        elements.append(divider)
-        
-        languages_para = Paragraph(application.languages, content_style)
-        elements.append(languages_para)
-        elements.append(Spacer(1, 0.12*inch))
-    
-    # ========== REFERENCE SECTION ==========
-    if application.how_heard_about:
-        divider = Table([['']], colWidths=[6.5*inch])
-        divider.setStyle(TableStyle([
-            ('LINEBELOW', (0, 0), (0, 0), 2, cyan),
+        ])
+
+        self.footer_line_style = TableStyle([
+            ('LINEBELOW', (0, 0), (0, 0), 1, self.light_grey),
             ('TOPPADDING', (0, 0), (0, 0), 0),
-            ('BOTTOMPADDING', (0, 0), (0, 0), 6),
-        ]))
-        elements.append(Paragraph("RÉFÉRENCE".upper(), section_style))
+            ('BOTTOMPADDING', (0, 0), (0, 0), 4),
+        ])
+
+    def static_paragraph(self, text, style):
+        """Paragraph of a fixed text, whose markup is parsed on first use only"""
+        key = (text, style.name)
+        if key not in self._parsed:
+            paragraph = Paragraph(text, style)
+            self._parsed[key] = (paragraph.style, paragraph.frags)
+        style, frags = self._parsed[key]
+        return Paragraph(text, style, frags=frags)
+
+    def content_style_at(self, scale):
+        """Content style with its size and spacing multiplied by scale"""
+        if scale == 1:
+            return self.content_style
+        if scale not in self._scaled:
+            self._scaled[scale] = ParagraphStyle(
+                f'ContentStyle{scale:.2f}',
+                parent=self.content_style,
+                fontSize=self.content_style.fontSize * scale,
+                leading=self.content_style.leading * scale,
+                spaceAfter=self.content_style.spaceAfter * scale,
+            )
+        return self._scaled[scale]
+
+    def section(self, elements, title, *content):
+        """Append a section heading, its divider and the flowables of the section"""
+        divider = Table([['']], colWidths=[6.5*inch], style=self.divider_style)
+        elements.append(self.static_paragraph(title, self.section_style))
         elements.append(divider)
-        
-        how_heard_display = dict(application.HOW_HEARD_CHOICES).get(application.how_heard_about, application.how_heard_about)
-        reference_text = f"<b>{how_heard_display}</b>"
-        if application.how_heard_details:
-            reference_text += f"<br/>{application.how_heard_details}"
-        
-        reference_para = Paragraph(reference_text, content_style)
-        elements.append(reference_para)
-        elements.append(Spacer(1, 0.12*inch))
-    
-    # ========== FOOTER ==========
-    elements.append(Spacer(1, 0.15*inch))
-    footer_line = Table([['']], colWidths=[6.5*inch])
-    footer_line.setStyle(TableStyle([
-        ('LINEBELOW', (0, 0), (0, 0), 1, light_grey),
-        ('TOPPADDING', (0, 0), (0, 0), 0),
-        ('BOTTOMPADDING', (0, 0), (0, 0), 4),
-    ]))
-    elements.append(footer_line)
-    
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=7.5,
-        textColor=medium_grey,
-        alignment=TA_CENTER,
-        spaceBefore=4
-    )
-    if application.applied_at:
-        applied_date = application.applied_at.strftime('%d/%m/%Y à %H:%M')
-        elements.append(Paragraph(f"Candidature soumise le {applied_date}", footer_style))
-    
-    # Build PDF (no page numbers needed for single page)
-    doc.build(elements)
-    
-    # Get the value of the BytesIO buffer and write it to the response
-    pdf = buffer.getvalue()
-    buffer.close()
-    
-    return pdf
+        elements.extend(content)
+
+    def elements(self, application, scale=1, compact=False):
+        """
+        Flowables of the CV of an application, text sections and spacing at
+        the given scale. compact puts the skills on shared lines.
+        """
+        elements = []
+        content_style = self.content_style_at(scale)
+
+        # ========== HEADER SECTION ==========
+        full_name = application.display_name or "Candidat"
+        header_rows = [[Paragraph(escape(full_name.upper()), self.header_style), '']]
+
+        # Contact information - each on separate line
+        if application.phone:
+            header_rows.append([Paragraph(f"<b>Téléphone:</b> {escape(application.phone)}", self.contact_style), ''])
+        if application.physical_address:
+            header_rows.append([Paragraph(f"<b>Adresse:</b> {escape(application.physical_address)}", self.contact_style), ''])
+        if application.city:
+            header_rows.append([Paragraph(f"<b>Ville:</b> {escape(application.city)}", self.contact_style), ''])
+
+        elements.append(Table(header_rows, colWidths=[6.3*inch, 0.2*inch], style=self.header_table_style))
+        elements.append(Spacer(1, 0.25*inch*scale))
+
+        # ========== PERSONAL INFORMATION SECTION ==========
+        personal_info = []
+        if application.date_of_birth:
+            personal_info.append(('Date de naissance', application.date_of_birth.strftime('%d/%m/%Y')))
+        if application.lieu_de_naissance:
+            personal_info.append(('Lieu de naissance', application.lieu_de_naissance))
+        if application.sexe:
+            personal_info.append(('Sexe', dict(application.GENDER_CHOICES).get(application.sexe, application.sexe)))
+        if application.nationalite:
+            personal_info.append(('Nationalité', application.nationalite))
+
+        if personal_info:
+            rows = [
+                [self.static_paragraph(f'<b>{label}:</b>', self.label_style), Paragraph(escape(value), self.value_style)]
+                for label, value in personal_info
+            ]
+            self.section(
+                elements, "INFORMATIONS PERSONNELLES",
+                Table(rows, colWidths=[2*inch, 4.5*inch], style=self.personal_table_style),
+                Spacer(1, 0.15*inch*scale),
+            )
+
+        # ========== EDUCATION SECTION ==========
+        if application.education:
+            # Format education - preserve line breaks but compact
+            education_text = escape(application.education).replace('\n', '<br/>')
+            self.section(
+                elements, "FORMATION",
+                Paragraph(education_text, content_style),
+                Spacer(1, 0.12*inch*scale),
+            )
+
+        # ========== SKILLS SECTION ==========
+        if application.skills:
+            self.section(
+                elements, "COMPÉTENCES",
+                Paragraph(format_skills(application.skills, '&nbsp;&nbsp; ' if compact else '<br/>'), content_style),
+                Spacer(1, 0.12*inch*scale),
+            )
+
+        # ========== LANGUAGES SECTION ==========
+        if application.languages:
+            self.section(
+                elements, "LANGUES PARLÉES",
+                Paragraph(escape(application.languages), content_style),
+                Spacer(1, 0.12*inch*scale),
+            )
+
+        # ========== REFERENCE SECTION ==========
+        if application.how_heard_about:
+            how_heard_display = dict(application.HOW_HEARD_CHOICES).get(application.how_heard_about, application.how_heard_about)
+            reference_text = f"<b>{how_heard_display}</b>"
+            if application.how_heard_details:
+                reference_text += f"<br/>{escape(application.how_heard_details)}"
+            self.section(
+                elements, "RÉFÉRENCE",
+                Paragraph(reference_text, content_style),
+                Spacer(1, 0.12*inch*scale),
+            )
+
+        # ========== FOOTER ==========
+        elements.append(Spacer(1, 0.15*inch*scale))
+        elements.append(Table([['']], colWidths=[6.5*inch], style=self.footer_line_style))
+        if application.applied_at:
+            applied_date = application.applied_at.strftime('%d/%m/%Y à %H:%M')
+            elements.append(Paragraph(f"Candidature soumise le {applied_date}", self.footer_style))
+
+        return elements
+
+    def measure(self, elements):
+        """
+        Heights (fixed, scalable) of the flowables, spacing included. Frames
+        collapse adjacent spaces, so this is an upper bound of the height
+        used on the page.
+        """
+        fixed = scalable = 0
+        for flowable in elements:
+            width, height = flowable.wrap(FRAME_WIDTH, FRAME_HEIGHT)
+            height += flowable.getSpaceBefore() + flowable.getSpaceAfter()
+            if isinstance(flowable, Spacer) or getattr(flowable, 'style', None) is self.content_style:
+                scalable += height
+            else:
+                fixed += height
+        return fixed, scalable
+
+    def layout(self, application):
+        """
+        Flowables of the CV and whether they fit on one page.
+
+        A smaller font never adds lines to a paragraph, so the scaled height
+        of the text sections is at most scale times their measured height:
+        the scale is the free room divided by that height, rounded down, and
+        the result is guaranteed to fit without being measured again.
+        """
+        elements = self.elements(application)
+        fixed, scalable = self.measure(elements)
+        if fixed + scalable <= FRAME_HEIGHT:
+            return elements, True
+        scale = (FRAME_HEIGHT - fixed) / scalable if scalable else 0
+        scale = math.floor(scale * 100) / 100
+        if scale < MIN_SCALE:
+            # Overflow: as short as possible, skill bullets one after another
+            return self.elements(application, MIN_SCALE, compact=True), False
+        return self.elements(application, scale), True
+
+    def build(self, application, buffer):
+        """Write the CV of an application to a file-like object"""
+        elements, fits = self.layout(application)
+        if fits:
+            # No page numbers needed for single page
+            doc = SimpleDocTemplate(buffer, pagesize=PAGE_SIZE,
+                                    rightMargin=MARGIN, leftMargin=MARGIN,
+                                    topMargin=MARGIN, bottomMargin=MARGIN)
+            doc.build(elements)
+        else:
+            # Room below the frame for the page numbers
+            doc = SimpleDocTemplate(buffer, pagesize=PAGE_SIZE,
+                                    rightMargin=MARGIN, leftMargin=MARGIN,
+                                    topMargin=MARGIN, bottomMargin=2*MARGIN)
+            doc.build(elements, canvasmaker=NumberedCanvas)
+
+    def render(self, application):
+        """PDF bytes of the CV of an application"""
+        buffer = BytesIO()
+        self.build(application, buffer)
+        return buffer.getvalue()
+
+    def render_many(self, applications):
+        """
+        Yield (application, pdf bytes) for each application, reusing a single
+        output buffer for the whole batch.
+        """
+        buffer = BytesIO()
+        for application in applications:
+            buffer.seek(0)
+            buffer.truncate()
+            self.build(application, buffer)
+            yield application, buffer.getvalue()
+
+
+_renderer = None
+
+
+def get_renderer():
+    """The CVRenderer shared by the process, built on first use"""
+    global _renderer
+    if _renderer is None:
+        _renderer = CVRenderer()
+    return _renderer
+
+
+def generate_cv_pdf(application):
+    """Generate a modern PDF CV from manual application data - optimized for one page"""
+    return get_renderer().render(application)
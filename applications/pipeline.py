@@ -0,0 +1,77 @@
+"""
+Hiring pipeline of the applications.
+
+An application moves through STAGE_CHOICES (applications.models). Every
+move is recorded as a StageTransition, and the StageCount table holds the
+number of applications per stage: the JobApplication model and queryset
+adjust it in the same transaction as each write, so stage totals are read
+from a handful of counter rows instead of counting the applications table.
+"""
+from django.db import transaction
+
+from core.cache import get_or_build
+from .models import STAGE_CHOICES, STAGE_NEW, JobApplication, StageCount, StageTransition
+
+
+STAGES = dict(STAGE_CHOICES)
+
+# Transitions shown on an application page
+HISTORY_LENGTH = 20
+
+# Applications moved per transaction
+MOVE_CHUNK_SIZE = 500
+
+
+def stage_summary():
+    """[(stage, label, count)] for every stage, read from the counters (cached until the next write)"""
+    def build():
+        totals = StageCount.objects.totals()
+        return [(stage, label, totals[stage]) for stage, label in STAGE_CHOICES]
+    
+    return get_or_build('applications:stage-summary', build)
+
+
+def stage_history(application, limit=HISTORY_LENGTH):
+    """Latest transitions of an application, newest first"""
+    return application.stage_transitions.select_related('changed_by')[:limit]
+
+
+def move_to_stage(queryset, stage, user=None, note='', chunk_size=MOVE_CHUNK_SIZE):
+    """
+    Move the applications of queryset to stage, recording one transition per
+    application that actually changes stage. Leaving the "new" stage also
+    marks the application as reviewed. Applications are moved chunk by chunk
+    in primary key order, one short transaction per chunk, so that a large
+    selection neither locks every row at once nor builds one huge query.
+    Returns the number of applications moved.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage: {stage}")
+    db = queryset.db
+    queryset = queryset.exclude(stage=stage).order_by('pk')
+    values = {'stage': stage}
+    if stage != STAGE_NEW:
+        values['reviewed'] = True
+    moved = 0
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return moved
+        with transaction.atomic(using=db):
+            # Locked and read again: the stage may have changed since the chunk was listed
+            moving = list(
+                JobApplication.objects.using(db).filter(pk__in=pks).exclude(stage=stage)
+                .select_for_update().order_by().values_list('pk', 'stage')
+            )
+            if moving:
+                StageTransition.objects.using(db).bulk_create([
+                    StageTransition(application_id=pk, from_stage=previous, to_stage=stage, changed_by=user, note=note)
+                    for pk, previous in moving
+                ])
+                JobApplication.objects.using(db).filter(pk__in=[pk for pk, previous in moving]).update(**values)
+        moved += len(moving)
+        if len(pks) < chunk_size:
+            return moved
+        last_pk = pks[-1]
@@ -0,0 +1,66 @@
+"""
+Per-role applicant counters.
+
+JobRole.applicant_count and JobRole.unreviewed_count are denormalized from
+the applications linked to each role. The JobApplication model and queryset
+adjust them in the same transaction as every write that creates, deletes,
+re-links or (un)reviews applications, so the job list shows the demand per
+posting without grouping the applications table.
+"""
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import Count, F
+
+from careers.models import JobRole
+
+
+APPLICANTS = 'applicant_count'
+UNREVIEWED = 'unreviewed_count'
+
+
+def role_totals(queryset):
+    """{(role_id, reviewed): rows} of an applications queryset, in one grouped query"""
+    rows = queryset.order_by().values_list('role_id', 'reviewed').annotate(total=Count('pk'))
+    return {(role_id, reviewed): total for role_id, reviewed, total in rows}
+
+
+def add_application(deltas, role_id, reviewed, count=1):
+    """Count applications (negative count to remove them) of a role"""
+    if role_id is None or not count:
+        return
+    deltas[(role_id, APPLICANTS)] += count
+    if not reviewed:
+        deltas[(role_id, UNREVIEWED)] += count
+
+
+def apply_role_deltas(deltas):
+    """Apply a {(role_id, counter): delta} mapping, one UPDATE per role"""
+    per_role = {}
+    for (role_id, counter), delta in deltas.items():
+        if delta:
+            per_role.setdefault(role_id, {})[counter] = F(counter) + delta
+    for role_id, values in sorted(per_role.items()):
+        JobRole.objects.filter(pk=role_id).update(**values)
+
+
+def role_value(value):
+    """Primary key of the role of an update(role=...) / update(role_id=...) value"""
+    if isinstance(value, models.Model):
+        return value.pk
+    return value
+
+
+def is_literal(value):
+    return value is None or isinstance(value, (bool, int, models.Model))
+
+
+def rebuild_role_counters(applications):
+    """Recompute the counters of every role from an applications queryset"""
+    deltas = Counter()
+    for (role_id, reviewed), total in role_totals(applications.exclude(role__isnull=True)).items():
+        add_application(deltas, role_id, reviewed, total)
+    with transaction.atomic():
+        JobRole.objects.update(**{APPLICANTS: 0, UNREVIEWED: 0})
+        apply_role_deltas(deltas)
+    return deltas
@@ -1,3 +1,493 @@
-from django.test import TestCase
+import json
+import re
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.admin_utils import EstimatedCountPaginator
+from careers.models import JobRole
+from core.testing import PerformanceTestCase, seed_applications, seed_jobs
+from .models import (
+    STAGE_HIRED, STAGE_INTERVIEWED, STAGE_NEW, STAGE_REJECTED, STAGE_SHORTLISTED,
+    JobApplication, StageCount, StageTransition, stage_totals,
+)
+from . import cv_benchmark, cv_cache
+from .pdf_utils import NumberedCanvas, generate_cv_pdf, get_renderer
+from .pipeline import move_to_stage, stage_summary
+from .roles import rebuild_role_counters
+
+
+SEED_ROWS = 120
+
+MANUAL_APPLICATION = {
+    'application_type': 'MANUAL',
+    'nom': 'Mukendi',
+    'post_nom': 'Ilunga',
+    'prenom': 'Grâce',
+    'date_of_birth': '15/01/1990',
+    'lieu_de_naissance': 'Kinshasa',
+    'sexe': 'F',
+    'nationalite': 'Congolaise',
+    'physical_address': '12 avenue de la Paix, Gombe',
+    'phone': '+243810000000',
+    'how_heard_about': 'MOTEUR_RECHERCHE',
+    'education': 'Licence en gestion',
+    'skills': 'Service client',
+    'languages': 'Français, Lingala',
+}
+
+
+class ApplicationViewsPerformanceTests(PerformanceTestCase):
+    """Query budgets of the public application form and of the CV views"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        seed_applications(SEED_ROWS)
+    
+    def test_apply_page(self):
+        with self.assertBudget(0):
+            response = self.client.get(reverse('applications:apply'))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_apply_post(self):
+        with self.assertBudget(5):
+            response = self.client.post(reverse('applications:apply'), MANUAL_APPLICATION)
+        self.assertRedirects(response, reverse('applications:success'))
+        self.assertEqual(JobApplication.objects.count(), SEED_ROWS + 1)
+    
+    def test_apply_post_invalid(self):
+        with self.assertBudget(0):
+            response = self.client.post(reverse('applications:apply'), {'application_type': 'MANUAL'})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_success_page(self):
+        with self.assertBudget(0):
+            response = self.client.get(reverse('applications:success'))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_view_cv_pdf(self):
+        self.use_temporary_media()
+        self.login_staff()
+        application = JobApplication.objects.first()
+        with self.assertBudget(3, seconds=3):
+            response = self.client.get(reverse('applications:view_cv_pdf', args=[application.pk]))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class SortNameTests(PerformanceTestCase):
+    """sort_name follows the candidate name and orders the admin list in SQL"""
+    
+    def test_sort_name_kept_in_sync(self):
+        application = JobApplication.objects.create(nom='Ngalula', post_nom='Ilunga', prenom='Désiré', phone='1')
+        self.assertEqual(application.sort_name, 'ngalula ilunga desire')
+        self.assertEqual(application.display_name, 'Désiré Ngalula Ilunga')
+        
+        application.nom = 'Mbuyi'
+        application.save(update_fields=['nom'])
+        application.refresh_from_db()
+        self.assertEqual(application.sort_name, 'mbuyi ilunga desire')
+        
+        legacy = seed_applications(1, nom=None, post_nom=None, prenom=None, full_name='Élodie  KASONGO')[0]
+        self.assertEqual(JobApplication.objects.get(pk=legacy.pk).sort_name, 'elodie kasongo')
+    
+    def test_admin_orders_by_sort_name(self):
+        seed_applications(30)
+        self.login_staff()
+        with self.assertBudget(6):
+            response = self.client.get(reverse('admin:applications_jobapplication_changelist'), {'o': '1'})
+        names = [application.sort_name for application in response.context['cl'].result_list]
+        self.assertEqual(names, sorted(names))
+
+
+class JobApplicationAdminPerformanceTests(PerformanceTestCase):
+    """Query budget of the JobApplication change list in the Django admin"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        seed_applications(SEED_ROWS)
+    
+    def setUp(self):
+        super().setUp()
+        self.login_staff()
+        self.url = reverse('admin:applications_jobapplication_changelist')
+    
+    def test_changelist(self):
+        with self.assertBudget(6):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+    
+    def test_changelist_filtered_by_city(self):
+        self.client.get(self.url)
+        # City choices come from the cache after the first load
+        with self.assertBudget(5):
+            response = self.client.get(self.url, {'city': 'Goma'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(('Goma', 'Goma'), response.context['cl'].filter_specs[2].lookup_choices)
+    
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.assertConstantQueries(lambda: self.client.get(self.url), lambda: seed_applications(SEED_ROWS))
+    
+    def test_change_form(self):
+        application = JobApplication.objects.first()
+        with self.assertBudget(7):
+            response = self.client.get(reverse('admin:applications_jobapplication_change', args=[application.pk]))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_cv_link_signs_url_on_click(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            application = seed_applications(1, application_type='CV_UPLOAD')[0]
+            application.cv_file.save('cv.pdf', SimpleUploadedFile('cv.pdf', b'%PDF-1.4 cv'))
+            link = reverse('admin:applications_jobapplication_cv', args=[application.pk])
+            response = self.client.get(self.url)
+            self.assertContains(response, link)
+            with self.assertBudget(3):
+                response = self.client.get(link)
+            self.assertRedirects(response, application.cv_file.url, fetch_redirect_response=False)
+    
+    def test_estimated_count_falls_back_to_exact_count(self):
+        paginator = EstimatedCountPaginator(JobApplication.objects.order_by('pk'), 100)
+        self.assertEqual(paginator.count, SEED_ROWS)
+
+
+class PipelineTests(PerformanceTestCase):
+    """Stage counters follow every kind of write and stage moves are recorded"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        seed_applications(SEED_ROWS)
+    
+    def assertCountersExact(self):
+        counted = stage_totals(JobApplication.objects.all())
+        self.assertEqual(
+            {stage: count for stage, count in StageCount.objects.totals().items() if count},
+            counted,
+        )
+    
+    def test_counters_follow_writes(self):
+        self.assertEqual(StageCount.objects.totals()[STAGE_NEW], SEED_ROWS)
+        
+        application = JobApplication.objects.create(nom='Kabila', prenom='Joseph', phone='1')
+        application.stage = STAGE_REJECTED
+        application.save()
+        self.assertCountersExact()
+        transition = application.stage_transitions.get()
+        self.assertEqual((transition.from_stage, transition.to_stage), (STAGE_NEW, STAGE_REJECTED))
+        
+        JobApplication.objects.filter(city='Goma').update(stage=STAGE_SHORTLISTED)
+        self.assertCountersExact()
+        JobApplication.objects.filter(city='Lubumbashi').delete()
+        self.assertCountersExact()
+        JobApplication.objects.only('pk').first().delete()
+        self.assertCountersExact()
+    
+    def test_move_to_stage(self):
+        user = User.objects.create_user('recruteur', is_staff=True)
+        queryset = JobApplication.objects.filter(reviewed=False, city='Goma')
+        pks = list(queryset.values_list('pk', flat=True))
+        
+        self.assertEqual(move_to_stage(queryset, STAGE_INTERVIEWED, user=user, note='Entretien le 12'), len(pks))
+        self.assertCountersExact()
+        moved = JobApplication.objects.filter(pk__in=pks)
+        self.assertFalse(moved.exclude(stage=STAGE_INTERVIEWED).exists())
+        self.assertFalse(moved.filter(reviewed=False).exists())
+        self.assertEqual(
+            StageTransition.objects.filter(application__in=pks, changed_by=user, note='Entretien le 12').count(),
+            len(pks),
+        )
+        
+        # Applications already at the stage are not moved again
+        self.assertEqual(move_to_stage(moved, STAGE_INTERVIEWED, user=user), 0)
+        self.assertEqual(StageTransition.objects.count(), len(pks))
+    
+    def test_move_to_stage_in_chunks(self):
+        JobApplication.objects.filter(city='Goma').update(stage=STAGE_SHORTLISTED)
+        queryset = JobApplication.objects.all()
+        
+        with CaptureQueriesContext(connection) as queries:
+            moved = move_to_stage(queryset, STAGE_SHORTLISTED, chunk_size=25)
+        self.assertEqual(moved, SEED_ROWS - SEED_ROWS // 8)
+        # One batch of transitions per chunk of 25 applications still to move
+        inserts = [query for query in queries if query['sql'].startswith(f'INSERT INTO "{StageTransition._meta.db_table}"')]
+        self.assertEqual(len(inserts), -(-moved // 25))
+        self.assertCountersExact()
+        self.assertFalse(queryset.exclude(stage=STAGE_SHORTLISTED).exists())
+        self.assertEqual(StageTransition.objects.count(), moved)
+    
+    def test_summary_reads_counters_only(self):
+        with self.assertBudget(1):
+            summary = stage_summary()
+        self.assertEqual(summary[0], (STAGE_NEW, 'Nouvelle', SEED_ROWS))
+        # Cached until the next write
+        with self.assertBudget(0):
+            stage_summary()
+    
+    def test_rebuild(self):
+        StageCount.objects.all().delete()
+        StageCount.objects.rebuild()
+        self.assertCountersExact()
+
+
+class RoleCounterTests(PerformanceTestCase):
+    """Applications linked to a role keep its applicant and unreviewed counters exact"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.security, cls.cleaning = seed_jobs(2)
+        seed_applications(SEED_ROWS)
+        seed_applications(10, role=cls.security)
+        seed_applications(5, role=cls.cleaning, reviewed=True)
+    
+    def assertCountersExact(self):
+        for role in JobRole.objects.all():
+            linked = JobApplication.objects.filter(role=role)
+            self.assertEqual(
+                (role.applicant_count, role.unreviewed_count),
+                (linked.count(), linked.filter(reviewed=False).count()),
+                role.title,
+            )
+    
+    def test_counters_follow_writes(self):
+        self.assertCountersExact()
+        
+        application = JobApplication.objects.filter(role=self.security).first()
+        application.reviewed = True
+        application.save()
+        self.assertCountersExact()
+        application.role = self.cleaning
+        application.save(update_fields=['role'])
+        self.assertCountersExact()
+        application.delete()
+        self.assertCountersExact()
+        
+        JobApplication.objects.filter(role__isnull=True, city='Goma').update(role=self.security)
+        self.assertCountersExact()
+        JobApplication.objects.filter(role=self.cleaning).update(reviewed=False)
+        self.assertCountersExact()
+        JobApplication.objects.filter(role=self.security).update(role=None)
+        self.assertCountersExact()
+        move_to_stage(JobApplication.objects.filter(role=self.cleaning), STAGE_HIRED)
+        self.assertCountersExact()
+        JobApplication.objects.filter(role=self.cleaning).delete()
+        self.assertCountersExact()
+    
+    def test_editing_role_keeps_counters(self):
+        role = JobRole.objects.get(pk=self.security.pk)
+        seed_applications(3, role=self.security)
+        role.title = 'Agent de sécurité (nuit)'
+        role.save()
+        self.assertCountersExact()
+    
+    def test_rebuild(self):
+        JobRole.objects.update(applicant_count=0, unreviewed_count=0)
+        rebuild_role_counters(JobApplication.objects.all())
+        self.assertCountersExact()
+    
+    def test_apply_for_role(self):
+        with self.assertBudget(1):
+            response = self.client.get(reverse('applications:apply'), {'role': self.security.slug})
+        self.assertContains(response, f'value="{self.security.slug}"')
+        
+        self.client.post(reverse('applications:apply'), {**MANUAL_APPLICATION, 'nom': 'Kalonji', 'role': self.security.slug})
+        application = JobApplication.objects.get(nom='Kalonji')
+        self.assertEqual(application.role, self.security)
+        self.assertCountersExact()
+    
+    def test_job_detail_links_to_apply_with_role(self):
+        response = self.client.get(reverse('careers:detail', args=[self.security.slug]))
+        self.assertContains(response, f"{reverse('applications:apply')}?role={self.security.slug}")
+
+
+class CVCacheTests(PerformanceTestCase):
+    """Generated CV PDFs are rendered once per version of the application"""
+    
+    def setUp(self):
+        super().setUp()
+        self.media_root = self.use_temporary_media()
+        self.login_staff()
+        self.application = seed_applications(1)[0]
+        self.pk = self.application.pk
+        self.url = reverse('applications:view_cv_pdf', args=[self.pk])
+        render = mock.patch('applications.cv_cache.generate_cv_pdf', wraps=cv_cache.generate_cv_pdf)
+        self.render = render.start()
+        self.addCleanup(render.stop)
+    
+    def stored(self):
+        return default_storage.listdir(cv_cache.artifact_dir(self.pk))[1]
+    
+    def test_rendered_once(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+        self.assertTrue(first['Content-Disposition'].startswith('inline; filename'))
+        self.assertEqual(len(self.stored()), 1)
+        
+        second = self.client.get(self.url)
+        self.assertEqual(b''.join(second.streaming_content), b''.join(first.streaming_content))
+        self.assertEqual(self.render.call_count, 1)
+    
+    def test_edit_invalidates(self):
+        self.client.get(self.url)
+        before = self.stored()
+        
+        self.application.skills = 'Conduite, service client'
+        self.application.save()
+        self.client.get(self.url)
+        
+        self.assertEqual(self.render.call_count, 2)
+        self.assertEqual(len(self.stored()), 1)
+        self.assertNotEqual(self.stored(), before)
+    
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertBudget(3):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.render.call_count, 1)
+    
+    def test_prerender_command(self):
+        seed_applications(4, reviewed=False)
+        JobApplication.objects.filter(pk=self.pk).update(reviewed=True)
+        
+        call_command('prerender_cvs', workers=1, chunk_size=2, unreviewed=True, stdout=StringIO())
+        self.assertEqual(self.render.call_count, 4)
+        self.assertFalse(default_storage.exists(cv_cache.artifact_dir(self.pk)))
+        
+        out = StringIO()
+        call_command('prerender_cvs', workers=1, stdout=out)
+        self.assertEqual(self.render.call_count, 5)
+        self.assertIn('1 CV généré(s), 4 déjà à jour', out.getvalue())
+        self.assertEqual(len(self.stored()), 1)
+    
+    def test_prerender_command_workers(self):
+        seed_applications(4)
+        
+        out = StringIO()
+        call_command('prerender_cvs', workers=2, chunk_size=2, stdout=out)
+        self.assertIn('5 CV généré(s), 0 déjà à jour, 0 échec(s)', out.getvalue())
+        for application in JobApplication.objects.all():
+            self.assertTrue(default_storage.exists(cv_cache.artifact_name(application)))
+        
+        out = StringIO()
+        call_command('prerender_cvs', workers=2, stdout=out)
+        self.assertIn('0 CV généré(s), 5 déjà à jour', out.getvalue())
+    
+    def test_delete_purges(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.application.delete()
+        self.assertEqual(self.stored(), [])
+    
+    def test_bulk_delete_purges(self):
+        self.client.get(self.url)
+        self.assertEqual(len(self.stored()), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            JobApplication.objects.filter(pk=self.pk).delete()
+        self.assertEqual(self.stored(), [])
+
+
+class CVRendererTests(SimpleTestCase):
+    
+    def test_render_many(self):
+        applications = [JobApplication(application_type='MANUAL', nom=f'Candidat {i}', phone='0810000000') for i in range(3)]
+        applications[1].skills = 'Conduite, service client'
+        
+        pdfs = [pdf for application, pdf in get_renderer().render_many(applications)]
+        self.assertEqual(len(pdfs), 3)
+        for pdf in pdfs:
+            self.assertTrue(pdf.startswith(b'%PDF') and pdf.rstrip().endswith(b'%%EOF'))
+        self.assertIs(get_renderer(), get_renderer())
+        self.assertEqual(len(generate_cv_pdf(applications[1])), len(pdfs[1]))
+    
+    def page_count(self, pdf):
+        return len(re.findall(rb'/Type /Page\b', pdf))
+    
+    def test_long_cv_fits_one_page(self):
+        application = JobApplication(
+            application_type='MANUAL', nom='Candidat', phone='0810000000',
+            education='Licence en gestion des entreprises. ' * 70, skills='Conduite, service client',
+        )
+        elements, fits = get_renderer().layout(application)
+        self.assertTrue(fits)
+        with mock.patch.object(NumberedCanvas, 'draw_page_number') as draw_page_number:
+            pdf = generate_cv_pdf(application)
+        self.assertEqual(self.page_count(pdf), 1)
+        draw_page_number.assert_not_called()
+    
+    def test_overflow_is_numbered(self):
+        application = JobApplication(
+            application_type='MANUAL', nom='Candidat', phone='0810000000',
+            skills=', '.join(f'compétence {i}' for i in range(1500)),
+        )
+        with mock.patch.object(NumberedCanvas, 'draw_page_number') as draw_page_number:
+            pdf = generate_cv_pdf(application)
+        pages = self.page_count(pdf)
+        self.assertGreater(pages, 1)
+        self.assertEqual(draw_page_number.call_args_list, [mock.call(pages)] * pages)
+
+
+class CVBenchmarkTests(SimpleTestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.baseline = f'{self.directory}/baseline.json'
+    
+    def test_corpus_renders(self):
+        results = cv_benchmark.run_corpus(count=2, repeat=1)
+        self.assertEqual(set(results), set(cv_benchmark.CORPUS))
+        for metrics in results.values():
+            self.assertEqual(set(metrics), set(cv_benchmark.METRICS))
+            self.assertTrue(all(value > 0 for value in metrics.values()))
+        
+        # The size of the PDF does not depend on the machine: a CV growing
+        # beyond the stored baselines is a regression
+        baseline = cv_benchmark.load_baseline()
+        sizes = {name: {'size_bytes': metrics['size_bytes']} for name, metrics in results.items()}
+        self.assertEqual(cv_benchmark.regressions(sizes, baseline), [])
+    
+    def test_markup_is_text(self):
+        application = cv_benchmark.markup_application()
+        application.education = '<para>Licence'
+        elements = get_renderer().elements(application)
+        texts = [flowable.getPlainText() for flowable in elements if hasattr(flowable, 'getPlainText')]
+        self.assertIn('<para>Licence', texts)
+        self.assertIn('Français & Lingala <', texts)
+    
+    def test_regressions(self):
+        baseline = {'cases': {'typique': {'renders_per_sec': 100, 'p50_ms': 10, 'peak_kib': 300, 'size_bytes': 2000}}}
+        results = {'typique': {'renders_per_sec': 70, 'p50_ms': 16, 'p99_ms': 40, 'peak_kib': 320, 'size_bytes': 2300}}
+        self.assertEqual(cv_benchmark.regressions(results, baseline), [
+            ('typique', 'p50_ms', 10, 16),
+            ('typique', 'size_bytes', 2000, 2300),
+        ])
+        self.assertEqual(cv_benchmark.regressions(results, baseline, tolerance=0.2, time_tolerance=0.2), [
+            ('typique', 'renders_per_sec', 100, 70),
+            ('typique', 'p50_ms', 10, 16),
+        ])
+    
+    def test_profile_command(self):
+        options = ['--count', '1', '--repeat', '1', '--baseline', self.baseline]
+        with self.assertRaisesMessage(CommandError, '--update-baseline'):
+            call_command('profile_cvs', *options, stdout=StringIO())
+        
+        call_command('profile_cvs', *options, '--update-baseline', stdout=StringIO())
+        baseline = cv_benchmark.load_baseline(self.baseline)
+        self.assertEqual(set(baseline['cases']), set(cv_benchmark.CORPUS))
+        
+        baseline['cases']['court']['size_bytes'] //= 2
+        with open(self.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file)
+        with self.assertRaisesMessage(CommandError, '1 régression(s)'):
+            call_command('profile_cvs', *options, '--time-tolerance', '100', stdout=StringIO(), stderr=StringIO())
@@ -2,11 +2,11 @@ from django.views.generic import CreateView, TemplateView
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
+from careers.models import JobRole
 from .models import JobApplication
 from .forms import ManualApplicationForm, CVUploadApplicationForm
-from .pdf_utils import generate_cv_pdf
+from .cv_cache import CV_FIELDS, cv_pdf_response
 from core.email_utils import send_application_notification
 
 
@@ -20,10 +20,18 @@ class JobApplicationView(TemplateView):
         return render(request, self.template_name, {
             'manual_form': manual_form,
             'cv_form': cv_form,
+            'role': self.get_role(request.GET.get('role')),
         })
     
+    def get_role(self, slug):
+        """Poste actif choisi sur la page de l'offre (?role=<slug>)"""
+        if not slug:
+            return None
+        return JobRole.objects.filter(slug=slug, is_active=True).only('pk', 'title', 'slug').first()
+    
     def post(self, request, *args, **kwargs):
         application_type = request.POST.get('application_type')
+        role = self.get_role(request.POST.get('role'))
         
         if application_type == 'MANUAL':
             form = ManualApplicationForm(request.POST)
@@ -36,10 +44,13 @@ class JobApplicationView(TemplateView):
             return render(request, self.template_name, {
                 'manual_form': manual_form,
                 'cv_form': cv_form,
+                'role': role,
             })
         
         if form.is_valid():
-            application = form.save()
+            application = form.save(commit=False)
+            application.role = role
+            application.save()
             
             # Envoyer notification email (ne pas bloquer si l'email échoue)
             try:
@@ -85,6 +96,7 @@ class JobApplicationView(TemplateView):
             return render(request, self.template_name, {
                 'manual_form': manual_form,
                 'cv_form': cv_form,
+                'role': role,
             })
 
 
@@ -96,7 +108,7 @@ class ApplicationSuccessView(TemplateView):
 @staff_member_required
 def view_cv_pdf(request, pk):
     """View PDF CV ONLY for manual applications"""
-    application = get_object_or_404(JobApplication, pk=pk)
+    application = get_object_or_404(JobApplication.objects.only('application_type', 'cv_file', *CV_FIELDS), pk=pk)
     
     # ONLY generate PDF for manual applications
     if application.application_type != 'MANUAL':
@@ -107,17 +119,5 @@ def view_cv_pdf(request, pk):
             messages.error(request, 'Aucun CV disponible pour cette candidature.')
             return redirect('admin:applications_jobapplication_changelist')
     
-    # Generate PDF only for manual applications
-    pdf = generate_cv_pdf(application)
-    
-    # Create filename
-    if application.nom and application.prenom:
-        filename = f"CV_{application.prenom}_{application.nom}.pdf"
-    elif application.full_name:
-        filename = f"CV_{application.full_name.replace(' ', '_')}.pdf"
-    else:
-        filename = f"CV_{application.id}.pdf"
-    
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
-    return response
+    # PDF only for manual applications, rendered once per version of the application
+    return cv_pdf_response(request, application)
@@ -4,7 +4,7 @@ from .models import JobRole
 
 @admin.register(JobRole)
 class JobRoleAdmin(admin.ModelAdmin):
-    list_display = ['title', 'employment_type', 'location', 'is_active', 'created_at']
+    list_display = ['title', 'employment_type', 'location', 'is_active', 'applicant_count', 'unreviewed_count', 'created_at']
     list_filter = ['employment_type', 'is_active', 'created_at']
     search_fields = ['title', 'description']
     prepopulated_fields = {'slug': ('title',)}
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("careers", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobrole",
+            index=models.Index(
+                fields=["created_at", "id"], name="jobrole_created_id_idx"
+            ),
+        ),
+    ]
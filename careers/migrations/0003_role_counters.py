@@ -0,0 +1,27 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("careers", "0002_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobrole",
+            name="applicant_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="Candidatures"
+            ),
+        ),
+        migrations.AddField(
+            model_name="jobrole",
+            name="unreviewed_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="Candidatures non examinées"
+            ),
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.db import models
 
+from core.activity import ActivityTrackedModel
 
-class JobRole(models.Model):
+
+class JobRole(ActivityTrackedModel):
     """Modèle pour les postes disponibles chez Shine Congo"""
     
     EMPLOYMENT_TYPE_CHOICES = [
@@ -27,10 +29,29 @@ class JobRole(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Tenus à jour par les candidatures liées (voir applications.roles)
+    applicant_count = models.IntegerField("Candidatures", default=0, editable=False)
+    unreviewed_count = models.IntegerField("Candidatures non examinées", default=0, editable=False)
+    
+    COUNTER_FIELDS = ('applicant_count', 'unreviewed_count')
+    
     class Meta:
         verbose_name = "Poste"
         verbose_name_plural = "Postes"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='jobrole_created_id_idx'),
+        ]
     
     def __str__(self):
         return self.title
+    
+    def save(self, *args, **kwargs):
+        # An edited role never writes back counters read before it was edited
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
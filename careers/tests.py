@@ -1,3 +1,31 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import PerformanceTestCase, seed_jobs
+
+
+class CareersPerformanceTests(PerformanceTestCase):
+    """Query budgets of the public careers pages"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.jobs = seed_jobs(12)
+    
+    def test_list(self):
+        with self.assertBudget(0):
+            response = self.client.get(reverse('careers:list'))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_role_explanation(self):
+        with self.assertBudget(0):
+            response = self.client.get(reverse('careers:role_explanation'))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_job_detail(self):
+        with self.assertBudget(1):
+            response = self.client.get(reverse('careers:detail', args=[self.jobs[0].slug]))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_inactive_job_detail(self):
+        with self.assertBudget(1):
+            response = self.client.get(reverse('careers:detail', args=[self.jobs[3].slug]))
+        self.assertEqual(response.status_code, 404)
@@ -126,6 +126,19 @@ else:
         }
     }
 
+# ============================================================================
+# CACHE
+# ============================================================================
+
+# Shared by all gunicorn workers so that data version bumps (core.cache) are
+# seen by every process. Use Redis/Memcached via CACHE_BACKEND if available.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+    }
+}
+
 # ============================================================================
 # PASSWORD VALIDATION
 # ============================================================================
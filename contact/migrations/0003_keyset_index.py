@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contact", "0002_created_at_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="contactmessage",
+            name="contact_created_at_idx",
+        ),
+        migrations.AddIndex(
+            model_name="contactmessage",
+            index=models.Index(
+                fields=["created_at", "id"], name="contact_created_id_idx"
+            ),
+        ),
+    ]
@@ -1,9 +1,20 @@
 from django.db import models
 
+from core.activity import ActivityTrackedModel
+from core.models import DailyActivityStat
 
-class ContactMessage(models.Model):
+
+class ContactMessage(ActivityTrackedModel):
     """Modèle pour les messages de contact"""
     
+    # Statistiques quotidiennes (voir core.activity)
+    activity_date_field = 'created_at'
+    activity_entity = DailyActivityStat.MESSAGES
+    activity_flags = {
+        'read': DailyActivityStat.MESSAGES_READ,
+        'replied': DailyActivityStat.MESSAGES_REPLIED,
+    }
+    
     name = models.CharField("Nom", max_length=200)
     email = models.EmailField("Email")
     phone = models.CharField("Téléphone", max_length=20, blank=True)
@@ -20,6 +31,9 @@ class ContactMessage(models.Model):
         verbose_name = "Message de contact"
         verbose_name_plural = "Messages de contact"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='contact_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.subject}"
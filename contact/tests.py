@@ -1,3 +1,40 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import PerformanceTestCase, seed_messages
+from .models import ContactMessage
+
+
+class ContactPerformanceTests(PerformanceTestCase):
+    """Query budgets of the public contact form"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        seed_messages(120)
+    
+    def test_contact_page(self):
+        with self.assertBudget(0):
+            response = self.client.get(reverse('contact:contact'))
+        self.assertEqual(response.status_code, 200)
+    
+    def test_contact_post(self):
+        data = {
+            'name': 'Patrick Kasongo',
+            'email': 'patrick@example.com',
+            'phone': '+243820000000',
+            'subject': 'Demande de devis',
+            'message': 'Bonjour, je souhaite un devis pour un service de gardiennage.',
+        }
+        with self.assertBudget(4):
+            response = self.client.post(reverse('contact:contact'), data)
+        self.assertRedirects(response, reverse('contact:success'))
+        self.assertEqual(ContactMessage.objects.count(), 121)
+    
+    def test_contact_post_invalid(self):
+        with self.assertBudget(0):
+            response = self.client.post(reverse('contact:contact'), {'name': 'Patrick'})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_success_page(self):
+        with self.assertBudget(0):
+            response = self.client.get(reverse('contact:success'))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,263 @@
+"""
+Incremental maintenance of the DailyActivityStat rollup.
+
+Tracked models inherit from ActivityTrackedModel and declare:
+  - activity_date_field: datetime field that decides which day a row counts for
+  - activity_entity: entity counted once per row
+  - activity_flags: {boolean field: entity} counted while the field is true
+
+Instance saves/deletes and queryset update()/delete()/bulk_create() adjust the
+rollup in the same transaction, so the dashboard never has to scan the raw
+tables. Subclasses maintaining their own counters override after_save() and
+before_delete(), which run inside the same transaction. Every write also replaces the cache data version (core.cache) once
+committed. Models without an activity_entity only invalidate the cache.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .cache import bump_data_version
+from .models import DailyActivityStat
+
+
+def start_of_day(day):
+    """Aware datetime for local midnight, usable as a sargable lower bound"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def local_day(value):
+    """Local calendar day of a datetime"""
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def add_to_stat(day, entity, delta):
+    """Add delta to the (day, entity) counter, creating the row if needed"""
+    if not delta:
+        return
+    stats = DailyActivityStat.objects.filter(date=day, entity=entity)
+    if stats.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            DailyActivityStat.objects.create(date=day, entity=entity, count=delta)
+    except IntegrityError:
+        # Created concurrently by another request
+        stats.update(count=F('count') + delta)
+
+
+def apply_deltas(deltas):
+    """Apply a {(day, entity): delta} mapping"""
+    for (day, entity), delta in sorted(deltas.items()):
+        add_to_stat(day, entity, delta)
+
+
+def data_changed(using=None):
+    """Invalidate versioned cache entries once the current transaction commits"""
+    transaction.on_commit(bump_data_version, using=using)
+
+
+def grouped_counts(queryset, date_field, **aggregates):
+    """Aggregate a queryset per local day in a single grouped query"""
+    return (
+        queryset.order_by()
+        .annotate(day=TruncDate(date_field))
+        .values('day')
+        .annotate(**aggregates)
+    )
+
+
+def rebuild_stats(model, first_day, last_day):
+    """
+    Recompute the rollup rows of a tracked model for an inclusive range of
+    days from the raw table. Returns the number of rows written.
+    """
+    aggregates = {'total': Count('pk')}
+    for field in model.activity_flags:
+        aggregates[field] = Count('pk', filter=Q(**{field: True}))
+
+    date_field = model.activity_date_field
+    queryset = model._default_manager.filter(**{
+        f'{date_field}__gte': start_of_day(first_day),
+        f'{date_field}__lt': start_of_day(last_day + timedelta(days=1)),
+    })
+
+    stats = []
+    for row in grouped_counts(queryset, date_field, **aggregates):
+        if row['total']:
+            stats.append(DailyActivityStat(date=row['day'], entity=model.activity_entity, count=row['total']))
+        for field, entity in model.activity_flags.items():
+            if row[field]:
+                stats.append(DailyActivityStat(date=row['day'], entity=entity, count=row[field]))
+
+    entities = [model.activity_entity, *model.activity_flags.values()]
+    with transaction.atomic():
+        DailyActivityStat.objects.filter(
+            entity__in=entities, date__gte=first_day, date__lte=last_day
+        ).delete()
+        DailyActivityStat.objects.bulk_create(stats)
+    return len(stats)
+
+
+class ActivityQuerySet(models.QuerySet):
+    """QuerySet whose bulk update(), delete() and bulk_create() keep the rollup in step"""
+
+    def update(self, **kwargs):
+        model = self.model
+        flags = {field: entity for field, entity in model.activity_flags.items() if field in kwargs}
+        if not flags:
+            rows = super().update(**kwargs)
+            if rows:
+                data_changed(self.db)
+            return rows
+
+        date_field = model.activity_date_field
+        literal = {field: entity for field, entity in flags.items() if isinstance(kwargs[field], bool)}
+        with transaction.atomic(using=self.db):
+            deltas = Counter()
+            if literal:
+                # Count, per day, the rows whose flag is about to change
+                aggregates = {
+                    field: Count('pk', filter=~Q(**{field: kwargs[field]}))
+                    for field in literal
+                }
+                for row in grouped_counts(self, date_field, **aggregates):
+                    for field, entity in literal.items():
+                        deltas[(row['day'], entity)] += row[field] if kwargs[field] else -row[field]
+
+            days = None
+            if len(literal) < len(flags):
+                # Expressions: recompute the affected days afterwards
+                days = set(
+                    self.order_by().annotate(day=TruncDate(date_field))
+                    .values_list('day', flat=True).distinct()
+                )
+
+            rows = super().update(**kwargs)
+            apply_deltas(deltas)
+            if days:
+                rebuild_stats(model, min(days), max(days))
+            if rows:
+                data_changed(self.db)
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        model = self.model
+        aggregates = {'total': Count('pk')}
+        for field in model.activity_flags:
+            aggregates[field] = Count('pk', filter=Q(**{field: True}))
+
+        with transaction.atomic(using=self.db):
+            deltas = Counter()
+            if model.activity_entity:
+                for row in grouped_counts(self, model.activity_date_field, **aggregates):
+                    deltas[(row['day'], model.activity_entity)] -= row['total']
+                    for field, entity in model.activity_flags.items():
+                        deltas[(row['day'], entity)] -= row[field]
+            result = super().delete()
+            apply_deltas(deltas)
+            if result[0]:
+                data_changed(self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            deltas = Counter()
+            for obj in objs:
+                deltas.update(obj._activity_save_deltas(adding=True, update_fields=None))
+                obj._activity_state = obj._current_activity_state()
+            apply_deltas(deltas)
+            if objs:
+                data_changed(self.db)
+        return objs
+
+    bulk_create.alters_data = True
+
+
+class ActivityTrackedModel(models.Model):
+    """Abstract base for models whose writes feed DailyActivityStat and the cache version"""
+
+    activity_date_field = None
+    activity_entity = None
+    activity_flags = {}
+
+    objects = ActivityQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._activity_state = instance._current_activity_state()
+        return instance
+
+    def _current_activity_state(self):
+        # Read __dict__ directly so deferred fields are never loaded
+        return {field: bool(self.__dict__[field]) for field in self.activity_flags if field in self.__dict__}
+
+    def _activity_day(self):
+        return local_day(getattr(self, self.activity_date_field))
+
+    def _activity_save_deltas(self, adding, update_fields):
+        deltas = Counter()
+        if not self.activity_entity:
+            return deltas
+        if adding:
+            day = self._activity_day()
+            deltas[(day, self.activity_entity)] += 1
+            for field, entity in self.activity_flags.items():
+                if getattr(self, field):
+                    deltas[(day, entity)] += 1
+            return deltas
+
+        previous = getattr(self, '_activity_state', {})
+        current = self._current_activity_state()
+        for field, entity in self.activity_flags.items():
+            if update_fields is not None and field not in update_fields:
+                continue
+            if field in previous and field in current and previous[field] != current[field]:
+                deltas[(self._activity_day(), entity)] += 1 if current[field] else -1
+        return deltas
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            apply_deltas(self._activity_save_deltas(adding, kwargs.get('update_fields')))
+            self.after_save(adding, kwargs.get('update_fields'))
+            data_changed(kwargs.get('using'))
+        self._activity_state = self._current_activity_state()
+    
+    def after_save(self, adding, update_fields):
+        """Called in the save transaction, once the row is written"""
+    
+    def before_delete(self):
+        """Called in the delete transaction, before the row is deleted"""
+
+    def delete(self, *args, **kwargs):
+        deltas = Counter()
+        if self.activity_entity:
+            day = self._activity_day()
+            deltas[(day, self.activity_entity)] -= 1
+            for field, entity in self.activity_flags.items():
+                if getattr(self, field):
+                    deltas[(day, entity)] -= 1
+
+        with transaction.atomic(using=kwargs.get('using')):
+            self.before_delete()
+            result = super().delete(*args, **kwargs)
+            apply_deltas(deltas)
+            data_changed(kwargs.get('using'))
+        return result
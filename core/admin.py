@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import DailyActivityStat
 
-# Register your models here.
+
+@admin.register(DailyActivityStat)
+class DailyActivityStatAdmin(admin.ModelAdmin):
+    list_display = ['date', 'entity', 'count']
+    list_filter = ['entity']
+    date_hierarchy = 'date'
+    readonly_fields = ['date', 'entity', 'count']
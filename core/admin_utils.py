@@ -0,0 +1,47 @@
+"""
+Django admin helpers for tables too large for exact counts on every page.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """
+    Row count estimate from the PostgreSQL planner statistics (kept up to
+    date by autovacuum/ANALYZE), or None on other databases or for tables
+    never analyzed.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses the planner estimate instead of COUNT(*) for the
+    unfiltered list of a large table. Filtered lists and small tables keep
+    the exact count.
+    """
+
+    # Below this estimate an exact count is cheap enough
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(queryset.model, using=queryset.db)
+            if estimate is not None and estimate > self.exact_count_limit:
+                return estimate
+        return super().count
@@ -0,0 +1,56 @@
+"""
+Versioned cache for data derived from applications, messages and job roles.
+
+Every write to a tracked model (see core.activity) replaces the data version
+once its transaction commits. Cached entries are stored together with the
+version they were computed for, so a read is a single get_many() round trip
+and entries from an older version are simply recomputed.
+"""
+import time
+
+from django.core.cache import cache
+
+
+VERSION_KEY = 'shinecongo:data-version'
+
+# Safety net only: entries are normally invalidated by version changes
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def _new_version():
+    # Time-based rather than a counter so that a version key lost to cache
+    # eviction can never come back to a value already used by old entries.
+    return time.time_ns() // 1000
+
+
+def bump_data_version():
+    """Invalidate every versioned cache entry"""
+    cache.set(VERSION_KEY, _new_version(), None)
+
+
+def get_data_version():
+    """Current data version, initialised on first use"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_or_build(key, build, timeout=DEFAULT_TIMEOUT):
+    """
+    Return the value cached under key for the current data version, calling
+    build() and storing its result when the entry is missing or outdated.
+    """
+    values = cache.get_many([VERSION_KEY, key])
+    version = values.get(VERSION_KEY)
+    if version is None:
+        version = get_data_version()
+
+    entry = values.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    value = build()
+    cache.set(key, (version, value), timeout)
+    return value
@@ -7,7 +7,7 @@ from django.utils.html import strip_tags
 def send_application_notification(application):
     """Envoie une notification email lors d'une nouvelle candidature"""
     
-    subject = f'Nouvelle candidature: {application.full_name}'
+    subject = f'Nouvelle candidature: {application.display_name}'
     
     # Préparer le contenu
     cv_url = application.cv_file.url if application.cv_file else 'Aucun CV'
@@ -23,7 +23,7 @@ def send_application_notification(application):
         
         <div style="background-color: #f4f4f4; padding: 20px; border-radius: 5px; margin: 20px 0;">
             <h3 style="color: #2A9D8F; margin-top: 0;">Informations du Candidat</h3>
-            <p><strong>Nom:</strong> {application.full_name}</p>
+            <p><strong>Nom:</strong> {application.display_name}</p>
             <p><strong>Date de naissance:</strong> {date_of_birth_str}</p>
             <p><strong>Téléphone:</strong> {application.phone}</p>
             <p><strong>Ville:</strong> {application.city}</p>
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from applications.models import JobApplication
+from contact.models import ContactMessage
+from core.activity import local_day, rebuild_stats
+
+
+TRACKED_MODELS = [JobApplication, ContactMessage]
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les statistiques quotidiennes (DailyActivityStat) par lots de jours"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help="Premier jour à reconstruire (AAAA-MM-JJ). Par défaut: première donnée.",
+        )
+        parser.add_argument(
+            '--batch-days',
+            type=int,
+            default=31,
+            help="Nombre de jours reconstruits par transaction (défaut: 31)",
+        )
+
+    def handle(self, *args, **options):
+        batch_days = options['batch_days']
+        if batch_days < 1:
+            raise CommandError("--batch-days doit être supérieur à 0.")
+
+        today = timezone.localdate()
+        for model in TRACKED_MODELS:
+            first_day = self._first_day(model, options['since'])
+            if first_day is None:
+                self.stdout.write(f"{model._meta.verbose_name_plural}: aucune donnée")
+                continue
+
+            written = 0
+            batch_start = first_day
+            while batch_start <= today:
+                batch_end = min(batch_start + timedelta(days=batch_days - 1), today)
+                written += rebuild_stats(model, batch_start, batch_end)
+                batch_start = batch_end + timedelta(days=1)
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{model._meta.verbose_name_plural}: {written} ligne(s) écrite(s) "
+                f"du {first_day:%d/%m/%Y} au {today:%d/%m/%Y}"
+            ))
+
+    def _first_day(self, model, since):
+        if since:
+            try:
+                return date.fromisoformat(since)
+            except ValueError:
+                raise CommandError("--since doit être au format AAAA-MM-JJ.")
+        first = model._default_manager.aggregate(first=Min(model.activity_date_field))['first']
+        return local_day(first) if first else None
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyActivityStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Date")),
+                (
+                    "entity",
+                    models.CharField(
+                        choices=[
+                            ("applications", "Candidatures reçues"),
+                            ("applications_reviewed", "Candidatures examinées"),
+                            ("messages", "Messages reçus"),
+                            ("messages_read", "Messages lus"),
+                            ("messages_replied", "Messages répondus"),
+                        ],
+                        max_length=30,
+                        verbose_name="Entité",
+                    ),
+                ),
+                ("count", models.IntegerField(default=0, verbose_name="Nombre")),
+            ],
+            options={
+                "verbose_name": "Statistique quotidienne",
+                "verbose_name_plural": "Statistiques quotidiennes",
+                "ordering": ["-date", "entity"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailyactivitystat",
+            constraint=models.UniqueConstraint(
+                fields=("entity", "date"), name="activity_stat_entity_date_uniq"
+            ),
+        ),
+    ]
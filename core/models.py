@@ -1,3 +1,35 @@
 from django.db import models
 
-# Create your models here.
+
+class DailyActivityStat(models.Model):
+    """Compteurs quotidiens pré-agrégés (candidatures, messages, examens, réponses)"""
+
+    APPLICATIONS = 'applications'
+    APPLICATIONS_REVIEWED = 'applications_reviewed'
+    MESSAGES = 'messages'
+    MESSAGES_READ = 'messages_read'
+    MESSAGES_REPLIED = 'messages_replied'
+
+    ENTITY_CHOICES = [
+        (APPLICATIONS, 'Candidatures reçues'),
+        (APPLICATIONS_REVIEWED, 'Candidatures examinées'),
+        (MESSAGES, 'Messages reçus'),
+        (MESSAGES_READ, 'Messages lus'),
+        (MESSAGES_REPLIED, 'Messages répondus'),
+    ]
+
+    # Jour (heure locale) de réception de la candidature ou du message
+    date = models.DateField("Date")
+    entity = models.CharField("Entité", max_length=30, choices=ENTITY_CHOICES)
+    count = models.IntegerField("Nombre", default=0)
+
+    class Meta:
+        verbose_name = "Statistique quotidienne"
+        verbose_name_plural = "Statistiques quotidiennes"
+        ordering = ['-date', 'entity']
+        constraints = [
+            models.UniqueConstraint(fields=['entity', 'date'], name='activity_stat_entity_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.date:%d/%m/%Y} - {self.get_entity_display()}: {self.count}"
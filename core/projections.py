@@ -0,0 +1,57 @@
+"""
+Column projections for list and summary views.
+
+A Projection names the columns a view actually displays and turns values()
+rows into light Row objects, so list pages never fetch the large text
+columns (education, skills, message, notes...) nor build full model
+instances for rows that are only shown.
+"""
+
+
+class Row:
+    """Read-only row built from a values() dict, usable like a model instance in templates"""
+
+    # Turned on by core.testing.forbid_deferred_loads() to report columns
+    # missing from the projection instead of rendering them as empty
+    strict = False
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+    def __getattr__(self, name):
+        # Only called for attributes that were not fetched
+        if self.strict and not name.startswith('__'):
+            raise AssertionError(f"{type(self).__name__}.{name} is not part of the projection")
+        raise AttributeError(name)
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __repr__(self):
+        return f"<{type(self).__name__}: {self.id}>"
+
+
+class Projection:
+    """The columns a list or summary view needs, and the row class to wrap them in"""
+
+    def __init__(self, *fields, row_class=Row):
+        if 'id' not in fields:
+            fields = ('id', *fields)
+        self.fields = fields
+        self.row_class = row_class
+
+    def values(self, queryset):
+        """Restrict a queryset to the projected columns (rows are dicts)"""
+        return queryset.values(*self.fields)
+
+    def wrap(self, rows):
+        """Turn values() dicts into row objects"""
+        return [self.row_class(row) for row in rows]
+
+    def rows(self, queryset, limit=None):
+        """Fetch the projected rows of a queryset, at most limit of them"""
+        queryset = self.values(queryset)
+        if limit is not None:
+            queryset = queryset[:limit]
+        return self.wrap(queryset)
@@ -0,0 +1,30 @@
+"""
+Helpers of the responses written while they are sent (StreamingHttpResponse).
+"""
+
+
+class ZipStream:
+    """
+    Write-only file for zipfile: what the archive writes is kept until the
+    generator takes it. Without tell() or seek(), zipfile writes each entry
+    in one pass, its sizes following the data (data descriptors). An entry
+    whose size is not set on its ZipInfo beforehand must be opened with
+    force_zip64=True: its header cannot be rewritten once it grows past 4 GiB.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts, self.size = [], 0
+        return data
@@ -0,0 +1,184 @@
+"""
+Helpers shared by the test suites.
+"""
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, models
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from applications.models import JobApplication
+from careers.models import JobRole
+from contact.models import ContactMessage
+
+from .projections import Row
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Slow machines (CI runners) can relax every wall-time ceiling, e.g. PERF_TIME_FACTOR=3
+TIME_FACTOR = float(os.environ.get('PERF_TIME_FACTOR', '1'))
+
+CITIES = ['Kinshasa', 'Lubumbashi', 'Goma', 'Kisangani', 'Bukavu', 'Matadi', 'Mbuji-Mayi', 'Kananga']
+FIRST_NAMES = ['Grâce', 'Patrick', 'Merveille', 'Jonathan', 'Divine', 'Christelle', 'Héritier', 'Esther']
+LAST_NAMES = ['Mukendi', 'Kabila', 'Tshisekedi', 'Mbuyi', 'Ilunga', 'Kasongo', 'Lukusa', 'Ngalula']
+PARAGRAPH = (
+    "Diplôme d'État en Sciences Commerciales et Gestion, expérience en service client, "
+    "maîtrise de Microsoft Office, bonne communication et travail en équipe. "
+) * 8
+
+
+def seed_applications(count, **fields):
+    """Insert count realistic manual applications in one bulk query"""
+    applications = []
+    for i in range(count):
+        values = {
+            'application_type': 'MANUAL',
+            'nom': LAST_NAMES[i % len(LAST_NAMES)],
+            'post_nom': LAST_NAMES[(i + 3) % len(LAST_NAMES)],
+            'prenom': FIRST_NAMES[i % len(FIRST_NAMES)],
+            'date_of_birth': date(1975, 1, 1) + timedelta(days=(i * 97) % 12000),
+            'lieu_de_naissance': CITIES[(i + 1) % len(CITIES)],
+            'sexe': 'MF'[i % 2],
+            'nationalite': 'Congolaise',
+            'physical_address': f'{i} avenue de la Paix, Gombe',
+            'phone': f'+24381{i:07d}',
+            'city': CITIES[i % len(CITIES)],
+            'how_heard_about': JobApplication.HOW_HEARD_CHOICES[i % 3][0],
+            'education': PARAGRAPH,
+            'skills': PARAGRAPH,
+            'languages': 'Français, Lingala, Anglais',
+            'message': PARAGRAPH,
+            'reviewed': i % 3 == 0,
+        }
+        values.update(fields)
+        applications.append(JobApplication(**values))
+    return JobApplication.objects.bulk_create(applications)
+
+
+def seed_messages(count, **fields):
+    """Insert count contact messages in one bulk query"""
+    messages = []
+    for i in range(count):
+        values = {
+            'name': f'{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[i % len(LAST_NAMES)]}',
+            'email': f'contact{i}@example.com',
+            'phone': f'+24382{i:07d}',
+            'subject': f'Demande de partenariat {i}',
+            'message': PARAGRAPH,
+            'read': i % 2 == 0,
+            'replied': i % 4 == 0,
+        }
+        values.update(fields)
+        messages.append(ContactMessage(**values))
+    return ContactMessage.objects.bulk_create(messages)
+
+
+def seed_jobs(count, **fields):
+    """Insert count job roles in one bulk query (slugs follow the existing rows)"""
+    jobs = []
+    offset = JobRole.objects.count()
+    for i in range(offset, offset + count):
+        values = {
+            'title': f'Agent de sécurité {i}',
+            'slug': f'agent-de-securite-{i}',
+            'description': PARAGRAPH,
+            'responsibilities': PARAGRAPH,
+            'requirements': PARAGRAPH,
+            'benefits': PARAGRAPH,
+            'is_active': i % 4 != 3,
+        }
+        values.update(fields)
+        jobs.append(JobRole(**values))
+    return JobRole.objects.bulk_create(jobs)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PerformanceTestCase(TestCase):
+    """
+    Base class of the query-budget tests: every view gets a fixed number of
+    queries and a wall-time ceiling, and list views must issue the same
+    number of queries whatever the number of rows.
+    """
+
+    # Default wall-time ceiling of one request, in seconds
+    time_limit = 1.0
+
+    def setUp(self):
+        cache.clear()
+
+    def use_temporary_media(self):
+        """Write the files stored by the test (uploads, CV artifacts) to a temporary MEDIA_ROOT"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return media_root
+
+    def login_staff(self):
+        user = User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True, is_superuser=True)
+        self.client.force_login(user)
+        return user
+
+    @contextmanager
+    def assertBudget(self, queries, seconds=None):
+        """Fail if the block runs more than `queries` queries or takes more than `seconds`"""
+        seconds = (seconds or self.time_limit) * TIME_FACTOR
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            yield captured
+            elapsed = time.perf_counter() - start
+        executed = len(captured)
+        if executed > queries:
+            sql = '\n'.join(f"{i}. {query['sql']}" for i, query in enumerate(captured.captured_queries, 1))
+            self.fail(f"{executed} queries executed, budget is {queries}:\n{sql}")
+        self.assertLessEqual(elapsed, seconds, f"took {elapsed:.3f}s, ceiling is {seconds:.3f}s")
+
+    def assertConstantQueries(self, request, seed):
+        """
+        Run request(), seed() more rows, run request() again: the query count
+        must not change (no query per row).
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as before:
+            request()
+        seed()
+        cache.clear()
+        with CaptureQueriesContext(connection) as after:
+            request()
+        self.assertEqual(
+            len(before), len(after),
+            f"query count grew with the number of rows: {len(before)} -> {len(after)}",
+        )
+
+
+@contextmanager
+def forbid_deferred_loads():
+    """
+    Fail instead of silently costing one query per row when code run in the
+    block reads a field left out by only()/defer(), or a column that is not
+    part of a Row projection (templates would otherwise render it empty).
+    """
+    refresh_from_db = models.Model.refresh_from_db
+
+    def guarded_refresh_from_db(instance, using=None, fields=None, **kwargs):
+        deferred = instance.get_deferred_fields()
+        if fields and deferred.issuperset(fields):
+            raise AssertionError(
+                f"Deferred field(s) {', '.join(sorted(fields))} of {type(instance).__name__} "
+                f"loaded lazily, add them to the projection"
+            )
+        return refresh_from_db(instance, using=using, fields=fields, **kwargs)
+
+    with mock.patch.object(models.Model, 'refresh_from_db', guarded_refresh_from_db), \
+            mock.patch.object(Row, 'strict', True):
+        yield
@@ -1,3 +1,19 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import PerformanceTestCase
+
+
+class PublicPagesPerformanceTests(PerformanceTestCase):
+    """Static public pages must not touch the database"""
+    
+    def test_pages(self):
+        for name in ['home', 'services', 'about', 'ceo', 'privacy', 'terms']:
+            with self.subTest(page=name):
+                with self.assertBudget(0):
+                    response = self.client.get(reverse(f'core:{name}'))
+                self.assertEqual(response.status_code, 200)
+    
+    def test_favicon(self):
+        with self.assertBudget(0):
+            response = self.client.get('/favicon.ico')
+        self.assertEqual(response.status_code, 302)